@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Async (ASGI) serving mode for the TechCorp chatbot API
+
+Exposes the same routes as web_interface.py on FastAPI. Handlers run on the
+event loop and hand blocking persistence and integration calls to a bounded
+thread pool, so concurrent requests share a fixed set of worker threads
+instead of needing one thread each.
+
+Run with:
+    uvicorn asgi_app:app --host 0.0.0.0 --port 8000 --workers 4
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from fastapi import Body, FastAPI, HTTPException
+from fastapi.responses import FileResponse, JSONResponse
+
+from web_interface import (
+    handle_chat, handle_solution_review, session_store, mock_sheets, mock_slack,
+    conversation_manager, techcorp_ai, warpgpt, services, warm_up_services, kb_watcher
+)
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+# Shared by all requests of this worker process
+executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('ASGI_EXECUTOR_WORKERS', 32)),
+    thread_name_prefix='chat-blocking'
+)
+
+
+async def offload(func, *args, **kwargs):
+    """Run a blocking call on the executor without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_up_services()
+    kb_watcher.start()
+    yield
+    kb_watcher.stop()
+    executor.shutdown(wait=True)
+
+
+app = FastAPI(title="TechCorp Chatbot API", lifespan=lifespan)
+
+
+def _template(name: str) -> FileResponse:
+    path = os.path.join(TEMPLATES_DIR, name)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"Template {name} not found")
+    return FileResponse(path, media_type='text/html')
+
+
+@app.get('/')
+async def index():
+    """Main chatbot interface"""
+    return _template('chat.html')
+
+@app.post('/chat')
+async def chat(data: Dict[str, Any] = Body(default={})):
+    """Handle chat messages"""
+    return await offload(handle_chat, data)
+
+@app.get('/leads')
+async def view_leads():
+    """View collected leads"""
+    return await offload(mock_sheets.get_leads)
+
+@app.get('/notifications')
+async def view_notifications():
+    """View notifications"""
+    return await offload(mock_slack.get_notifications)
+
+@app.get('/conversation-history')
+async def conversation_history(limit: int = 20, session_id: Optional[str] = None):
+    """Get recent conversation history"""
+    def collect():
+        return {
+            'conversations': conversation_manager.get_recent_conversations(limit, session_id),
+            'stats': conversation_manager.get_conversation_stats()
+        }
+    return await offload(collect)
+
+@app.get('/session-stats')
+async def session_stats():
+    """Get session store counters"""
+    return session_store.get_stats()
+
+@app.get('/services')
+async def service_status():
+    """Which services are loaded and how long each took to start"""
+    return services.status()
+
+@app.post('/feedback')
+async def add_feedback(data: Dict[str, Any] = Body(default={})):
+    """Add feedback for a conversation"""
+    await offload(
+        conversation_manager.add_feedback,
+        data.get('conversation_id'), data.get('feedback'),
+        data.get('quality_rating', 3), data.get('suggested_response')
+    )
+    return {'status': 'success', 'message': 'Feedback added successfully'}
+
+@app.get('/learning-data')
+async def learning_data():
+    """Export learning data for analysis"""
+    return await offload(conversation_manager.export_learning_data)
+
+@app.post('/suggest-response')
+async def suggest_response(data: Dict[str, Any] = Body(default={})):
+    """Get suggested improved response based on learning"""
+    suggested = await offload(conversation_manager.suggest_improved_response, data.get('user_input', ''))
+    return {
+        'suggested_response': suggested,
+        'has_suggestion': suggested is not None
+    }
+
+@app.post('/warp-ai/kb-search')
+async def warp_kb_search(data: Dict[str, Any] = Body(default={})):
+    """TechCorp Warp AI knowledge base search"""
+    return await offload(techcorp_ai.execute_kb_command, data.get('query', ''))
+
+@app.post('/warp-ai/log-solution')
+async def warp_log_solution(data: Dict[str, Any] = Body(default={})):
+    """Log new solution to TechCorp knowledge base"""
+    result = await offload(
+        techcorp_ai.execute_log_command,
+        data.get('problem', ''), data.get('solution', ''), data.get('category', 'general')
+    )
+    return {'status': 'success', 'message': result}
+
+@app.get('/warp-ai/solutions')
+async def warp_solutions(status: Optional[str] = None, category: Optional[str] = None, limit: Optional[int] = None):
+    """Logged solutions for review, filtered by status and/or category"""
+    def collect():
+        return {
+            'solutions': techcorp_ai.kb.query_solutions(status=status, category=category, limit=limit),
+            'counts': techcorp_ai.kb.solutions_journal.counts()
+        }
+    return await offload(collect)
+
+@app.post('/warp-ai/solutions/{solution_id}/review')
+async def warp_review_solution(solution_id: str, data: Dict[str, Any] = Body(default={})):
+    """Approve or reject a logged solution"""
+    body, status_code = await offload(handle_solution_review, solution_id, data)
+    return JSONResponse(body, status_code=status_code)
+
+@app.get('/warp-ai/conversation-context')
+async def warp_conversation_context():
+    """Get TechCorp Warp AI conversation context"""
+    return {'context': await offload(techcorp_ai.get_conversation_context)}
+
+@app.get('/warp-ai/knowledge-base')
+async def warp_knowledge_base():
+    """Get TechCorp knowledge base contents"""
+    def collect():
+        return {
+            'knowledge_base': techcorp_ai.kb.knowledge_base,
+            'solutions_log': techcorp_ai.kb.solutions
+        }
+    return await offload(collect)
+
+@app.get('/warpgpt2/status')
+async def warpgpt2_status():
+    """Get WarpGPT 2.0 system status"""
+    return await offload(warpgpt.get_system_status)
+
+@app.post('/warpgpt2/kb-search')
+async def warpgpt2_kb_search(data: Dict[str, Any] = Body(default={})):
+    """WarpGPT 2.0 hybrid knowledge base search"""
+    results, confidence = await offload(warpgpt.execute_kb_search, data.get('query', ''), data.get('context', {}))
+    return {
+        'results': results,
+        'confidence': confidence,
+        'threshold_met': confidence >= warpgpt.confidence_threshold,
+        'verified': confidence >= warpgpt.verified_threshold
+    }
+
+@app.post('/warpgpt2/process')
+async def warpgpt2_process(data: Dict[str, Any] = Body(default={})):
+    """Process request with WarpGPT 2.0 protocols"""
+    def process():
+        response = warpgpt.process_warp_request(data.get('input', ''))
+        return {
+            'response': response,
+            'system_status': warpgpt.get_system_status(),
+            'timestamp': datetime.now().isoformat()
+        }
+    return await offload(process)
+
+@app.get('/warpgpt2/knowledge-base')
+async def warpgpt2_knowledge_base():
+    """Get WarpGPT 2.0 knowledge base"""
+    def collect():
+        knowledge_base = warpgpt.kb.knowledge_base
+        return {
+            'knowledge_base': knowledge_base,
+            'total_entries': len(knowledge_base),
+            'confidence_threshold': warpgpt.confidence_threshold,
+            'verified_threshold': warpgpt.verified_threshold
+        }
+    return await offload(collect)
+
+@app.get('/dashboard')
+async def dashboard():
+    """Admin dashboard"""
+    return _template('dashboard.html')
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("Starting TechCorp Chatbot API (ASGI)...")
+    uvicorn.run(
+        'asgi_app:app',
+        host=os.getenv('API_HOST', '0.0.0.0'),
+        port=int(os.getenv('API_PORT', 8000)),
+        workers=int(os.getenv('API_WORKERS', 1))
+    )
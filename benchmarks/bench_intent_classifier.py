@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for MockOpenAI intent classification.
+
+Compares the previous per-pattern ``re.search`` + keyword scan chain with the
+precompiled priority-ordered keyword table and checks both agree on every
+message.
+
+Usage: python benchmarks/bench_intent_classifier.py [--iterations N]
+"""
+
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'integrations'))
+
+from mock_services import MockOpenAI
+
+MESSAGES = [
+    "Hello there!",
+    "thanks, that's all for today",
+    "What products do you sell?",
+    "I have a problem with my account",
+    "How much does the enterprise plan cost?",
+    "Can I get a demo next week?",
+    "We are a large scale manufacturing firm",
+    "Does it integrate with Salesforce via API?",
+    "Tell me about your company",
+    "what do you do",
+    "Who is your CEO",
+    "xyzzy",
+    "Our production cluster keeps failing after the upgrade and we need guidance " * 4,
+]
+
+
+def legacy_classify(user_input: str) -> str:
+    """Category selection as implemented before the precompiled classifier"""
+    user_input_lower = user_input.lower()
+
+    pattern_response_mapping = [
+        (r"hello|hi|hey|good morning|good afternoon|what's up", "greeting"),
+        (r"bye|goodbye|thanks|thank you|that's all|see you", "goodbye"),
+        (r"(product|service|offerings|solutions|sell|provide|manufacture)", "product_inquiry"),
+        (r"(support|help|problem|issue|trouble|error|assist|call|contact)", "support"),
+        (r"(price|cost|pricing|quote|budget|charge|expense)", "pricing"),
+        (r"(demo|demonstration|show me|trial|see)", "demo"),
+        (r"(enterprise|corporation|business|company|firm|organization)", "enterprise"),
+        (r"(integration|integrate|api|connect|sync|support)", "integration"),
+        (r"(company|about|who are you|tell me|background|history|info)", "company_info"),
+        (r"(about|details|information|data|insight|facts)", "about")
+    ]
+    for pattern, response_category in pattern_response_mapping:
+        if re.search(pattern, user_input_lower):
+            return response_category
+
+    if any(word in user_input_lower for word in ["hello", "hi", "hey", "good morning", "good afternoon"]):
+        return "greeting"
+    elif any(word in user_input_lower for word in ["bye", "goodbye", "thanks", "thank you", "that's all"]):
+        return "goodbye"
+    elif any(word in user_input_lower for word in ["product", "service", "what do you", "offerings", "solutions"]):
+        return "product_inquiry"
+    elif any(word in user_input_lower for word in ["support", "help", "problem", "issue", "trouble", "error"]):
+        return "support"
+    elif any(word in user_input_lower for word in ["price", "cost", "pricing", "quote", "budget"]):
+        return "pricing"
+    elif any(word in user_input_lower for word in ["demo", "demonstration", "show me", "trial"]):
+        return "demo"
+    elif any(word in user_input_lower for word in ["enterprise", "large scale", "corporation", "business"]):
+        return "enterprise"
+    elif any(word in user_input_lower for word in ["integration", "integrate", "api", "connect"]):
+        return "integration"
+    elif any(phrase in user_input_lower for phrase in ["about your company", "company info", "info about", "tell me about", "what is techcorp", "who are you", "about techcorp"]):
+        return "company_info"
+    elif any(word in user_input_lower for word in ["about", "company", "who", "what", "information", "info"]):
+        return "about"
+    else:
+        return "default"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MockOpenAI intent classification")
+    parser.add_argument("--iterations", "-n", type=int, default=20000, help="Messages classified per run")
+    args = parser.parse_args()
+
+    classifier = MockOpenAI()
+    for message in MESSAGES:
+        assert classifier.classify(message) == legacy_classify(message), message
+
+    rounds = max(1, args.iterations // len(MESSAGES))
+    legacy = min(timeit.repeat(lambda: [legacy_classify(m) for m in MESSAGES], number=rounds, repeat=5))
+    compiled = min(timeit.repeat(lambda: [classifier.classify(m) for m in MESSAGES], number=rounds, repeat=5))
+
+    per_message = rounds * len(MESSAGES)
+    print(f"Messages per run: {per_message}")
+    print(f"Legacy re.search chain:    {legacy / per_message * 1e6:8.2f} us/message")
+    print(f"Precompiled keyword table: {compiled / per_message * 1e6:8.2f} us/message")
+    print(f"Speedup: {legacy / compiled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark for rule-driven lead scoring.
+
+Scores the same synthetic leads one at a time with ``calculate_score`` and in
+one call with the pandas-vectorized ``score_batch``, and checks both agree.
+
+Usage: python benchmarks/bench_lead_scoring.py [--leads N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'integrations'))
+
+from mock_services import LeadScorer
+
+FIELDS = {
+    "company": ["Enterprise Corp", "Acme Inc", "Bob's Garage", "Widgets Ltd"],
+    "inquiry_type": ["enterprise", "pricing", "demo", "general"],
+    "email": ["ceo@acme.com", "bob@gmail.com", "ops@widgets.io"],
+    "budget": ["$50,000+", "$30k", 7500, "Under $5,000", 120000],
+    "timeline": ["Immediate (< 1 month)", "1-3 months", "3-6 months", "12+ months"],
+    "role": ["CEO", "VP", "Manager", "Individual Contributor", "intern"],
+    "company_size": [2000, 600, 150, 60, 20, 5],
+    "use_case": ["Complete CRM overhaul", "Marketing automation setup", "General inquiry"],
+    "engagement": [["Requested demo"], ["Asked about pricing", "Shared detailed requirements"], []],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lead scoring")
+    parser.add_argument("--leads", "-n", type=int, default=100000, help="Synthetic leads to score")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    leads = [{field: rng.choice(values) for field, values in FIELDS.items()} for _ in range(args.leads)]
+    scorer = LeadScorer(check_interval=60)
+
+    start = time.perf_counter()
+    single = [scorer.calculate_score(lead) for lead in leads]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = scorer.score_batch(leads)
+    batch_time = time.perf_counter() - start
+
+    assert single == batch
+    print(f"Leads: {args.leads}")
+    print(f"calculate_score per lead: {args.leads / single_time:12,.0f} leads/s")
+    print(f"score_batch (pandas):     {args.leads / batch_time:12,.0f} leads/s")
+    print(f"Speedup: {single_time / batch_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
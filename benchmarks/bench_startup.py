@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the web interface.
+
+Measures, in fresh interpreters, how long ``import web_interface`` takes and
+which imported modules cost the most (from ``python -X importtime``), then how
+long each lazily loaded service takes to build on first use.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--top N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import web_interface
+print(time.perf_counter() - start)
+"""
+
+SERVICES_SNIPPET = """
+import json, time
+import web_interface
+from service_registry import services
+start = time.perf_counter()
+services.warm_up(background=False)
+total = time.perf_counter() - start
+print(json.dumps({"total": total, "services": services.timings}))
+"""
+
+
+def run(snippet: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *flags, "-c", snippet], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+
+
+def import_costs(stderr: str):
+    """(module, self_us, cumulative_us) rows from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark web interface startup")
+    parser.add_argument("--runs", "-n", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=10, help="Most expensive imports to list")
+    args = parser.parse_args()
+
+    import_times = [float(run(IMPORT_SNIPPET).stdout.strip().splitlines()[-1]) for _ in range(args.runs)]
+    print(f"import web_interface: {statistics.median(import_times) * 1000:8.1f} ms (median of {args.runs})")
+
+    costs = import_costs(run(IMPORT_SNIPPET, "-X", "importtime").stderr)
+    print(f"\nTop {args.top} imports by self time:")
+    for module, self_us, cumulative_us in sorted(costs, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"  {module:40s} self {self_us / 1000:7.1f} ms   cumulative {cumulative_us / 1000:7.1f} ms")
+
+    builds = [json.loads(run(SERVICES_SNIPPET).stdout.strip().splitlines()[-1]) for _ in range(args.runs)]
+    print(f"\nWarm-up of all services: {statistics.median(b['total'] for b in builds) * 1000:8.1f} ms")
+    for name in builds[0]["services"]:
+        print(f"  {name:24s} {statistics.median(b['services'][name] for b in builds) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,19 +3,35 @@
 Conversation History Manager for learning and storing responses
 """
 
-import json
+import bisect
+import heapq
 import logging
 import os
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
-from collections import defaultdict
+from collections import defaultdict, deque
+from itertools import islice
+
+from conversation_storage import create_storage
+from pattern_store import PatternStore, extract_keywords
+from service_registry import services
 
 logger = logging.getLogger(__name__)
 
+def _insert_by_timestamp(conversations, conv: Dict):
+    """Insert into a list or deque kept in ascending timestamp order, searching from the newest end"""
+    position = len(conversations)
+    while position and conversations[position - 1]["timestamp"] > conv["timestamp"]:
+        position -= 1
+    conversations.insert(position, conv)
+
+
 class ConversationHistoryManager:
     """Manages conversation history, learning, and response optimization"""
     
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", storage=None, recent_capacity: int = 500,
+                 max_keywords: int = None):
         self.data_dir = data_dir
         self.history_file = os.path.join(data_dir, "conversation_history.json")
         self.feedback_file = os.path.join(data_dir, "response_feedback.json")
@@ -24,29 +40,58 @@ class ConversationHistoryManager:
         # Ensure data directory exists
         os.makedirs(data_dir, exist_ok=True)
         
+        # Persistence backend ("json" rewrites full files, "log" appends to segments,
+        # "sqlite" writes to an embedded database and answers queries with SQL)
+        self.storage = storage or create_storage(
+            os.getenv("CONVERSATION_STORAGE", "json"), data_dir
+        )
+        
+        # Keywords kept in the learning patterns before the least frequent are evicted
+        self.max_keywords = max_keywords or int(os.getenv("LEARNING_PATTERNS_MAX_KEYWORDS", 5000))
+        
         self.conversation_history = []
         self.feedback_data = []
-        self.learning_patterns = {}
+        self.learning_patterns = PatternStore(self.max_keywords)
+        
+        # Guards the records, indexes, running statistics and storage writes, which
+        # are shared by every request thread (see ASGI_EXECUTOR_WORKERS)
+        self._lock = threading.RLock()
+        
+        # Lookup indexes over conversation_history, rebuilt on load
+        self.recent_capacity = recent_capacity
+        self._by_id: Dict[str, Dict] = {}
+        self._by_session: Dict[str, List[Dict]] = defaultdict(list)
+        self._recent = deque(maxlen=recent_capacity)
+        
+        # Running statistics, see get_conversation_stats
+        self._quality_sum = 0
+        self._quality_count = 0
+        self._minute_buckets: Dict[datetime, List[datetime]] = {}
+        self._bucket_minutes: List[datetime] = []
+        self._window_total = 0
         
         self.load_data()
     
+    def _state(self) -> Dict[str, Any]:
+        """Current in-memory state as handed to the storage backend"""
+        return {
+            "conversation_history": self.conversation_history,
+            "feedback_data": self.feedback_data,
+            "learning_patterns": self.learning_patterns.to_dict()
+        }
+    
     def load_data(self):
         """Load existing conversation history and learning data"""
+        with self._lock:
+            self._load_data()
+    
+    def _load_data(self):
         try:
-            # Load conversation history
-            if os.path.exists(self.history_file):
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    self.conversation_history = json.load(f)
-            
-            # Load feedback data
-            if os.path.exists(self.feedback_file):
-                with open(self.feedback_file, 'r', encoding='utf-8') as f:
-                    self.feedback_data = json.load(f)
-            
-            # Load learning patterns
-            if os.path.exists(self.learning_patterns_file):
-                with open(self.learning_patterns_file, 'r', encoding='utf-8') as f:
-                    self.learning_patterns = json.load(f)
+            state = self.storage.load()
+            self.conversation_history = state["conversation_history"]
+            self.feedback_data = state["feedback_data"]
+            self.learning_patterns = PatternStore.from_dict(state["learning_patterns"])
+            self.learning_patterns.max_keywords = self.max_keywords
             
             logger.info(f"Loaded {len(self.conversation_history)} conversation records")
             
@@ -54,50 +99,132 @@ class ConversationHistoryManager:
             logger.error(f"Error loading conversation data: {e}")
             self.conversation_history = []
             self.feedback_data = []
-            self.learning_patterns = {}
+            self.learning_patterns = PatternStore(self.max_keywords)
+        
+        self._rebuild_indexes()
+    
+    def _rebuild_indexes(self):
+        """Index conversations by id, by session and by recency"""
+        self._by_id = {}
+        self._by_session = defaultdict(list)
+        
+        for conv in self.conversation_history:
+            self._by_id.setdefault(conv["conversation_id"], conv)
+        
+        ordered = sorted(self.conversation_history, key=lambda c: c["timestamp"])
+        for conv in ordered:
+            self._by_session[conv["session_id"]].append(conv)
+        self._recent = deque(ordered[-self.recent_capacity:], maxlen=self.recent_capacity)
+        
+        self._quality_sum = 0
+        self._quality_count = 0
+        self._minute_buckets = {}
+        self._bucket_minutes = []
+        self._window_total = 0
+        cutoff = datetime.now() - timedelta(days=1)
+        for conv in ordered:
+            self._track_quality(None, conv.get("response_quality"))
+            self._track_timestamp(conv["timestamp"], cutoff)
+    
+    def _index_conversation(self, conv: Dict):
+        self._by_id.setdefault(conv["conversation_id"], conv)
+        
+        # Entries arrive in timestamp order, so inserting is almost always an append
+        _insert_by_timestamp(self._by_session[conv["session_id"]], conv)
+        
+        if len(self._recent) < self.recent_capacity:
+            _insert_by_timestamp(self._recent, conv)
+        elif self._recent and self._recent[0]["timestamp"] < conv["timestamp"]:
+            # Full: the oldest entry makes room, older arrivals are not among the newest
+            self._recent.popleft()
+            _insert_by_timestamp(self._recent, conv)
+        
+        self._track_quality(None, conv.get("response_quality"))
+        self._track_timestamp(conv["timestamp"], datetime.now() - timedelta(days=1))
+    
+    def _track_quality(self, old_rating, new_rating):
+        """Move a conversation's rating in the running quality sums (unrated ratings are falsy)"""
+        if old_rating:
+            self._quality_sum -= old_rating
+            self._quality_count -= 1
+        if new_rating:
+            self._quality_sum += new_rating
+            self._quality_count += 1
+    
+    def _track_timestamp(self, timestamp: str, cutoff: datetime):
+        """Count a conversation in its per-minute bucket unless it is already outside the window"""
+        try:
+            moment = datetime.fromisoformat(timestamp)
+        except (TypeError, ValueError):
+            logger.warning(f"Skipping unparseable conversation timestamp: {timestamp}")
+            return
+        if moment <= cutoff:
+            return
+        
+        minute = moment.replace(second=0, microsecond=0)
+        bucket = self._minute_buckets.get(minute)
+        if bucket is None:
+            bucket = self._minute_buckets[minute] = []
+            bisect.insort(self._bucket_minutes, minute)
+        bisect.insort(bucket, moment)
+        self._window_total += 1
+    
+    def _count_since(self, cutoff: datetime) -> int:
+        """Conversations strictly after cutoff, dropping buckets that have left the window"""
+        boundary = cutoff.replace(second=0, microsecond=0)
+        expired = bisect.bisect_left(self._bucket_minutes, boundary)
+        for minute in self._bucket_minutes[:expired]:
+            self._window_total -= len(self._minute_buckets.pop(minute))
+        del self._bucket_minutes[:expired]
+        
+        # Only the bucket holding the cutoff needs comparing record by record
+        edge = self._minute_buckets.get(boundary)
+        if edge is None:
+            return self._window_total
+        return self._window_total - bisect.bisect_right(edge, cutoff)
     
     def save_data(self):
         """Save conversation history and learning data"""
-        try:
-            # Save conversation history
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(self.conversation_history, f, indent=2, ensure_ascii=False)
-            
-            # Save feedback data
-            with open(self.feedback_file, 'w', encoding='utf-8') as f:
-                json.dump(self.feedback_data, f, indent=2, ensure_ascii=False)
-            
-            # Save learning patterns
-            with open(self.learning_patterns_file, 'w', encoding='utf-8') as f:
-                json.dump(self.learning_patterns, f, indent=2, ensure_ascii=False)
-                
-        except Exception as e:
-            logger.error(f"Error saving conversation data: {e}")
+        with self._lock:
+            self.storage.save(self._state())
+    
+    def close(self):
+        """Release the storage backend"""
+        with self._lock:
+            self.storage.close()
     
     def add_conversation(self, user_input: str, bot_response: str, 
                         session_id: str = "default", user_data: Dict = None,
                         lead_score: int = 0, response_time: float = 0.0) -> str:
         """Add a new conversation to history"""
-        conversation_id = f"{session_id}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
-        
-        conversation_entry = {
-            "conversation_id": conversation_id,
-            "session_id": session_id,
-            "timestamp": datetime.now().isoformat(),
-            "user_input": user_input,
-            "bot_response": bot_response,
-            "user_data": user_data or {},
-            "lead_score": lead_score,
-            "response_time": response_time,
-            "feedback": None,
-            "response_quality": None
-        }
-        
-        self.conversation_history.append(conversation_entry)
-        self.save_data()
-        
-        # Update learning patterns
-        self._update_learning_patterns(user_input, bot_response)
+        with self._lock:
+            # Stamped under the lock so entries are appended in timestamp order
+            now = datetime.now()
+            conversation_id = f"{session_id}_{now.strftime('%Y%m%d_%H%M%S_%f')}"
+            
+            conversation_entry = {
+                "conversation_id": conversation_id,
+                "session_id": session_id,
+                "timestamp": now.isoformat(),
+                "user_input": user_input,
+                "bot_response": bot_response,
+                "user_data": user_data or {},
+                "lead_score": lead_score,
+                "response_time": response_time,
+                "feedback": None,
+                "response_quality": None
+            }
+            
+            self.conversation_history.append(conversation_entry)
+            self._index_conversation(conversation_entry)
+            
+            # Update learning patterns
+            pattern_delta = self._update_learning_patterns(user_input, bot_response)
+            
+            self.storage.append(
+                [("conversation", conversation_entry), ("pattern_delta", pattern_delta)],
+                self._state()
+            )
         
         logger.info(f"Added conversation {conversation_id}")
         return conversation_id
@@ -113,110 +240,103 @@ class ConversationHistoryManager:
             "suggested_response": suggested_response
         }
         
-        self.feedback_data.append(feedback_entry)
-        
-        # Update the conversation record
-        for conv in self.conversation_history:
-            if conv["conversation_id"] == conversation_id:
+        with self._lock:
+            self.feedback_data.append(feedback_entry)
+            
+            # Update the conversation record
+            conv = self._by_id.get(conversation_id)
+            if conv is not None:
+                self._track_quality(conv.get("response_quality"), quality_rating)
                 conv["feedback"] = feedback
                 conv["response_quality"] = quality_rating
-                break
-        
-        self.save_data()
-        self._learn_from_feedback(conversation_id, feedback_entry)
+            
+            pattern_delta = self._learn_from_feedback(conversation_id, feedback_entry)
+            self.storage.append(
+                [("feedback", feedback_entry), ("pattern_delta", pattern_delta)],
+                self._state()
+            )
         logger.info(f"Added feedback for conversation {conversation_id}")
     
     def get_recent_conversations(self, limit: int = 20, session_id: str = None) -> List[Dict]:
         """Get the most recent conversations"""
-        conversations = self.conversation_history
-        
-        if session_id:
-            conversations = [c for c in conversations if c["session_id"] == session_id]
+        if limit <= 0:
+            return []
         
-        # Sort by timestamp descending and limit
-        conversations.sort(key=lambda x: x["timestamp"], reverse=True)
-        return conversations[:limit]
+        with self._lock:
+            if hasattr(self.storage, "recent_conversations"):
+                return self.storage.recent_conversations(limit, session_id)
+            
+            # Indexes are kept in ascending timestamp order, newest last
+            if session_id:
+                conversations = reversed(self._by_session.get(session_id, []))
+            elif limit <= len(self._recent) or len(self._recent) == len(self.conversation_history):
+                conversations = reversed(self._recent)
+            else:
+                # Past the recent window, merge the per-session lists from their newest end
+                conversations = heapq.merge(*(reversed(session) for session in self._by_session.values()),
+                                            key=lambda c: c["timestamp"], reverse=True)
+            
+            return list(islice(conversations, limit))
     
     def get_conversation_stats(self) -> Dict[str, Any]:
         """Get statistics about conversations"""
+        with self._lock:
+            return self._conversation_stats()
+    
+    def _conversation_stats(self) -> Dict[str, Any]:
         total_conversations = len(self.conversation_history)
         
         if total_conversations == 0:
             return {"total_conversations": 0}
         
-        # Calculate average response quality
-        rated_conversations = [c for c in self.conversation_history if c.get("response_quality")]
-        avg_quality = sum(c["response_quality"] for c in rated_conversations) / len(rated_conversations) if rated_conversations else 0
+        if hasattr(self.storage, "conversation_stats"):
+            stats = self.storage.conversation_stats((datetime.now() - timedelta(days=1)).isoformat())
+            stats["average_quality"] = round(stats["average_quality"], 2)
+            return stats
+        
+        # Average response quality over rated conversations, kept as running sums
+        avg_quality = self._quality_sum / self._quality_count if self._quality_count else 0
         
         # Count feedback
         feedback_count = len(self.feedback_data)
         
-        # Recent activity (last 24 hours)
-        from datetime import datetime, timedelta
-        yesterday = datetime.now() - timedelta(days=1)
-        recent_conversations = [
-            c for c in self.conversation_history 
-            if datetime.fromisoformat(c["timestamp"]) > yesterday
-        ]
+        # Recent activity (last 24 hours) from per-minute buckets
+        recent_24h = self._count_since(datetime.now() - timedelta(days=1))
         
         return {
             "total_conversations": total_conversations,
             "feedback_count": feedback_count,
             "average_quality": round(avg_quality, 2),
-            "recent_24h": len(recent_conversations),
+            "recent_24h": recent_24h,
             "learning_patterns_count": len(self.learning_patterns)
         }
     
-    def _update_learning_patterns(self, user_input: str, bot_response: str):
-        """Update learning patterns based on conversations"""
-        user_input_lower = user_input.lower()
-        
-        # Extract keywords from user input
-        import re
-        keywords = re.findall(r'\b\w+\b', user_input_lower)
-        keywords = [k for k in keywords if len(k) > 2]  # Filter short words
+    def _update_learning_patterns(self, user_input: str, bot_response: str) -> Dict[str, Any]:
+        """Update learning patterns based on conversations, returning the applied delta"""
+        # Stop words and words of two characters or fewer are not tracked
+        keywords = extract_keywords(user_input)
         
-        for keyword in keywords:
-            if keyword not in self.learning_patterns:
-                self.learning_patterns[keyword] = {
-                    "count": 0,
-                    "responses": [],
-                    "success_rate": 0.0
-                }
-            
-            self.learning_patterns[keyword]["count"] += 1
-            
-            # Store successful responses (limit to prevent memory issues)
-            if len(self.learning_patterns[keyword]["responses"]) < 10:
-                self.learning_patterns[keyword]["responses"].append({
-                    "response": bot_response,
-                    "timestamp": datetime.now().isoformat()
-                })
+        # Responses are interned, each keyword keeps up to 10 references
+        return self.learning_patterns.observe(keywords, bot_response, datetime.now().isoformat())
     
-    def _learn_from_feedback(self, conversation_id: str, feedback_entry: Dict):
-        """Learn from user feedback to improve responses"""
+    def _learn_from_feedback(self, conversation_id: str, feedback_entry: Dict) -> Dict[str, Any]:
+        """Learn from user feedback to improve responses, returning the applied delta"""
         quality_rating = feedback_entry["quality_rating"]
         
         # Find the original conversation
-        conversation = None
-        for conv in self.conversation_history:
-            if conv["conversation_id"] == conversation_id:
-                conversation = conv
-                break
+        conversation = self._by_id.get(conversation_id)
         
         if not conversation:
-            return
+            return {"patterns": {}}
         
-        user_input = conversation["user_input"].lower()
-        keywords = re.findall(r'\b\w+\b', user_input)
+        keywords = extract_keywords(conversation["user_input"])
         
         # Update success rates for keywords based on feedback
+        rates = {}
         for keyword in keywords:
             if keyword in self.learning_patterns:
-                pattern = self.learning_patterns[keyword]
-                
                 # Simple learning: adjust success rate based on feedback
-                current_rate = pattern.get("success_rate", 0.0)
+                current_rate = rates.get(keyword, self.learning_patterns.success_rate(keyword))
                 feedback_weight = 0.1  # How much new feedback affects the rate
                 
                 if quality_rating >= 4:  # Good feedback
@@ -226,37 +346,38 @@ class ConversationHistoryManager:
                 else:  # Neutral feedback
                     new_rate = current_rate
                 
-                pattern["success_rate"] = max(0.0, min(1.0, new_rate))
+                rates[keyword] = max(0.0, min(1.0, new_rate))
+        
+        return self.learning_patterns.set_success_rates(rates)
     
     def suggest_improved_response(self, user_input: str) -> Optional[str]:
         """Suggest an improved response based on learning patterns"""
-        user_input_lower = user_input.lower()
-        keywords = re.findall(r'\b\w+\b', user_input_lower)
-        
-        best_responses = []
-        
-        for keyword in keywords:
-            if keyword in self.learning_patterns:
-                pattern = self.learning_patterns[keyword]
-                if pattern["success_rate"] > 0.7 and pattern["responses"]:
-                    # Get the most recent successful response
-                    best_responses.extend(pattern["responses"])
-        
-        if best_responses:
-            # Return the most recent high-quality response
-            best_responses.sort(key=lambda x: x["timestamp"], reverse=True)
-            return best_responses[0]["response"]
-        
-        return None
+        with self._lock:
+            patterns = self.learning_patterns
+            best = None
+            
+            # Most recent response among keywords with a high success rate
+            for keyword in extract_keywords(user_input):
+                if patterns.success_rate(keyword) > 0.7:
+                    latest = patterns.latest_response(keyword)
+                    if latest and (best is None or latest[1] > best[1]):
+                        best = latest
+            
+            if best:
+                return patterns.responses[best[0]]
+            
+            return None
     
     def export_learning_data(self) -> Dict[str, Any]:
         """Export learning data for analysis"""
-        return {
-            "conversation_history": self.conversation_history,
-            "feedback_data": self.feedback_data,
-            "learning_patterns": self.learning_patterns,
-            "stats": self.get_conversation_stats()
-        }
+        # Copies, so callers can serialize them while other threads keep adding
+        with self._lock:
+            return {
+                "conversation_history": list(self.conversation_history),
+                "feedback_data": list(self.feedback_data),
+                "learning_patterns": self.learning_patterns.export(),
+                "stats": self._conversation_stats()
+            }
 
-# Global instance
-conversation_manager = ConversationHistoryManager()
+# Global instance, loaded on first use
+conversation_manager = services.lazy("conversation_manager", ConversationHistoryManager)
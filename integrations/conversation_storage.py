@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Storage backends for the conversation history manager
+"""
+
+import glob
+import json
+import logging
+import os
+from typing import Dict, List, Any, Tuple
+
+from pattern_store import PatternStore
+
+logger = logging.getLogger(__name__)
+
+# A record is an (operation, payload) pair, e.g. ("conversation", {...})
+Record = Tuple[str, Any]
+
+
+def empty_state() -> Dict[str, Any]:
+    """Return an empty conversation state"""
+    return {
+        "conversation_history": [],
+        "feedback_data": [],
+        "learning_patterns": {}
+    }
+
+
+def apply_record(state: Dict[str, Any], op: str, data: Any, conversations: Dict[str, Dict] = None):
+    """Apply a single logged operation to an in-memory state"""
+    if op == "conversation":
+        state["conversation_history"].append(data)
+        if conversations is not None:
+            conversations[data["conversation_id"]] = data
+
+    elif op == "feedback":
+        state["feedback_data"].append(data)
+        if conversations is not None:
+            conv = conversations.get(data["conversation_id"])
+        else:
+            conv = next((c for c in state["conversation_history"]
+                         if c["conversation_id"] == data["conversation_id"]), None)
+        if conv is not None:
+            conv["feedback"] = data["feedback"]
+            conv["response_quality"] = data["quality_rating"]
+
+    elif op in ("pattern_delta", "patterns"):
+        patterns = state["learning_patterns"] = PatternStore.from_dict(state["learning_patterns"])
+        if op == "pattern_delta":
+            patterns.apply(data)
+        else:
+            # Written before responses were interned
+            patterns.apply_legacy(data)
+
+    else:
+        logger.warning(f"Skipping unknown log operation: {op}")
+
+
+class JSONFileStorage:
+    """Legacy storage that rewrites the full JSON files on every change"""
+
+    def __init__(self, data_dir: str = "data"):
+        self.data_dir = data_dir
+        self.history_file = os.path.join(data_dir, "conversation_history.json")
+        self.feedback_file = os.path.join(data_dir, "response_feedback.json")
+        self.learning_patterns_file = os.path.join(data_dir, "learning_patterns.json")
+        os.makedirs(data_dir, exist_ok=True)
+
+    def load(self) -> Dict[str, Any]:
+        """Load conversation history, feedback and learning patterns"""
+        state = empty_state()
+        try:
+            if os.path.exists(self.history_file):
+                with open(self.history_file, 'r', encoding='utf-8') as f:
+                    state["conversation_history"] = json.load(f)
+
+            if os.path.exists(self.feedback_file):
+                with open(self.feedback_file, 'r', encoding='utf-8') as f:
+                    state["feedback_data"] = json.load(f)
+
+            if os.path.exists(self.learning_patterns_file):
+                with open(self.learning_patterns_file, 'r', encoding='utf-8') as f:
+                    state["learning_patterns"] = json.load(f)
+
+        except Exception as e:
+            logger.error(f"Error loading conversation data: {e}")
+            state = empty_state()
+
+        return state
+
+    def append(self, records: List[Record], state: Dict[str, Any]):
+        """Persist new records by rewriting the whole state"""
+        self.save(state)
+
+    def save(self, state: Dict[str, Any]):
+        """Save the whole state to the JSON files"""
+        try:
+            with open(self.history_file, 'w', encoding='utf-8') as f:
+                json.dump(state["conversation_history"], f, indent=2, ensure_ascii=False)
+
+            with open(self.feedback_file, 'w', encoding='utf-8') as f:
+                json.dump(state["feedback_data"], f, indent=2, ensure_ascii=False)
+
+            with open(self.learning_patterns_file, 'w', encoding='utf-8') as f:
+                json.dump(state["learning_patterns"], f, indent=2, ensure_ascii=False)
+
+        except Exception as e:
+            logger.error(f"Error saving conversation data: {e}")
+
+    def close(self):
+        """Nothing to release for the JSON backend"""
+        pass
+
+
+class SegmentedLogStorage:
+    """
+    Append-only storage backed by rotating JSON-Lines segments.
+
+    Every change is appended as one line to the active segment, so the cost
+    of a write does not depend on the size of the history. Segments rotate
+    once they reach ``max_segment_bytes``; after ``compact_segments`` closed
+    segments the full state is written to ``snapshot.json`` and the covered
+    segments are removed. On startup the snapshot is loaded and the remaining
+    segments are replayed in order; a torn final line left by a crash is
+    truncated away.
+    """
+
+    SEGMENT_PATTERN = "segment-{:06d}.jsonl"
+
+    def __init__(self, data_dir: str = "data", max_segment_bytes: int = 4 * 1024 * 1024,
+                 compact_segments: int = 8, fsync: bool = False):
+        self.data_dir = data_dir
+        self.log_dir = os.path.join(data_dir, "conversation_log")
+        self.snapshot_file = os.path.join(self.log_dir, "snapshot.json")
+        self.max_segment_bytes = max_segment_bytes
+        self.compact_segments = compact_segments
+        self.fsync = fsync
+
+        os.makedirs(self.log_dir, exist_ok=True)
+
+        self.snapshot_segment = 0
+        self.active_segment = 0
+        self.closed_segments = 0
+        self._handle = None
+
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.log_dir, self.SEGMENT_PATTERN.format(seq))
+
+    def _list_segments(self) -> List[int]:
+        segments = []
+        for path in glob.glob(os.path.join(self.log_dir, "segment-*.jsonl")):
+            name = os.path.basename(path)
+            try:
+                segments.append(int(name[len("segment-"):-len(".jsonl")]))
+            except ValueError:
+                logger.warning(f"Ignoring unexpected file in conversation log: {name}")
+        return sorted(segments)
+
+    def load(self) -> Dict[str, Any]:
+        """Load the latest snapshot and replay newer segments on top of it"""
+        if os.path.exists(self.snapshot_file):
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            self.snapshot_segment = snapshot.pop("segment", 0)
+            state = empty_state()
+            state.update(snapshot)
+        else:
+            # First start on the log backend: seed from the legacy JSON files
+            state = JSONFileStorage(self.data_dir).load()
+            self.snapshot_segment = 0
+
+        conversations = {c["conversation_id"]: c for c in state["conversation_history"]}
+        segments = [seq for seq in self._list_segments() if seq > self.snapshot_segment]
+
+        for i, seq in enumerate(segments):
+            self._replay_segment(seq, state, conversations, is_last=(i == len(segments) - 1))
+
+        if segments:
+            self.active_segment = segments[-1]
+            self.closed_segments = len(segments) - 1
+        else:
+            self.active_segment = self.snapshot_segment + 1
+            self.closed_segments = 0
+
+        self._open_active()
+        if os.path.getsize(self._segment_path(self.active_segment)) >= self.max_segment_bytes:
+            self._rotate()
+
+        logger.info(f"Replayed {len(segments)} conversation log segment(s)")
+        return state
+
+    def _replay_segment(self, seq: int, state: Dict[str, Any], conversations: Dict[str, Dict], is_last: bool):
+        path = self._segment_path(seq)
+        good_offset = 0
+
+        with open(path, 'rb') as f:
+            for raw_line in f:
+                if not raw_line.endswith(b"\n"):
+                    # Partially written record at the tail of the log
+                    break
+                try:
+                    record = json.loads(raw_line.decode('utf-8'))
+                    apply_record(state, record["op"], record["data"], conversations)
+                except (ValueError, KeyError) as e:
+                    if is_last:
+                        break
+                    logger.error(f"Skipping corrupt record in {path}: {e}")
+                good_offset += len(raw_line)
+
+        if is_last and good_offset < os.path.getsize(path):
+            logger.warning(f"Truncating torn write at offset {good_offset} in {path}")
+            with open(path, 'r+b') as f:
+                f.truncate(good_offset)
+
+    def _open_active(self):
+        self._handle = open(self._segment_path(self.active_segment), 'a', encoding='utf-8')
+
+    def _rotate(self):
+        self._handle.close()
+        self.active_segment += 1
+        self.closed_segments += 1
+        self._open_active()
+
+    def append(self, records: List[Record], state: Dict[str, Any]):
+        """Append records to the active segment"""
+        if self._handle is None:
+            raise RuntimeError("SegmentedLogStorage.load() must be called before append()")
+
+        try:
+            lines = "".join(
+                json.dumps({"op": op, "data": data}, ensure_ascii=False) + "\n"
+                for op, data in records
+            )
+            self._handle.write(lines)
+            self._handle.flush()
+            if self.fsync:
+                os.fsync(self._handle.fileno())
+
+            if self._handle.tell() >= self.max_segment_bytes:
+                self._rotate()
+                if self.closed_segments >= self.compact_segments:
+                    self.save(state)
+
+        except Exception as e:
+            logger.error(f"Error appending to conversation log: {e}")
+
+    def save(self, state: Dict[str, Any]):
+        """Compact the log into a snapshot of the given state"""
+        try:
+            # Everything up to the current segment is covered by the snapshot
+            covered = self.active_segment
+            self._rotate()
+
+            snapshot = {"segment": covered}
+            snapshot.update(state)
+
+            tmp_file = self.snapshot_file + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.snapshot_file)
+
+            for seq in self._list_segments():
+                if seq <= covered:
+                    os.remove(self._segment_path(seq))
+
+            self.snapshot_segment = covered
+            self.closed_segments = 0
+            logger.info(f"Compacted conversation log up to segment {covered}")
+
+        except Exception as e:
+            logger.error(f"Error compacting conversation log: {e}")
+
+    def close(self):
+        """Close the active segment"""
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+def create_storage(backend: str = "json", data_dir: str = "data"):
+    """Create a conversation storage backend by name"""
+    if backend == "json":
+        return JSONFileStorage(data_dir)
+    if backend == "log":
+        return SegmentedLogStorage(data_dir)
+    if backend == "sqlite":
+        # Imported here, sqlite_storage builds on this module
+        from sqlite_storage import SQLiteStorage
+        return SQLiteStorage(data_dir)
+    raise ValueError(f"Unknown conversation storage backend: {backend}")
@@ -5,35 +5,296 @@ Handles CRM data logging, lead tracking, and analytics data collection.
 
 import os
 import json
+import atexit
+import random
+import threading
+import time
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
+import httplib2
 import pandas as pd
+from google.auth.exceptions import TransportError
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import logging
 
+try:
+    import yaml
+except ImportError:  # The deployment config is optional; env vars and defaults still apply
+    yaml = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEPLOYMENT_CONFIG_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'deployment', 'production-config.yaml'
+)
+
+
+def configured_batch_size(config_file: str = DEPLOYMENT_CONFIG_FILE, default: int = 100) -> int:
+    """GOOGLE_SHEETS_BATCH_SIZE if set, else ``google_sheets.batch_size`` from the deployment config"""
+    if os.getenv('GOOGLE_SHEETS_BATCH_SIZE'):
+        return int(os.getenv('GOOGLE_SHEETS_BATCH_SIZE'))
+    if yaml is not None and os.path.exists(config_file):
+        try:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f) or {}
+            return int((config.get('google_sheets') or {}).get('batch_size', default))
+        except Exception as e:
+            logger.error(f"Error reading Sheets batch size from {config_file}: {e}")
+    return default
+
+class SheetsBatchWriter:
+    """
+    Buffered, rate-limit-aware row writer for the Sheets ``values().append`` API.
+    
+    Rows are queued per sheet range and sent as one append request per flush,
+    preserving the order in which they were queued. Flushes happen from a
+    background thread when a queue reaches ``batch_size`` rows or after
+    ``flush_interval`` seconds. Quota (429 / rateLimitExceeded) and transient
+    5xx errors, as well as connection and transport failures, are retried with
+    exponential backoff, honouring Retry-After; rows that still fail go back to
+    the front of their queue, as do rows of a send that failed unexpectedly.
+    A batch the API
+    rejects outright (invalid range or data) would fail the same way on every
+    flush, so it is logged and moved to ``dead_letters`` instead.
+    """
+    
+    RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+    # Failures before a response arrived (reset connections, timeouts, DNS, auth transport)
+    TRANSIENT_ERRORS = (ConnectionError, TimeoutError, TransportError, httplib2.HttpLib2Error)
+    QUOTA_REASONS = (b"rateLimitExceeded", b"userRateLimitExceeded", b"quotaExceeded", b"RESOURCE_EXHAUSTED")
+    
+    def __init__(self, service, spreadsheet_id: str, batch_size: int = 100,
+                 flush_interval: float = 5.0, max_queue_size: int = 10000,
+                 max_retries: int = 5, backoff_base: float = 1.0, backoff_max: float = 60.0,
+                 value_input_option: str = 'USER_ENTERED', background: bool = True,
+                 sleep: Callable[[float], None] = time.sleep, max_dead_letters: int = 100):
+        """
+        Initialize the batch writer.
+        
+        Args:
+            service: Authenticated Sheets API service (or a compatible fake)
+            spreadsheet_id: Google Sheets spreadsheet ID
+            batch_size: Rows per append request and size that triggers a flush
+            flush_interval: Seconds before a partial batch is flushed
+            max_queue_size: Rows buffered per sheet before enqueue is refused
+            max_retries: Attempts per batch on quota or transient errors
+            backoff_base: First backoff delay in seconds
+            backoff_max: Upper bound for a single backoff delay
+            value_input_option: Sheets valueInputOption for appended rows
+            background: Start the flusher thread
+            sleep: Sleep function, replaceable in tests
+            max_dead_letters: Rejected batches kept for inspection
+        """
+        self.service = service
+        self.spreadsheet_id = spreadsheet_id
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.value_input_option = value_input_option
+        self.sleep = sleep
+        
+        self.queues: Dict[str, deque] = {}
+        # (range, rows, error) of batches the API refused, newest last
+        self.dead_letters: deque = deque(maxlen=max_dead_letters)
+        self.stats = {"rows_written": 0, "requests": 0, "retries": 0, "rejected": 0, "dropped": 0}
+        
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = None
+        
+        if background:
+            self._thread = threading.Thread(target=self._run, name="sheets-batch-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+    
+    def enqueue(self, range_name: str, row: List) -> bool:
+        """
+        Queue a row for the given sheet range.
+        
+        Returns:
+            bool: False if the sheet's queue is full
+        """
+        with self._lock:
+            queue = self.queues.setdefault(range_name, deque())
+            if len(queue) >= self.max_queue_size:
+                self.stats["rejected"] += 1
+                logger.error(f"Sheets queue for {range_name} is full, dropping row")
+                return False
+            queue.append(row)
+            ready = len(queue) >= self.batch_size
+        
+        if ready:
+            self._wakeup.set()
+        return True
+    
+    def pending(self) -> int:
+        """Number of rows waiting to be written"""
+        with self._lock:
+            return sum(len(queue) for queue in self.queues.values())
+    
+    def flush(self) -> int:
+        """
+        Send every queued row, one append request per batch.
+        
+        Returns:
+            int: Number of rows written
+        """
+        written = 0
+        with self._flush_lock:
+            for range_name in list(self.queues):
+                while True:
+                    with self._lock:
+                        queue = self.queues[range_name]
+                        batch = [queue.popleft() for _ in range(min(self.batch_size, len(queue)))]
+                    if not batch:
+                        break
+                    
+                    try:
+                        sent = self._append_with_backoff(range_name, batch)
+                    except HttpError as e:
+                        self._dead_letter(range_name, batch, e)
+                        continue
+                    except Exception:
+                        # Never lose popped rows; they are retried on the next flush
+                        with self._lock:
+                            self.queues[range_name].extendleft(reversed(batch))
+                        raise
+                    if not sent:
+                        with self._lock:
+                            self.queues[range_name].extendleft(reversed(batch))
+                        break
+                    written += len(batch)
+        return written
+    
+    def _dead_letter(self, range_name: str, rows: List[List], error: HttpError):
+        with self._lock:
+            self.dead_letters.append((range_name, rows, str(error)))
+            self.stats["dropped"] += len(rows)
+        logger.error(f"Dropping {len(rows)} rows for {range_name} rejected by the Sheets API: {error}")
+    
+    def _append_with_backoff(self, range_name: str, rows: List[List]) -> bool:
+        """
+        Append rows in one request, retrying quota and transient errors.
+        
+        Returns:
+            bool: False if retryable errors persisted past ``max_retries``
+        
+        Raises:
+            HttpError: For API errors that retrying cannot fix
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.stats["requests"] += 1
+                result = self.service.spreadsheets().values().append(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=range_name,
+                    valueInputOption=self.value_input_option,
+                    body={'values': rows}
+                ).execute()
+                self.stats["rows_written"] += len(rows)
+                logger.info(f"Appended {len(rows)} rows to {range_name}: {result.get('updates', {}).get('updatedCells', 0)} cells updated")
+                return True
+            
+            except (HttpError, *self.TRANSIENT_ERRORS) as e:
+                if isinstance(e, HttpError) and not self._is_retryable(e):
+                    raise
+                if attempt == self.max_retries:
+                    logger.error(f"Failed to append {len(rows)} rows to {range_name}: {e}")
+                    return False
+                
+                self.stats["retries"] += 1
+                delay = self._backoff_delay(e, attempt)
+                logger.warning(f"Sheets quota/transient error on {range_name}, retrying in {delay:.1f}s")
+                self.sleep(delay)
+        return False
+    
+    def _is_retryable(self, error: HttpError) -> bool:
+        status = error.resp.status
+        if status in self.RETRYABLE_STATUSES:
+            return True
+        content = error.content or b""
+        return status == 403 and any(reason in content for reason in self.QUOTA_REASONS)
+    
+    def _backoff_delay(self, error: Exception, attempt: int) -> float:
+        retry_after = error.resp.get('retry-after') if isinstance(error, HttpError) else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        delay = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+        return delay * (0.5 + random.random() / 2)
+    
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Sheets batch flush failed: {e}")
+    
+    def close(self):
+        """Stop the flusher thread and send remaining rows"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Sheets batch flush failed on shutdown: {e}")
+        atexit.unregister(self.close)
+
+
 class GoogleSheetsIntegration:
     """
     Google Sheets integration for CRM and analytics functionality.
     """
     
-    def __init__(self, credentials_file: str, spreadsheet_id: str):
+    LEAD_HEADERS = [
+        'Timestamp', 'Customer Name', 'Email', 'Company', 
+        'Company Size', 'Budget Range', 'Timeline', 'Specific Needs',
+        'Lead Score', 'Priority', 'Source', 'Status', 'Assigned To'
+    ]
+    
+    def __init__(self, credentials_file: str, spreadsheet_id: str,
+                 batch_size: Optional[int] = None, flush_interval: float = 5.0):
         """
         Initialize Google Sheets integration.
         
         Args:
             credentials_file: Path to service account credentials JSON
             spreadsheet_id: Google Sheets spreadsheet ID
+            batch_size: Rows per append request, by default GOOGLE_SHEETS_BATCH_SIZE or
+                google_sheets.batch_size in the deployment config; 1 writes every row immediately
+            flush_interval: Seconds before a partial batch is flushed
         """
         self.credentials_file = credentials_file
         self.spreadsheet_id = spreadsheet_id
         self.service = None
+        self.writer = None
         self._authenticate()
+        
+        if batch_size is None:
+            batch_size = configured_batch_size()
+        if batch_size > 1:
+            self.writer = SheetsBatchWriter(
+                self.service, spreadsheet_id,
+                batch_size=batch_size, flush_interval=flush_interval
+            )
     
     def _authenticate(self):
         """Authenticate with Google Sheets API."""
@@ -56,7 +317,8 @@ class GoogleSheetsIntegration:
             conversation_data: Dictionary containing conversation details
             
         Returns:
-            bool: Success status
+            bool: Success status; when batching, True only means the row was
+            queued (failed sends show up in ``writer.stats`` and ``writer.dead_letters``)
         """
         try:
             # Prepare data for insertion
@@ -76,6 +338,9 @@ class GoogleSheetsIntegration:
             range_name = 'Conversations!A:H'
             value_input_option = 'USER_ENTERED'
             
+            if self.writer:
+                return self.writer.enqueue(range_name, row_data)
+            
             body = {
                 'values': [row_data]
             }
@@ -102,7 +367,8 @@ class GoogleSheetsIntegration:
             lead_data: Dictionary containing lead information
             
         Returns:
-            bool: Success status
+            bool: Success status; when batching, True only means the row was
+            queued (failed sends show up in ``writer.stats`` and ``writer.dead_letters``)
         """
         try:
             timestamp = datetime.now().isoformat()
@@ -125,6 +391,9 @@ class GoogleSheetsIntegration:
             range_name = 'Leads!A:M'
             value_input_option = 'USER_ENTERED'
             
+            if self.writer:
+                return self.writer.enqueue(range_name, row_data)
+            
             body = {
                 'values': [row_data]
             }
@@ -143,6 +412,20 @@ class GoogleSheetsIntegration:
             logger.error(f"Failed to log lead: {e}")
             return False
     
+    def flush(self) -> int:
+        """
+        Send any buffered rows now.
+        
+        Returns:
+            int: Number of rows written
+        """
+        return self.writer.flush() if self.writer else 0
+    
+    def close(self):
+        """Flush buffered rows and stop the background writer."""
+        if self.writer:
+            self.writer.close()
+    
     def update_analytics(self, metric_data: Dict) -> bool:
         """
         Update analytics data in the 'Analytics' sheet.
@@ -249,6 +532,74 @@ class GoogleSheetsIntegration:
             logger.error(f"Failed to get lead stats: {e}")
             return {}
     
+    def iter_lead_rows(self, chunk_size: int = 1000):
+        """
+        Read the 'Leads' sheet one page of rows at a time.
+        
+        Args:
+            chunk_size: Rows per read request
+            
+        Yields:
+            List[Tuple[int, Dict]]: (sheet row number, {header: value}) for each non-empty row
+        """
+        last_column = chr(65 + len(self.LEAD_HEADERS) - 1)
+        header = self.service.spreadsheets().values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range=f'Leads!A1:{last_column}1'
+        ).execute().get('values', [self.LEAD_HEADERS])[0]
+        
+        start = 2
+        while True:
+            end = start + chunk_size - 1
+            rows = self.service.spreadsheets().values().get(
+                spreadsheetId=self.spreadsheet_id,
+                range=f'Leads!A{start}:{last_column}{end}'
+            ).execute().get('values', [])
+            
+            chunk = [(start + i, dict(zip(header, row))) for i, row in enumerate(rows) if row]
+            if chunk:
+                yield chunk
+            if len(rows) < chunk_size:
+                break
+            start = end + 1
+    
+    def update_lead_scores(self, scores: Dict[int, int], batch_size: int = 500) -> int:
+        """
+        Overwrite the 'Lead Score' cell of the given rows of the 'Leads' sheet.
+        
+        Args:
+            scores: Sheet row number -> new lead score
+            batch_size: Cells per batchUpdate request
+            
+        Returns:
+            int: Number of cells updated
+        """
+        column = chr(65 + self.LEAD_HEADERS.index('Lead Score'))
+        rows = sorted(scores.items())
+        updated = 0
+        
+        try:
+            for i in range(0, len(rows), batch_size):
+                body = {
+                    'valueInputOption': 'USER_ENTERED',
+                    'data': [
+                        {'range': f'Leads!{column}{row}', 'values': [[score]]}
+                        for row, score in rows[i:i + batch_size]
+                    ]
+                }
+                result = self.service.spreadsheets().values().batchUpdate(
+                    spreadsheetId=self.spreadsheet_id,
+                    body=body
+                ).execute()
+                updated += result.get('totalUpdatedCells', len(body['data']))
+            
+            logger.info(f"Lead scores updated: {updated} cells")
+            
+        except HttpError as e:
+            logger.error(f"Failed to update lead scores after {updated} cells: {e}")
+        
+        return updated
+    
     def setup_sheets(self) -> bool:
         """
         Set up initial sheet structure with headers.
@@ -263,11 +614,7 @@ class GoogleSheetsIntegration:
                     'Timestamp', 'Customer ID', 'Intent', 'Message', 
                     'Response', 'Sentiment', 'Resolution Status', 'Agent'
                 ],
-                'Leads': [
-                    'Timestamp', 'Customer Name', 'Email', 'Company', 
-                    'Company Size', 'Budget Range', 'Timeline', 'Specific Needs',
-                    'Lead Score', 'Priority', 'Source', 'Status', 'Assigned To'
-                ],
+                'Leads': self.LEAD_HEADERS,
                 'Analytics': [
                     'Date', 'Total Conversations', 'Leads Generated', 
                     'Technical Tickets', 'Avg Response Time', 
@@ -377,6 +724,7 @@ if __name__ == "__main__":
     }
     
     sheets.update_analytics(metric_data)
+    sheets.flush()
     
     # Get lead statistics
     stats = sheets.get_lead_stats()
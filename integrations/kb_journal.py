@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Per-entry persistence for JSON knowledge base files
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def journal_path(kb_file: str) -> str:
+    """Change journal kept next to a knowledge base file"""
+    return os.path.splitext(kb_file)[0] + ".changes.jsonl"
+
+
+def _apply_change(knowledge_base: Dict[str, Any], change: Dict[str, Any]):
+    if change["op"] == "upsert":
+        knowledge_base[change["id"]] = change["entry"]
+    elif change["op"] == "delete":
+        knowledge_base.pop(change["id"], None)
+    else:
+        logger.warning(f"Skipping unknown knowledge base change: {change['op']}")
+
+
+def _replay(path: str, knowledge_base: Dict[str, Any]) -> Tuple[int, int]:
+    """Apply a journal to the entries; returns (changes applied, offset of the last complete line)"""
+    applied = good_offset = 0
+    with open(path, 'rb') as f:
+        for raw_line in f:
+            if not raw_line.endswith(b"\n"):
+                # Partially written change at the tail of the journal
+                break
+            try:
+                _apply_change(knowledge_base, json.loads(raw_line.decode('utf-8')))
+                applied += 1
+            except (ValueError, KeyError) as e:
+                logger.error(f"Skipping corrupt change in {path}: {e}")
+            good_offset += len(raw_line)
+    return applied, good_offset
+
+
+def read_knowledge_base(kb_file: str) -> Optional[Dict[str, Any]]:
+    """Entries of a knowledge base file with its change journal applied, or None if neither exists"""
+    changes_file = journal_path(kb_file)
+    if not os.path.exists(kb_file) and not os.path.exists(changes_file):
+        return None
+
+    knowledge_base = {}
+    if os.path.exists(kb_file):
+        with open(kb_file, 'r', encoding='utf-8') as f:
+            knowledge_base = json.load(f)
+    if os.path.exists(changes_file):
+        _replay(changes_file, knowledge_base)
+    return knowledge_base
+
+
+class KBJournal:
+    """
+    A knowledge base file plus an append-only journal of entry changes.
+
+    ``upsert`` and ``delete`` append one JSON line to
+    ``<name>.changes.jsonl`` instead of rewriting the whole file, so saving
+    an edit costs the size of the entry. Once ``compact_after`` changes have
+    accumulated, ``save`` writes the full entries to the knowledge base file
+    (temporary file and atomic rename) and empties the journal. ``load``
+    replays the journal on top of the file and truncates a torn last line.
+    """
+
+    def __init__(self, kb_file: str, compact_after: int = 100, fsync: bool = False):
+        self.kb_file = kb_file
+        self.changes_file = journal_path(kb_file)
+        self.compact_after = compact_after
+        self.fsync = fsync
+
+        self.pending = 0  # Changes in the journal not yet folded into the file
+        self._lock = threading.Lock()
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Entries with the journal applied, or None if neither file exists"""
+        self.pending = 0
+        if not os.path.exists(self.changes_file):
+            return read_knowledge_base(self.kb_file)
+
+        knowledge_base = {}
+        if os.path.exists(self.kb_file):
+            with open(self.kb_file, 'r', encoding='utf-8') as f:
+                knowledge_base = json.load(f)
+        self.pending, good_offset = _replay(self.changes_file, knowledge_base)
+        if good_offset < os.path.getsize(self.changes_file):
+            logger.warning(f"Truncating torn write at offset {good_offset} in {self.changes_file}")
+            with open(self.changes_file, 'r+b') as f:
+                f.truncate(good_offset)
+        return knowledge_base
+
+    def upsert(self, kb_id: str, entry: Dict[str, Any], knowledge_base: Dict[str, Any]):
+        """Persist an added or replaced entry of ``knowledge_base``"""
+        self._append({"op": "upsert", "id": kb_id, "entry": entry}, knowledge_base)
+
+    def delete(self, kb_id: str, knowledge_base: Dict[str, Any]):
+        """Persist the removal of an entry of ``knowledge_base``"""
+        self._append({"op": "delete", "id": kb_id}, knowledge_base)
+
+    def _append(self, change: Dict[str, Any], knowledge_base: Dict[str, Any]):
+        try:
+            with self._lock:
+                with open(self.changes_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(change, ensure_ascii=False) + "\n")
+                    f.flush()
+                    if self.fsync:
+                        os.fsync(f.fileno())
+                self.pending += 1
+        except Exception as e:
+            logger.error(f"Error appending to knowledge base journal: {e}")
+            return
+
+        if self.pending >= self.compact_after:
+            self.save(knowledge_base)
+
+    def save(self, knowledge_base: Dict[str, Any]):
+        """Write every entry to the knowledge base file and empty the journal"""
+        try:
+            with self._lock:
+                tmp_file = self.kb_file + ".tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(knowledge_base, f, indent=2, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, self.kb_file)
+                if os.path.exists(self.changes_file):
+                    os.remove(self.changes_file)
+                self.pending = 0
+        except Exception as e:
+            logger.error(f"Error saving knowledge base: {e}")
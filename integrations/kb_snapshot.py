@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Copy-on-write knowledge base versions shared by the support assistants
+"""
+
+import logging
+import os
+from abc import ABC, abstractmethod
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from search_index import InvertedIndex
+
+logger = logging.getLogger(__name__)
+
+# kb_id, entry -> (fields to index, {derived map name: value for this entry})
+Deriver = Callable[[str, Dict[str, Any]], Tuple[Dict[str, Any], Dict[str, Any]]]
+
+
+class KBSnapshot:
+    """
+    One version of a knowledge base: its entries and what is derived from them.
+
+    A published snapshot is never modified. Searches read the current
+    snapshot once and use it for the whole call, so they always see
+    entries, index and per-entry maps of the same version. Changes go
+    through ``evolve``, which builds the next version next to this one,
+    re-indexing only the changed entries (posting lists are shared through
+    ``InvertedIndex.copy``), and the owner publishes it by replacing its
+    reference in one assignment.
+    """
+
+    __slots__ = ("version", "entries", "index", "derived", "vector_index", "_positions")
+
+    def __init__(self, version: int, entries: Dict[str, Dict[str, Any]], index: InvertedIndex,
+                 derived: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.version = version
+        self.entries = entries
+        self.index = index
+        self.derived = derived or {}
+        self.vector_index = None  # Dense index of these entries, built on first use
+        self._positions = None
+
+    @classmethod
+    def build(cls, version: int, entries: Dict[str, Dict[str, Any]], index: InvertedIndex,
+              derive: Deriver) -> "KBSnapshot":
+        """Snapshot indexing every entry into the given empty index"""
+        return cls(version - 1, {}, index).evolve(entries, (), derive, copy_index=False)
+
+    def evolve(self, upserts: Dict[str, Dict[str, Any]], deletes: Iterable[str], derive: Deriver,
+               copy_index: bool = True) -> "KBSnapshot":
+        """The next version with entries replaced or added and others deleted"""
+        entries = dict(self.entries)
+        index = self.index.copy() if copy_index else self.index
+        derived = {name: dict(values) for name, values in self.derived.items()}
+
+        for kb_id in deletes:
+            if entries.pop(kb_id, None) is None:
+                continue
+            index.remove(kb_id)
+            for values in derived.values():
+                values.pop(kb_id, None)
+
+        for kb_id, entry in upserts.items():
+            entries[kb_id] = entry
+            fields, extras = derive(kb_id, entry)
+            index.add(kb_id, fields)
+            for name, value in extras.items():
+                derived.setdefault(name, {})[kb_id] = value
+
+        return KBSnapshot(self.version + 1, entries, index, derived)
+
+    def position(self, kb_id: str) -> int:
+        """Position of an entry in the knowledge base order"""
+        if self._positions is None:
+            self._positions = {key: i for i, key in enumerate(self.entries)}
+        return self._positions[kb_id]
+
+
+def file_signature(paths: Iterable[str]) -> Tuple[Optional[Tuple[int, int]], ...]:
+    """(mtime_ns, size) of each file, None for a missing one"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+class SnapshotKnowledgeBase(ABC):
+    """
+    Knowledge base whose entries and indexes are published as KBSnapshot versions.
+
+    ``apply_changes`` publishes a new version built from the current one.
+    ``reload_if_changed`` notices edits made to the files outside this
+    process (an editor, another worker) by their modification time and
+    size, reparses them and indexes the result without holding the write
+    lock, then swaps the new version in. Searches never wait for either;
+    ``_prepare`` lets a subclass build more of a version before it is
+    published.
+
+    Subclasses implement ``_new_index``, ``_derive``, ``_persist``,
+    ``_read_entries`` and ``watched_files``.
+    """
+
+    def __init__(self):
+        self.snapshot = KBSnapshot(0, {}, self._new_index())
+        self._write_lock = threading.Lock()
+        self._signature = None  # Files as last read or written by this process
+        self.reload_stats = {
+            "reloads": 0,
+            "errors": 0,
+            "last_reload_at": None,
+            "last_reload_seconds": None,      # Parse, index and swap
+            "last_change_lag_seconds": None   # File modification to swap
+        }
+
+    @property
+    def knowledge_base(self) -> Dict[str, Dict[str, Any]]:
+        """Entries of the current version"""
+        return self.snapshot.entries
+
+    @property
+    def index(self) -> InvertedIndex:
+        return self.snapshot.index
+
+    @property
+    def version(self) -> int:
+        """Bumped on every change to the entries"""
+        return self.snapshot.version
+
+    @abstractmethod
+    def _new_index(self) -> InvertedIndex:
+        """Empty index configured for this knowledge base"""
+
+    @abstractmethod
+    def _derive(self, kb_id: str, entry: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Indexed fields and per-entry maps of a single entry"""
+
+    @abstractmethod
+    def _persist(self, snapshot: KBSnapshot, upserts: Dict[str, Dict[str, Any]], deletes: List[str]):
+        """Save the changes that produced ``snapshot``"""
+
+    @abstractmethod
+    def _read_entries(self) -> Dict[str, Dict[str, Any]]:
+        """Parse the knowledge base files"""
+
+    @abstractmethod
+    def watched_files(self) -> List[str]:
+        """Files whose changes trigger a reload"""
+
+    def _prepare(self, snapshot: KBSnapshot):
+        """Build what searches would otherwise derive lazily, before ``snapshot`` is published"""
+
+    def mark_files_read(self):
+        """Record the files as matching the current version"""
+        self._signature = file_signature(self.watched_files())
+
+    def rebuild_index(self, knowledge_base: Optional[Dict[str, Dict[str, Any]]] = None):
+        """Rebuild the search index from the given (default: current) entries and publish it"""
+        with self._write_lock:
+            entries = self.knowledge_base if knowledge_base is None else knowledge_base
+            snapshot = KBSnapshot.build(self.version + 1, entries, self._new_index(), self._derive)
+            self._prepare(snapshot)
+            self.snapshot = snapshot
+
+    def apply_changes(self, upserts: Dict[str, Dict[str, Any]], deletes: Iterable[str] = ()) -> int:
+        """Publish a new version with entries added, replaced or deleted; returns its number
+
+        Searches that already started keep reading the version they began with.
+        """
+        with self._write_lock:
+            deletes = [kb_id for kb_id in deletes if kb_id in self.knowledge_base]
+            snapshot = self.snapshot.evolve(upserts, deletes, self._derive)
+            self._prepare(snapshot)
+            self.snapshot = snapshot
+            self._persist(snapshot, upserts, deletes)
+            self.mark_files_read()
+            return snapshot.version
+
+    def upsert_entry(self, kb_id: str, entry: Dict[str, Any]):
+        """Add or replace an entry and update the index"""
+        self.apply_changes({kb_id: entry})
+
+    def delete_entry(self, kb_id: str) -> bool:
+        """Remove an entry and drop it from the index"""
+        if kb_id not in self.knowledge_base:
+            return False
+        self.apply_changes({}, [kb_id])
+        return True
+
+    def reload_if_changed(self) -> bool:
+        """Reparse the files and swap in a new version if they changed since last read"""
+        seen = self._signature
+        signature = file_signature(self.watched_files())
+        if signature == seen:
+            return False
+
+        started = time.perf_counter()
+        try:
+            entries = self._read_entries()
+            snapshot = KBSnapshot.build(0, entries, self._new_index(), self._derive)
+            self._prepare(snapshot)
+        except Exception as e:
+            # Keep serving the current version; retried once the files change again
+            logger.error(f"Error reloading knowledge base {self.watched_files()[0]}: {e}")
+            self._signature = signature
+            self.reload_stats["errors"] += 1
+            return False
+
+        with self._write_lock:
+            if self._signature != seen:
+                # This process wrote the files meanwhile; its version already has the latest entries
+                return False
+            snapshot.version = self.snapshot.version + 1
+            self.snapshot = snapshot
+            self._signature = signature
+
+        modified = max((part[0] for part in signature if part), default=None)
+        self.reload_stats.update({
+            "reloads": self.reload_stats["reloads"] + 1,
+            "last_reload_at": datetime.now().isoformat(),
+            "last_reload_seconds": round(time.perf_counter() - started, 4),
+            "last_change_lag_seconds": round(time.time() - modified / 1e9, 4) if modified else None
+        })
+        logger.info(f"Reloaded {len(entries)} knowledge base entries from {self.watched_files()[0]} "
+                    f"in {self.reload_stats['last_reload_seconds']:.3f}s")
+        return True
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Background hot reload of the knowledge base files
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from service_registry import services
+
+logger = logging.getLogger(__name__)
+
+
+class KBWatcher:
+    """
+    Polls the knowledge base files and reloads the ones that changed.
+
+    Every ``interval`` seconds each knowledge base compares the modification
+    time and size of its files with what it last read or wrote. A changed
+    knowledge base is reparsed and re-indexed on this thread, then its new
+    version is swapped in (see ``SnapshotKnowledgeBase.reload_if_changed``),
+    so requests keep being answered from the old version meanwhile.
+    Polling is used rather than inotify to stay portable and stdlib-only;
+    a check is a couple of ``stat`` calls per knowledge base.
+    """
+
+    def __init__(self, get_knowledge_bases: Callable[[], List[Any]], interval: float = 2.0):
+        self.get_knowledge_bases = get_knowledge_bases
+        self.interval = interval
+
+        self.stats = {"checks": 0, "reloads": 0, "last_check": None}
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> int:
+        """Reload every knowledge base whose files changed; returns how many were reloaded"""
+        reloaded = 0
+        for kb in self.get_knowledge_bases():
+            try:
+                if kb.reload_if_changed():
+                    reloaded += 1
+            except Exception as e:
+                logger.error(f"Error checking knowledge base for changes: {e}")
+        self.stats["checks"] += 1
+        self.stats["reloads"] += reloaded
+        self.stats["last_check"] = datetime.now().isoformat()
+        return reloaded
+
+    def start(self) -> Optional[threading.Thread]:
+        """Poll in a daemon thread until ``stop``; disabled when the interval is not positive"""
+        if self.interval <= 0:
+            return None
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="kb-watcher", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.check()
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "interval_seconds": self.interval,
+            "running": self._thread is not None and self._thread.is_alive()
+        }
+
+
+def loaded_knowledge_bases() -> List[Any]:
+    """Knowledge bases of the assistants built so far; unused ones are not loaded just to be watched"""
+    knowledge_bases = []
+    if services.is_loaded("techcorp_ai"):
+        from techcorp_warp_ai import techcorp_ai
+        knowledge_bases.append(techcorp_ai.kb)
+    if services.is_loaded("warpgpt"):
+        from warpgpt_2_0 import warpgpt
+        knowledge_bases.append(warpgpt.kb)
+    return knowledge_bases
+
+
+def create_kb_watcher() -> KBWatcher:
+    return KBWatcher(loaded_knowledge_bases, interval=float(os.getenv("KB_WATCH_INTERVAL_SECONDS", 2)))
+
+
+# Global watcher, started by the web entry points
+kb_watcher = services.lazy("kb_watcher", create_kb_watcher)
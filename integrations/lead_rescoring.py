@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Bulk re-scoring of stored leads after the lead-scoring rules change
+
+Usage:
+    python integrations/lead_rescoring.py [--source mock|sheets|all] [--workers N] [--chunk-size N]
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from mock_services import LEAD_SCORING_RULES_FILE, LeadScorer
+
+logger = logging.getLogger(__name__)
+
+# 'Leads' sheet header -> lead field read by the scoring rules
+SHEET_LEAD_FIELDS = {
+    'Email': 'email',
+    'Company': 'company',
+    'Company Size': 'company_size',
+    'Budget Range': 'budget',
+    'Timeline': 'timeline',
+    'Specific Needs': 'use_case',
+}
+
+Chunk = List[Tuple[Hashable, Dict[str, Any]]]
+
+# Scorer of a pool worker process, pinned to the rules read when it started
+_worker_scorer: Optional[LeadScorer] = None
+
+
+def _init_worker(rules_file: str):
+    global _worker_scorer
+    _worker_scorer = LeadScorer(rules_file, check_interval=float("inf"))
+
+
+def _score_leads(leads: List[Dict[str, Any]]) -> List[int]:
+    return _worker_scorer.score_batch(leads)
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    """Consecutive lists of up to ``size`` items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _stored_score(value: Any) -> Optional[int]:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class LeadRescorer:
+    """
+    Streams chunks of leads through ``LeadScorer.score_batch`` and reports
+    the leads whose stored score differs from the current rules.
+
+    Chunks are scored in a pool of ``workers`` processes (in this process
+    when ``workers`` is 1), with at most two chunks per worker in flight so
+    memory stays bounded however many leads the source yields. Only the
+    fields the rules read are sent to the workers. Every worker loads the
+    rules once when it starts, so a whole run scores with one version of
+    the rules even if the file changes meanwhile.
+    """
+
+    def __init__(self, rules_file: str = LEAD_SCORING_RULES_FILE, workers: Optional[int] = None,
+                 chunk_size: int = 10000):
+        self.rules_file = rules_file
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.fields = LeadScorer(rules_file, check_interval=float("inf")).fields
+
+    def _scored(self, chunks: Iterable[Chunk]) -> Iterator[Tuple[Chunk, List[int]]]:
+        def project(chunk):
+            return [{field: lead.get(field) for field in self.fields} for _, lead in chunk]
+
+        if self.workers <= 1:
+            _init_worker(self.rules_file)
+            for chunk in chunks:
+                yield chunk, _score_leads(project(chunk))
+            return
+
+        with ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.rules_file,)) as pool:
+            in_flight = deque()
+            for chunk in chunks:
+                in_flight.append((chunk, pool.submit(_score_leads, project(chunk))))
+                if len(in_flight) >= 2 * self.workers:
+                    chunk, future = in_flight.popleft()
+                    yield chunk, future.result()
+            while in_flight:
+                chunk, future = in_flight.popleft()
+                yield chunk, future.result()
+
+    def run(self, chunks: Iterable[Chunk], write_back: Callable[[Dict[Hashable, Tuple[Dict[str, Any], int]]], Any],
+            score_field: str = "lead_score") -> Dict[str, Any]:
+        """
+        Re-score ``(key, lead)`` chunks and pass the changed ones to ``write_back``.
+
+        ``write_back`` is called once per chunk that has changes, with
+        ``{key: (lead, new_score)}``. Returns counts and throughput.
+        """
+        start = time.perf_counter()
+        scanned = changed = 0
+
+        for chunk, scores in self._scored(chunks):
+            scanned += len(chunk)
+            changes = {
+                key: (lead, score)
+                for (key, lead), score in zip(chunk, scores)
+                if _stored_score(lead.get(score_field)) != score
+            }
+            if changes:
+                write_back(changes)
+                changed += len(changes)
+
+        seconds = time.perf_counter() - start
+        report = {
+            "scanned": scanned,
+            "changed": changed,
+            "seconds": round(seconds, 3),
+            "leads_per_second": round(scanned / seconds, 1) if seconds > 0 else 0.0,
+            "workers": self.workers
+        }
+        logger.info(f"Re-scored {scanned} leads ({changed} changed) at {report['leads_per_second']} leads/s")
+        return report
+
+    def rescore_store(self, store) -> Dict[str, Any]:
+        """Re-score the records of a write-behind lead store (e.g. ``MockGoogleSheets.store``)"""
+        updates = {}
+
+        def collect(changes):
+            updates.update({position: {**lead, "lead_score": score} for position, (lead, score) in changes.items()})
+
+        records = list(store.records)
+        report = self.run(chunked(enumerate(records), self.chunk_size), collect)
+        # One write at the end: a JSON store rewrites its whole file per update
+        store.update(updates)
+        return report
+
+    def rescore_sheet(self, sheets) -> Dict[str, Any]:
+        """Re-score the 'Leads' tab through a ``GoogleSheetsIntegration``"""
+        def leads():
+            for rows in sheets.iter_lead_rows(self.chunk_size):
+                yield [
+                    (row, {**{field: values.get(header) for header, field in SHEET_LEAD_FIELDS.items()},
+                           "lead_score": values.get('Lead Score')})
+                    for row, values in rows
+                ]
+
+        def write_back(changes):
+            sheets.update_lead_scores({row: score for row, (_, score) in changes.items()})
+
+        return self.run(leads(), write_back)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score stored leads with the current scoring rules")
+    parser.add_argument("--source", choices=["mock", "sheets", "all"], default="mock",
+                        help="Lead store to re-score")
+    parser.add_argument("--workers", type=int, default=None, help="Scoring processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Leads per scoring chunk")
+    parser.add_argument("--rules", default=LEAD_SCORING_RULES_FILE, help="Lead scoring rules file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    rescorer = LeadRescorer(args.rules, workers=args.workers, chunk_size=args.chunk_size)
+    reports = {}
+
+    if args.source in ("mock", "all"):
+        from mock_services import MockGoogleSheets
+        sheets = MockGoogleSheets()
+        reports["mock"] = rescorer.rescore_store(sheets.store)
+        sheets.store.close()
+
+    if args.source in ("sheets", "all"):
+        from google_sheets_api import GoogleSheetsIntegration
+        integration = GoogleSheetsIntegration(
+            os.getenv('GOOGLE_SHEETS_CREDENTIALS_FILE'),
+            os.getenv('GOOGLE_SHEETS_SPREADSHEET_ID')
+        )
+        reports["sheets"] = rescorer.rescore_sheet(integration)
+
+    print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
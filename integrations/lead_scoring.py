@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Rule-driven lead scoring compiled from data/lead-scoring-rules.json
+"""
+
+import bisect
+import json
+import logging
+import numbers
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+AMOUNT_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*([km])?\b")
+AMOUNT_MULTIPLIERS = {"k": 1e3, "m": 1e6}
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Rule section -> (lead field, label key) for range buckets and enumerations
+RANGE_SECTIONS = {
+    "budget_criteria": ("budget", "range"),
+    "company_size_criteria": ("company_size", "size"),
+}
+ENUM_SECTIONS = {
+    "timeline_criteria": ("timeline", "timeline"),
+    "authority_criteria": ("role", "role"),
+    "use_case_criteria": ("use_case", "use_case"),
+    "engagement_criteria": ("engagement", "behavior"),
+}
+KEYWORD_SECTIONS = {
+    "company_keyword_criteria": "company",
+    "inquiry_type_criteria": "inquiry_type",
+}
+
+
+def normalize_label(value: Any) -> str:
+    """Lowercase with single spaces, so labels compare loosely"""
+    return WHITESPACE_PATTERN.sub(" ", str(value).strip().lower())
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    """First number in a value, honouring k/m suffixes ("$50k" -> 50000.0)"""
+    if isinstance(value, numbers.Real) and not isinstance(value, bool):
+        return float(value) if value == value else None
+    if not isinstance(value, str):
+        return None
+    match = AMOUNT_PATTERN.search(value.lower().replace(",", ""))
+    if not match:
+        return None
+    return float(match.group(1)) * AMOUNT_MULTIPLIERS.get(match.group(2), 1)
+
+
+def _range_bounds(label: str) -> Tuple[float, float]:
+    """Lower and upper bound of labels like "$25,000-$49,999", "$50,000+" or "Under $5,000" """
+    numbers = [parse_amount(part) for part in label.replace(",", "").split("-")]
+    if label.strip().lower().startswith("under"):
+        return 0.0, numbers[0]
+    if len(numbers) == 2 and None not in numbers:
+        return numbers[0], numbers[1]
+    return numbers[0], float("inf")
+
+
+class RangeRule:
+    """Score from the bucket a numeric value falls in; exact labels match directly"""
+
+    def __init__(self, field: str, criteria: List[Dict[str, Any]], label_key: str):
+        self.field = field
+        self.labels = {normalize_label(c[label_key]): c["score"] for c in criteria}
+        buckets = sorted((_range_bounds(c[label_key])[0], c["score"]) for c in criteria)
+        self.lower_bounds = [lower for lower, _ in buckets]
+        self.scores = [score for _, score in buckets]
+
+    def score(self, value: Any) -> int:
+        if value is None or value == "":
+            return 0
+        label = self.labels.get(normalize_label(value))
+        if label is not None:
+            return label
+        amount = parse_amount(value)
+        if amount is None:
+            return 0
+        i = bisect.bisect_right(self.lower_bounds, amount) - 1
+        return self.scores[i] if i >= 0 else 0
+
+
+class EnumRule:
+    """
+    Score from a fixed set of labels.
+
+    Labels also match without their parenthetical ("Immediate") and by each
+    "/"-separated part ("CEO", "Owner"). An "Other" entry scores any other
+    non-empty value; multi-valued fields such as engagement take the best
+    matching value.
+    """
+
+    def __init__(self, field: str, criteria: List[Dict[str, Any]], label_key: str):
+        self.field = field
+        self.labels: Dict[str, int] = {}
+        self.default = 0
+        for c in criteria:
+            label = normalize_label(c[label_key])
+            if label == "other":
+                self.default = c["score"]
+            aliases = [label, normalize_label(label.split("(")[0])] + [normalize_label(p) for p in label.split("/")]
+            for alias in aliases:
+                self.labels.setdefault(alias, c["score"])
+
+    def score(self, value: Any) -> int:
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        best = 0
+        for item in values:
+            if item is None or item == "" or item != item:
+                continue
+            best = max(best, self.labels.get(normalize_label(item), self.default))
+        return best
+
+
+class KeywordRule:
+    """Best score among criteria whose keywords occur in the field (substring match)"""
+
+    def __init__(self, field: str, criteria: List[Dict[str, Any]]):
+        self.field = field
+        ordered = sorted(criteria, key=lambda c: c["score"], reverse=True)
+        self.patterns = [(re.compile("|".join(re.escape(k.lower()) for k in c["keywords"])), c["score"])
+                         for c in ordered]
+
+    def score(self, value: Any) -> int:
+        if not isinstance(value, str):
+            return 0
+        text = value.lower()
+        for pattern, score in self.patterns:
+            if pattern.search(text):
+                return score
+        return 0
+
+
+class EmailRule:
+    """Score for email addresses outside the free mail providers"""
+
+    def __init__(self, field: str, criteria: List[Dict[str, Any]]):
+        self.field = field
+        rule = criteria[0]
+        self.free_domains = tuple(f"@{d.lower()}" for d in rule["free_domains"])
+        self.business_score = rule["score"]
+
+    def score(self, value: Any) -> int:
+        if not isinstance(value, str) or not value:
+            return 0
+        return 0 if value.lower().endswith(self.free_domains) else self.business_score
+
+
+class CompiledRules:
+    """Matcher tables built once from the parsed rules file"""
+
+    def __init__(self, rules: Dict[str, Any]):
+        sections = rules.get("lead_scoring_rules", {})
+        self.max_score = rules.get("max_score", 100)
+        self.rules = []
+        for section, (field, label_key) in RANGE_SECTIONS.items():
+            if sections.get(section):
+                self.rules.append(RangeRule(field, sections[section], label_key))
+        for section, (field, label_key) in ENUM_SECTIONS.items():
+            if sections.get(section):
+                self.rules.append(EnumRule(field, sections[section], label_key))
+        for section, field in KEYWORD_SECTIONS.items():
+            if sections.get(section):
+                self.rules.append(KeywordRule(field, sections[section]))
+        if sections.get("email_criteria"):
+            self.rules.append(EmailRule("email", sections["email_criteria"]))
+
+    def score(self, lead: Dict[str, Any]) -> int:
+        total = sum(rule.score(lead.get(rule.field)) for rule in self.rules)
+        return int(min(total, self.max_score))
+
+    def score_frame(self, frame) -> List[int]:
+        """Scores for every row of a DataFrame of leads"""
+        import numpy as np
+        import pandas as pd
+
+        total = np.zeros(len(frame), dtype=np.int64)
+        for rule in self.rules:
+            if rule.field not in frame.columns:
+                continue
+            column = frame[rule.field]
+            try:
+                codes, uniques = pd.factorize(column)
+            except TypeError:
+                # Unhashable values (lists of engagement behaviors)
+                codes, uniques = pd.factorize(column.map(lambda v: tuple(v) if isinstance(v, (list, set)) else v))
+            # Each distinct value is scored once, then gathered back to its rows;
+            # missing values have code -1 and pick up the trailing 0
+            scores = np.fromiter((rule.score(value) for value in uniques), dtype=np.int64, count=len(uniques))
+            total += np.append(scores, 0)[codes]
+        return np.minimum(total, self.max_score).tolist()
+
+
+class LeadScoringEngine:
+    """
+    Lead scores from the JSON rules file, reloaded when the file changes.
+
+    The rules are compiled into range buckets (budget, company size),
+    label tables (timeline, role, use case, engagement) and keyword
+    patterns (company, inquiry type, email), and a lead's score is the
+    capped sum over all criteria. ``score_batch`` computes the same scores
+    column by column: each column is factorized with pandas, every distinct
+    value is scored once and the per-row totals are summed with NumPy, so
+    re-scoring many leads costs little more than their distinct values.
+
+    The file is checked at most every ``check_interval`` seconds; a rules
+    file that fails to load is logged and the previous rules stay active.
+    """
+
+    def __init__(self, rules_file: str, check_interval: float = 1.0):
+        self.rules_file = rules_file
+        self.check_interval = check_interval
+        self.scoring_rules: Dict[str, Any] = {}
+        self.version = 0
+        self._compiled: Optional[CompiledRules] = None
+        self._signature = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def _file_signature(self):
+        stat = os.stat(self.rules_file)
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self) -> bool:
+        """Load and compile the rules file; returns False if it could not be loaded"""
+        with self._lock:
+            try:
+                signature = self._file_signature()
+                with open(self.rules_file, 'r') as f:
+                    rules = json.load(f)
+                compiled = CompiledRules(rules)
+            except Exception as e:
+                if self._compiled is None:
+                    raise
+                logger.error(f"Error reloading lead scoring rules from {self.rules_file}: {e}")
+                return False
+
+            self.scoring_rules = rules
+            self._compiled = compiled
+            self._signature = signature
+            self.version += 1
+            logger.info(f"Loaded lead scoring rules v{self.version} from {self.rules_file}")
+            return True
+
+    def reload_if_changed(self) -> bool:
+        """Reload the rules if the file changed since it was last read"""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+        try:
+            changed = self._file_signature() != self._signature
+        except OSError as e:
+            logger.error(f"Error checking lead scoring rules {self.rules_file}: {e}")
+            return False
+        return changed and self.reload()
+
+    @property
+    def fields(self) -> List[str]:
+        """Lead fields the current rules read"""
+        return sorted({rule.field for rule in self._compiled.rules})
+
+    def calculate_score(self, lead_data: Dict[str, Any]) -> int:
+        """Score a single lead"""
+        self.reload_if_changed()
+        return self._compiled.score(lead_data)
+
+    def score_batch(self, leads) -> List[int]:
+        """Score a list of lead dicts (or a DataFrame of leads), in order"""
+        import pandas as pd
+
+        self.reload_if_changed()
+        if not isinstance(leads, pd.DataFrame):
+            leads = list(leads)
+            leads = pd.DataFrame({field: pd.Series([lead.get(field) for lead in leads], dtype=object)
+                                  for field in self.fields}, index=range(len(leads)))
+        if leads.empty:
+            return []
+        return self._compiled.score_frame(leads)
@@ -3,22 +3,74 @@
 Mock services for local development without external API dependencies
 """
 
-import json
 import logging
+import os
+import random
 import re
 import time
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Union, TYPE_CHECKING
+
+from write_behind import WriteBehindJSONList
+from sqlite_storage import WriteBehindSQLiteList
+from service_registry import services
+from lead_scoring import LeadScoringEngine
+
+if TYPE_CHECKING:
+    from vector_store import VectorIndex
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Resolved from the repository, not the working directory
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+LEAD_SCORING_RULES_FILE = os.path.join(DATA_DIR, 'lead-scoring-rules.json')
+
+# Intent keywords in priority order. Every keyword is a plain substring match;
+# the last three groups cover phrases the old keyword fallbacks used to catch.
+INTENT_KEYWORDS = [
+    ("greeting", ["hello", "hi", "hey", "good morning", "good afternoon", "what's up"]),
+    ("goodbye", ["bye", "goodbye", "thanks", "thank you", "that's all", "see you"]),
+    ("product_inquiry", ["product", "service", "offerings", "solutions", "sell", "provide", "manufacture"]),
+    ("support", ["support", "help", "problem", "issue", "trouble", "error", "assist", "call", "contact"]),
+    ("pricing", ["price", "cost", "pricing", "quote", "budget", "charge", "expense"]),
+    ("demo", ["demo", "demonstration", "show me", "trial", "see"]),
+    ("enterprise", ["enterprise", "corporation", "business", "company", "firm", "organization"]),
+    ("integration", ["integration", "integrate", "api", "connect", "sync", "support"]),
+    ("company_info", ["company", "about", "who are you", "tell me", "background", "history", "info"]),
+    ("about", ["about", "details", "information", "data", "insight", "facts"]),
+    ("product_inquiry", ["what do you"]),
+    ("enterprise", ["large scale"]),
+    ("about", ["who", "what"]),
+]
+
+def compile_intent_table(groups: List[tuple]) -> List[tuple]:
+    """Flatten prioritized keyword groups into one (keyword, category) table.
+    
+    A keyword is dropped when another keyword of equal or higher priority is
+    a substring of it, since that one would always match first.
+    """
+    table = []
+    for priority, (category, keywords) in enumerate(groups):
+        for keyword in keywords:
+            implied = any(
+                other != keyword and other in keyword
+                for _, other_keywords in groups[:priority + 1]
+                for other in other_keywords
+            ) or any(keyword == existing for existing, _ in table)
+            if not implied:
+                table.append((keyword, category))
+    return table
+
+# Scanned in order with C-level substring search; the first hit is the
+# highest-priority category, matching the previous regex chain exactly.
+INTENT_TABLE = compile_intent_table(INTENT_KEYWORDS)
+
 class MockOpenAI:
     """Mock OpenAI service for local testing"""
     
     def __init__(self):
-        import re
         self.responses = {
             "greeting": [
                 "🚀 Welcome to TechCorp! I'm your AI-powered business transformation assistant. Whether you're looking to revolutionize your operations, scale your infrastructure, or explore cutting-edge AI solutions, I'm here to guide you through our world-class enterprise offerings. What exciting challenge can we solve together today?",
@@ -80,98 +132,49 @@ class MockOpenAI:
     
     def generate_response(self, user_input: str, context: str = "") -> str:
         """Generate a mock AI response based on user input"""
-        user_input_lower = user_input.lower()
         self.conversation_count += 1
-        
-        # Comprehensive prompt handling
-        pattern_response_mapping = [
-            (r"hello|hi|hey|good morning|good afternoon|what's up", "greeting"),
-            (r"bye|goodbye|thanks|thank you|that's all|see you", "goodbye"),
-            (r"(product|service|offerings|solutions|sell|provide|manufacture)", "product_inquiry"),
-            (r"(support|help|problem|issue|trouble|error|assist|call|contact)", "support"),
-            (r"(price|cost|pricing|quote|budget|charge|expense)", "pricing"),
-            (r"(demo|demonstration|show me|trial|see)", "demo"),
-            (r"(enterprise|corporation|business|company|firm|organization)", "enterprise"),
-            (r"(integration|integrate|api|connect|sync|support)", "integration"),
-            (r"(company|about|who are you|tell me|background|history|info)", "company_info"),
-            (r"(about|details|information|data|insight|facts)", "about")
-        ]
-
-        for pattern, response_category in pattern_response_mapping:
-            if re.search(pattern, user_input_lower):
-                return self._get_random_response(response_category)
-
-        # Category matching
-        if any(word in user_input_lower for word in ["hello", "hi", "hey", "good morning", "good afternoon"]):
-            return self._get_random_response("greeting")
-        
-        # Goodbye patterns
-        elif any(word in user_input_lower for word in ["bye", "goodbye", "thanks", "thank you", "that's all"]):
-            return self._get_random_response("goodbye")
-        
-        # Product/Service inquiries
-        elif any(word in user_input_lower for word in ["product", "service", "what do you", "offerings", "solutions"]):
-            return self._get_random_response("product_inquiry")
-        
-        # Support/Help requests
-        elif any(word in user_input_lower for word in ["support", "help", "problem", "issue", "trouble", "error"]):
-            return self._get_random_response("support")
-        
-        # Pricing inquiries
-        elif any(word in user_input_lower for word in ["price", "cost", "pricing", "quote", "budget"]):
-            return self._get_random_response("pricing")
-        
-        # Demo requests
-        elif any(word in user_input_lower for word in ["demo", "demonstration", "show me", "trial"]):
-            return self._get_random_response("demo")
-        
-        # Enterprise inquiries
-        elif any(word in user_input_lower for word in ["enterprise", "large scale", "corporation", "business"]):
-            return self._get_random_response("enterprise")
-        
-        # Integration questions
-        elif any(word in user_input_lower for word in ["integration", "integrate", "api", "connect"]):
-            return self._get_random_response("integration")
-        
-        # Company information requests
-        elif any(phrase in user_input_lower for phrase in ["about your company", "company info", "info about", "tell me about", "what is techcorp", "who are you", "about techcorp"]):
-            return self._get_random_response("company_info")
-        
-        # About requests
-        elif any(word in user_input_lower for word in ["about", "company", "who", "what", "information", "info"]):
-            return self._get_random_response("about")
-        
-        # Default response
-        else:
-            return self._get_random_response("default")
+        return self._get_random_response(self.classify(user_input))
+    
+    def classify(self, user_input: str) -> str:
+        """Return the highest-priority response category matched anywhere in the input"""
+        user_input_lower = user_input.lower()
+        for keyword, category in INTENT_TABLE:
+            if keyword in user_input_lower:
+                return category
+        return "default"
     
     def _get_random_response(self, category: str) -> str:
         """Get a random response from the specified category"""
-        import random
         responses = self.responses.get(category, self.responses["default"])
         return random.choice(responses)
 
+def create_record_store(table: str, data_file: str, backend: str = None):
+    """Persisted record list for a mock service: "json" file or "sqlite" table"""
+    backend = backend or os.getenv("MOCK_STORAGE", "json")
+    if backend == "json":
+        return WriteBehindJSONList(data_file)
+    if backend == "sqlite":
+        return WriteBehindSQLiteList(table)
+    raise ValueError(f"Unknown mock storage backend: {backend}")
+
 class MockGoogleSheets:
     """Mock Google Sheets service for local testing"""
     
-    def __init__(self):
-        self.data_file = "data/mock_leads.json"
-        self.leads = []
-        self.load_data()
+    def __init__(self, data_file: str = "data/mock_leads.json", backend: str = None):
+        self.data_file = data_file
+        if not os.path.exists(self.data_file):
+            logger.info("Created new leads database")
+        # Leads are persisted in batches by a background writer
+        self.store = create_record_store("leads", self.data_file, backend)
+        self.leads = self.store.records
     
     def load_data(self):
         """Load existing lead data"""
-        try:
-            with open(self.data_file, 'r') as f:
-                self.leads = json.load(f)
-        except FileNotFoundError:
-            self.leads = []
-            logger.info("Created new leads database")
+        self.leads = self.store.load()
     
     def save_data(self):
-        """Save lead data to file"""
-        with open(self.data_file, 'w') as f:
-            json.dump(self.leads, f, indent=2)
+        """Flush pending leads to storage"""
+        self.store.flush()
     
     def add_lead(self, lead_data: Dict[str, Any]) -> bool:
         """Add a new lead to the mock database"""
@@ -185,8 +188,7 @@ class MockGoogleSheets:
             "conversation_log": lead_data.get("conversation_log", [])
         }
         
-        self.leads.append(lead_entry)
-        self.save_data()
+        self.store.append(lead_entry)
         logger.info(f"Added new lead: {lead_entry['name']} ({lead_entry['email']})")
         return True
     
@@ -197,24 +199,21 @@ class MockGoogleSheets:
 class MockSlack:
     """Mock Slack service for local testing"""
     
-    def __init__(self):
-        self.notifications_file = "data/mock_notifications.json"
-        self.notifications = []
-        self.load_notifications()
+    def __init__(self, notifications_file: str = "data/mock_notifications.json", backend: str = None):
+        self.notifications_file = notifications_file
+        if not os.path.exists(self.notifications_file):
+            logger.info("Created new notifications log")
+        # Notifications are persisted in batches by a background writer
+        self.store = create_record_store("notifications", self.notifications_file, backend)
+        self.notifications = self.store.records
     
     def load_notifications(self):
         """Load existing notifications"""
-        try:
-            with open(self.notifications_file, 'r') as f:
-                self.notifications = json.load(f)
-        except FileNotFoundError:
-            self.notifications = []
-            logger.info("Created new notifications log")
+        self.notifications = self.store.load()
     
     def save_notifications(self):
-        """Save notifications to file"""
-        with open(self.notifications_file, 'w') as f:
-            json.dump(self.notifications, f, indent=2)
+        """Flush pending notifications to storage"""
+        self.store.flush()
     
     def send_notification(self, message: str, priority: str = "normal") -> bool:
         """Send a mock notification"""
@@ -225,8 +224,7 @@ class MockSlack:
             "channel": "#customer-support"
         }
         
-        self.notifications.append(notification)
-        self.save_notifications()
+        self.store.append(notification)
         logger.info(f"Slack notification sent: {message[:50]}...")
         return True
     
@@ -234,37 +232,11 @@ class MockSlack:
         """Get all notifications"""
         return self.notifications
 
-class LeadScorer:
-    """Lead scoring system"""
-    
-    def __init__(self):
-        with open('data/lead-scoring-rules.json', 'r') as f:
-            self.scoring_rules = json.load(f)
+class LeadScorer(LeadScoringEngine):
+    """Lead scoring system, driven by data/lead-scoring-rules.json"""
     
-    def calculate_score(self, lead_data: Dict[str, Any]) -> int:
-        """Calculate lead score based on conversation data"""
-        score = 0
-        
-        # Company size scoring
-        company = lead_data.get("company", "").lower()
-        if any(word in company for word in ["enterprise", "corp", "inc", "ltd"]):
-            score += 20
-        
-        # Inquiry type scoring
-        inquiry_type = lead_data.get("inquiry_type", "").lower()
-        if "enterprise" in inquiry_type:
-            score += 30
-        elif "pricing" in inquiry_type:
-            score += 25
-        elif "demo" in inquiry_type:
-            score += 20
-        
-        # Email domain scoring
-        email = lead_data.get("email", "")
-        if email and not email.endswith(('@gmail.com', '@yahoo.com', '@hotmail.com')):
-            score += 15  # Business email
-        
-        return min(score, 100)  # Cap at 100
+    def __init__(self, rules_file: str = LEAD_SCORING_RULES_FILE, check_interval: float = 1.0):
+        super().__init__(rules_file, check_interval)
 
 # Core protocols
 
@@ -280,14 +252,37 @@ def classify_intent(user_input: str) -> str:
         return "account_help"
     return "other"
 
-def query_vector_db(query: str, filters: Dict[str, str], minimum_confidence: float) -> Dict:
-    """Query a vector database with provided filters."""
-    # Placeholder: Mock result for demonstration
-    mock_results = {
-        'confidence': 0.85,
-        'top_match': "This is a mock response from the knowledge base for demonstration purposes."
-    }
-    return mock_results
+_vector_index = None
+
+def get_vector_index() -> "VectorIndex":
+    """Open the local FAQ/KB vector index on first use"""
+    global _vector_index
+    if _vector_index is None:
+        # numpy is only imported once dense search is actually used
+        from vector_store import VectorIndex, build_support_corpus
+        index = VectorIndex(os.path.join(DATA_DIR, "vector_index"))
+        index.open(build_support_corpus(DATA_DIR))
+        _vector_index = index
+    return _vector_index
+
+def query_vector_db(query: Union[str, List[str]], filters: Dict[str, str], minimum_confidence: float,
+                    top_k: int = 3) -> Union[Dict, List[Dict]]:
+    """Query the local vector database with provided filters.
+
+    Accepts a single query or a list of queries; a list is answered with one
+    batched matrix product and returns one result per query.
+    """
+    queries = [query] if isinstance(query, str) else list(query)
+    batches = get_vector_index().search_batch(queries, top_k, filters, minimum_confidence)
+
+    results = []
+    for matches in batches:
+        results.append({
+            'confidence': matches[0]['score'] if matches else 0.0,
+            'top_match': matches[0]['answer'] if matches else None,
+            'matches': matches
+        })
+    return results[0] if isinstance(query, str) else results
 
 def format_response(template: str, data: str, next_steps: List[str]) -> str:
     """Format the response to the user."""
@@ -322,13 +317,14 @@ def enhanced_process_conversation(user_input: str, user_data: Dict[str, Any] = N
 
     return result
 
-mock_openai = MockOpenAI()
-mock_sheets = MockGoogleSheets()
-mock_slack = MockSlack()
+# Built on first use, see service_registry
+mock_openai = services.lazy("mock_openai", MockOpenAI)
+mock_sheets = services.lazy("mock_sheets", MockGoogleSheets)
+mock_slack = services.lazy("mock_slack", MockSlack)
 
 # Import conversation history manager
 from conversation_history import conversation_manager
-lead_scorer = LeadScorer()
+lead_scorer = services.lazy("lead_scorer", LeadScorer)
 
 def process_conversation(user_input: str, user_data: Dict[str, Any] = None) -> Dict[str, Any]:
     """Process a conversation turn with mock services"""
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Compact keyword → response store for conversation learning patterns
+"""
+
+import hashlib
+import heapq
+import re
+from collections import Counter
+from typing import Dict, List, Any, Iterator, Optional
+
+from search_index import STOP_WORDS
+
+KEYWORD_PATTERN = re.compile(r'\b\w+\b')
+
+
+def extract_keywords(text: str) -> List[str]:
+    """Lowercased words longer than two characters, without stop words"""
+    return [k for k in KEYWORD_PATTERN.findall(text.lower()) if len(k) > 2 and k not in STOP_WORDS]
+
+
+def response_id(text: str) -> str:
+    """Content hash used to intern a response"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class PatternStore:
+    """
+    Learning patterns with interned responses and a bounded keyword set.
+
+    Each distinct response text is stored once in ``responses`` under its
+    content hash and reference counted; keywords only keep ``[id, timestamp]``
+    references, so a long response seen under many keywords costs one copy.
+    Keyword counts live in a single ``Counter`` and success rates only for
+    keywords that have one. When more than ``max_keywords`` keywords are
+    tracked, the least frequent ones (oldest first on ties) are evicted in a
+    batch down to ``evict_to`` of the cap, releasing responses nobody
+    references any more.
+
+    ``latest`` points each keyword at its most recent reference (the first
+    one on equal timestamps), so the newest response for a keyword is a
+    dictionary lookup. It is derived state and is not saved.
+
+    Changes are described as deltas, as returned by ``observe`` and
+    ``set_success_rates``, and applied with ``apply``; replaying logged deltas
+    therefore rebuilds exactly the same store.
+    """
+
+    FORMAT = "interned"
+
+    def __init__(self, max_keywords: int = 5000, max_responses: int = 10, evict_to: float = 0.9):
+        self.max_keywords = max_keywords
+        self.max_responses = max_responses
+        self.evict_to = evict_to
+
+        self.counts: Counter = Counter()
+        self.success_rates: Dict[str, float] = {}
+        self.response_refs: Dict[str, List[List[str]]] = {}
+        self.responses: Dict[str, str] = {}
+        self.latest: Dict[str, List[str]] = {}
+        self._ref_counts: Counter = Counter()
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]], **kwargs) -> "PatternStore":
+        """Build a store from its saved form, or from the legacy per-keyword layout"""
+        if isinstance(data, PatternStore):
+            return data
+
+        store = cls(**kwargs)
+        data = data or {}
+
+        if data.get("format") == cls.FORMAT:
+            store.responses = dict(data.get("responses", {}))
+            store.counts = Counter(data.get("counts", {}))
+            store.success_rates = dict(data.get("success_rates", {}))
+            store.response_refs = {kw: [list(ref) for ref in refs]
+                                   for kw, refs in data.get("response_refs", {}).items()}
+            for keyword, refs in store.response_refs.items():
+                store._ref_counts.update(ref[0] for ref in refs)
+                for ref in refs:
+                    store._track_latest(keyword, ref)
+            return store
+
+        # Legacy layout: {keyword: {"count", "success_rate", "responses": [{"response", "timestamp"}]}}
+        for keyword, pattern in data.items():
+            store.counts[keyword] = pattern.get("count", 0)
+            if pattern.get("success_rate"):
+                store.success_rates[keyword] = pattern["success_rate"]
+            for entry in pattern.get("responses", []):
+                store._add_ref(keyword, store._intern(entry["response"]), entry["timestamp"])
+        return store
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serialisable form; shares the store's containers rather than copying them"""
+        return {
+            "format": self.FORMAT,
+            "responses": self.responses,
+            "counts": self.counts,
+            "success_rates": self.success_rates,
+            "response_refs": self.response_refs
+        }
+
+    def export(self) -> Dict[str, Dict[str, Any]]:
+        """Expanded legacy layout, for reporting"""
+        return {keyword: self[keyword] for keyword in self.counts}
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def __contains__(self, keyword: str) -> bool:
+        return keyword in self.counts
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.counts)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PatternStore):
+            return NotImplemented
+        return (self.counts == other.counts and self.success_rates == other.success_rates
+                and self.response_refs == other.response_refs and self.responses == other.responses)
+
+    def __getitem__(self, keyword: str) -> Dict[str, Any]:
+        if keyword not in self.counts:
+            raise KeyError(keyword)
+        return {
+            "count": self.counts[keyword],
+            "responses": [{"response": self.responses[rid], "timestamp": ts}
+                          for rid, ts in self.response_refs.get(keyword, [])],
+            "success_rate": self.success_rates.get(keyword, 0.0)
+        }
+
+    def success_rate(self, keyword: str) -> float:
+        return self.success_rates.get(keyword, 0.0)
+
+    def observe(self, keywords: List[str], response: str, timestamp: str) -> Dict[str, Any]:
+        """Record a response for the given keywords, returning the applied delta"""
+        rid = response_id(response)
+        text_logged = False
+        updates = {}
+        counts = Counter()
+
+        for keyword in keywords:
+            counts[keyword] += 1
+            refs = len(self.response_refs.get(keyword, ())) + len(updates.get(keyword, {}).get("refs", ()))
+            if refs < self.max_responses:
+                ref = {"id": rid, "timestamp": timestamp}
+                if rid not in self.responses and not text_logged:
+                    ref["text"] = response
+                    text_logged = True
+                updates.setdefault(keyword, {}).setdefault("refs", []).append(ref)
+
+        for keyword, count in counts.items():
+            updates.setdefault(keyword, {})
+            updates[keyword]["count"] = self.counts[keyword] + count
+            updates[keyword]["success_rate"] = self.success_rate(keyword)
+
+        delta = {"patterns": updates}
+        evicted = self._eviction_candidates(len(self.counts) + sum(1 for k in counts if k not in self.counts),
+                                            protected=counts)
+        if evicted:
+            delta["evict"] = evicted
+
+        self.apply(delta)
+        return delta
+
+    def set_success_rates(self, rates: Dict[str, float]) -> Dict[str, Any]:
+        """Update success rates of known keywords, returning the applied delta"""
+        delta = {"patterns": {keyword: {"count": self.counts[keyword], "success_rate": rate}
+                              for keyword, rate in rates.items()}}
+        self.apply(delta)
+        return delta
+
+    def apply(self, delta: Dict[str, Any]):
+        """Apply a delta produced by ``observe`` or ``set_success_rates``"""
+        for keyword, update in delta["patterns"].items():
+            self.counts[keyword] = update["count"]
+            if update["success_rate"]:
+                self.success_rates[keyword] = update["success_rate"]
+            else:
+                self.success_rates.pop(keyword, None)
+            for ref in update.get("refs", ()):
+                if "text" in ref:
+                    self.responses.setdefault(ref["id"], ref["text"])
+                self._add_ref(keyword, ref["id"], ref["timestamp"])
+
+        for keyword in delta.get("evict", ()):
+            self._evict(keyword)
+
+    def apply_legacy(self, updates: Dict[str, Dict[str, Any]]):
+        """Apply a pre-interning delta: {keyword: {"count", "success_rate", "response"?}}"""
+        for keyword, update in updates.items():
+            self.counts[keyword] = update["count"]
+            if update["success_rate"]:
+                self.success_rates[keyword] = update["success_rate"]
+            else:
+                self.success_rates.pop(keyword, None)
+            if "response" in update:
+                entry = update["response"]
+                self._add_ref(keyword, self._intern(entry["response"]), entry["timestamp"])
+
+    def _intern(self, text: str) -> str:
+        rid = response_id(text)
+        self.responses.setdefault(rid, text)
+        return rid
+
+    def _add_ref(self, keyword: str, rid: str, timestamp: str):
+        ref = [rid, timestamp]
+        self.response_refs.setdefault(keyword, []).append(ref)
+        self._ref_counts[rid] += 1
+        self._track_latest(keyword, ref)
+
+    def _track_latest(self, keyword: str, ref: List[str]):
+        latest = self.latest.get(keyword)
+        if latest is None or ref[1] > latest[1]:
+            self.latest[keyword] = ref
+
+    def latest_response(self, keyword: str) -> Optional[List[str]]:
+        """The keyword's most recent ``[id, timestamp]`` reference, if any"""
+        return self.latest.get(keyword)
+
+    def _evict(self, keyword: str):
+        self.counts.pop(keyword, None)
+        self.success_rates.pop(keyword, None)
+        self.latest.pop(keyword, None)
+        for rid, _ in self.response_refs.pop(keyword, []):
+            self._ref_counts[rid] -= 1
+            if self._ref_counts[rid] <= 0:
+                del self._ref_counts[rid]
+                self.responses.pop(rid, None)
+
+    def _eviction_candidates(self, size: int, protected) -> List[str]:
+        if size <= self.max_keywords:
+            return []
+        target = int(self.max_keywords * self.evict_to)
+        candidates = ((kw, count) for kw, count in self.counts.items() if kw not in protected)
+        return [kw for kw, _ in heapq.nsmallest(size - target, candidates, key=lambda item: item[1])]
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Bounded LRU + TTL cache for computed assistant responses
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class ResponseCache:
+    """
+    Responses keyed by a hashable request key, with LRU eviction and expiry.
+
+    Entries live in an ``OrderedDict`` in access order, so the least
+    recently used entry is evicted first once ``max_entries`` is reached.
+    An entry older than ``ttl_seconds`` is treated as a miss and dropped.
+    ``max_entries`` of 0 disables caching. Hit, miss, eviction and
+    invalidation counters are reported by ``get_stats``.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value for the key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+
+            stored_at, value = entry
+            if self.clock() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """Cache a value, evicting the least recently used entries over the limit"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self.clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        """Drop every entry, e.g. when the data behind them changed"""
+        with self._lock:
+            if self._entries:
+                self._entries.clear()
+                self.stats["invalidations"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters, current size and hit rate"""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Token-level inverted index with BM25 ranking for the knowledge bases
+"""
+
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Set, Tuple, Union
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset([
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "can", "do", "for",
+    "from", "has", "have", "how", "i", "if", "in", "into", "is", "it", "its",
+    "me", "my", "no", "not", "of", "on", "or", "our", "so", "than", "that",
+    "the", "their", "then", "there", "these", "this", "to", "was", "we",
+    "were", "what", "when", "where", "which", "who", "why", "will", "with",
+    "you", "your"
+])
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric tokens, dropping stop words"""
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in STOP_WORDS
+    ]
+
+
+class InvertedIndex:
+    """
+    Inverted index over multi-field documents scored with BM25.
+
+    Each field contributes its term frequencies scaled by the field weight
+    (a BM25F-style simplification), so a hit in a title can count for more
+    than a hit in a solution step. Query cost is proportional to the length
+    of the posting lists of the query terms, not to the number of documents.
+    ``copy`` is copy-on-write: posting lists stay shared until one of the
+    copies changes them.
+    """
+
+    def __init__(self, field_weights: Dict[str, float], k1: float = 1.2, b: float = 0.75):
+        self.field_weights = field_weights
+        self.k1 = k1
+        self.b = b
+
+        self.postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self.doc_terms: Dict[str, Dict[str, float]] = {}
+        self.doc_lengths: Dict[str, float] = {}
+        self.total_length = 0.0
+        self._shared: Set[str] = set()  # Terms whose posting list another copy also uses
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.doc_lengths
+
+    def add(self, doc_id: str, fields: Dict[str, Union[str, Iterable[str]]]):
+        """Index a document, replacing any previous version with the same id"""
+        if doc_id in self.doc_lengths:
+            self.remove(doc_id)
+
+        term_weights: Dict[str, float] = Counter()
+        for field, weight in self.field_weights.items():
+            value = fields.get(field)
+            if not value:
+                continue
+            text = value if isinstance(value, str) else " ".join(value)
+            for token in tokenize(text):
+                term_weights[token] += weight
+
+        for term, tf in term_weights.items():
+            self._own_posting(term)[doc_id] = tf
+
+        length = sum(term_weights.values())
+        self.doc_terms[doc_id] = dict(term_weights)
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+
+    def remove(self, doc_id: str):
+        """Remove a document from the index"""
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+
+        for term in terms:
+            if term in self.postings:
+                posting = self._own_posting(term)
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[term]
+
+        self.total_length -= self.doc_lengths.pop(doc_id)
+
+    def clear(self):
+        """Drop every document"""
+        self.postings.clear()
+        self.doc_terms.clear()
+        self.doc_lengths.clear()
+        self.total_length = 0.0
+        self._shared = set()
+
+    def copy(self) -> "InvertedIndex":
+        """Independent copy that shares the posting lists until either side changes one"""
+        clone = InvertedIndex(self.field_weights, k1=self.k1, b=self.b)
+        clone.postings = defaultdict(dict, self.postings)
+        clone.doc_terms = dict(self.doc_terms)
+        clone.doc_lengths = dict(self.doc_lengths)
+        clone.total_length = self.total_length
+
+        self._shared = set(self.postings)
+        clone._shared = set(self._shared)
+        return clone
+
+    def _own_posting(self, term: str) -> Dict[str, float]:
+        """The posting list of a term, copied first if it is shared with another copy"""
+        if term in self._shared:
+            self._shared.discard(term)
+            self.postings[term] = dict(self.postings[term])
+        return self.postings[term]
+
+    def idf(self, term: str) -> float:
+        """BM25 inverse document frequency; a term no document contains gets the highest value"""
+        df = len(self.postings.get(term, ()))
+        return math.log(1.0 + (len(self.doc_lengths) - df + 0.5) / (df + 0.5))
+
+    def coverage(self, doc_id: str, query: Union[str, List[str]]) -> float:
+        """Share of the query's terms, weighted by idf, that a document contains (0..1)
+
+        Unlike a BM25 score this does not depend on the other documents'
+        scores, so it can be compared against fixed thresholds.
+        """
+        terms = set(tokenize(query) if isinstance(query, str) else query)
+        doc_terms = self.doc_terms.get(doc_id)
+        if not terms or not doc_terms:
+            return 0.0
+        weights = {term: self.idf(term) for term in terms}
+        total = sum(weights.values())
+        return sum(weight for term, weight in weights.items() if term in doc_terms) / total if total else 0.0
+
+    def search(self, query: Union[str, List[str]], limit: int = None) -> List[Tuple[str, float]]:
+        """Return (doc_id, score) pairs for documents matching the query, best first"""
+        terms = tokenize(query) if isinstance(query, str) else query
+        doc_count = len(self.doc_lengths)
+        if not terms or not doc_count:
+            return []
+
+        avg_length = self.total_length / doc_count or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+
+        for term in set(terms):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+
+            idf = self.idf(term)
+
+            for doc_id, tf in posting.items():
+                norm = self.k1 * (1.0 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+
+        if limit is None:
+            return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Lazily constructed service singletons
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceRegistry:
+    """
+    Registry of named singletons built on first use.
+
+    Modules register a factory and export the ``LazyService`` proxy returned
+    by ``lazy``; nothing is constructed until an attribute of the proxy is
+    first used. Construction is guarded per service, so a background
+    ``warm_up`` and a concurrent first request never build a service twice.
+    How long each build took is kept in ``timings``.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+        self.timings: Dict[str, float] = {}
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        """Register (or replace) the factory for a service"""
+        with self._registry_lock:
+            self._factories[name] = factory
+            self._locks.setdefault(name, threading.Lock())
+            self._instances.pop(name, None)
+
+    def lazy(self, name: str, factory: Callable[[], Any]) -> "LazyService":
+        """Register a factory and return a proxy that builds the service on first use"""
+        self.register(name, factory)
+        return LazyService(self, name)
+
+    def get(self, name: str) -> Any:
+        """Return the service, building it if needed"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        if name not in self._factories:
+            raise KeyError(f"Unknown service: {name}")
+
+        with self._locks[name]:
+            instance = self._instances.get(name)
+            if instance is None:
+                start = time.perf_counter()
+                instance = self._factories[name]()
+                self.timings[name] = time.perf_counter() - start
+                self._instances[name] = instance
+                logger.info(f"Started service {name} in {self.timings[name] * 1000:.1f}ms")
+        return instance
+
+    def set(self, name: str, instance: Any):
+        """Use an existing instance for a service, e.g. in tests"""
+        with self._registry_lock:
+            self._locks.setdefault(name, threading.Lock())
+            self._factories.setdefault(name, lambda: instance)
+            self._instances[name] = instance
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def reset(self, name: str):
+        """Drop a built instance; the next use builds it again"""
+        self._instances.pop(name, None)
+        self.timings.pop(name, None)
+
+    def warm_up(self, names: Optional[Iterable[str]] = None, background: bool = True) -> Optional[threading.Thread]:
+        """Build the given services (default: all), in a daemon thread unless background is False"""
+        names = list(names) if names is not None else list(self._factories)
+
+        def build():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    logger.error(f"Error warming up service {name}: {e}")
+
+        if not background:
+            build()
+            return None
+
+        thread = threading.Thread(target=build, name="service-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Loaded state and build time (ms) of every registered service"""
+        return {
+            name: {
+                "loaded": name in self._instances,
+                "startup_ms": round(self.timings[name] * 1000, 2) if name in self.timings else None
+            }
+            for name in self._factories
+        }
+
+
+class LazyService:
+    """Proxy that forwards attribute access to a registry service"""
+
+    __slots__ = ("_registry", "_name")
+
+    def __init__(self, registry: ServiceRegistry, name: str):
+        object.__setattr__(self, "_registry", registry)
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._registry.get(self._name), attr)
+
+    def __setattr__(self, attr: str, value: Any):
+        setattr(self._registry.get(self._name), attr, value)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._registry.is_loaded(self._name) else "not loaded"
+        return f"<LazyService {self._name} ({state})>"
+
+
+# Shared by all modules
+services = ServiceRegistry()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Bounded in-memory store for web chat sessions
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def new_session() -> Dict[str, Any]:
+    """Return an empty chat session"""
+    return {'messages': [], 'user_data': {}}
+
+
+def _message_size(message: Dict[str, Any]) -> int:
+    return len(json.dumps(message, default=str).encode('utf-8'))
+
+
+class _Entry:
+    __slots__ = ('session', 'sizes', 'total_bytes', 'last_access')
+
+    def __init__(self, session: Dict[str, Any], last_access: float):
+        self.session = session
+        self.sizes = [_message_size(m) for m in session['messages']]
+        self.total_bytes = sum(self.sizes)
+        self.last_access = last_access
+
+
+class SessionStore:
+    """
+    Chat sessions with TTL expiry, LRU eviction and per-session caps.
+
+    Sessions live in an ``OrderedDict`` kept in access order, so the least
+    recently used session is always first. That makes both LRU eviction and
+    expiry of idle sessions O(1) per removed session. Each session keeps at
+    most ``max_messages`` messages and ``max_bytes`` of serialized messages;
+    the oldest messages are dropped first.
+
+    With ``spill_dir`` set, sessions evicted for space are written to disk and
+    restored on their next access instead of being lost. Sessions idle for
+    longer than ``ttl_seconds`` are dropped, in memory and on disk.
+    """
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 1800,
+                 max_messages: int = 50, max_bytes: int = 64 * 1024,
+                 spill_dir: Optional[str] = None, sweep_interval: float = 60.0,
+                 clock: Callable[[], float] = time.time):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._last_sweep = clock()
+        self.counters = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'spills': 0,
+            'restores': 0,
+            'trimmed_messages': 0
+        }
+
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._entries
+
+    def get(self, session_id: str) -> Dict[str, Any]:
+        """Return the session, restoring or creating it as needed"""
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                self.counters['hits'] += 1
+                entry.last_access = now
+                self._entries.move_to_end(session_id)
+                return entry.session
+
+            self.counters['misses'] += 1
+            session = self._restore(session_id, now) or new_session()
+            self._entries[session_id] = _Entry(session, now)
+            self._trim(self._entries[session_id])
+            self._evict()
+            return session
+
+    def add_message(self, session_id: str, message: Dict[str, Any]):
+        """Append a message, dropping the oldest ones past the caps"""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                self.get(session_id)
+                entry = self._entries[session_id]
+            else:
+                entry.last_access = self.clock()
+                self._entries.move_to_end(session_id)
+            entry.session['messages'].append(message)
+            size = _message_size(message)
+            entry.sizes.append(size)
+            entry.total_bytes += size
+            self._trim(entry)
+
+    def delete(self, session_id: str) -> bool:
+        """Remove a session from memory and disk"""
+        with self._lock:
+            removed = self._entries.pop(session_id, None) is not None
+            path = self._spill_path(session_id)
+            if path and os.path.exists(path):
+                os.remove(path)
+                removed = True
+            return removed
+
+    def sweep(self):
+        """Drop expired sessions from memory and expired spill files"""
+        with self._lock:
+            now = self.clock()
+            self._expire(now, force=True)
+            if not self.spill_dir:
+                return
+            for name in os.listdir(self.spill_dir):
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(self.spill_dir, name)
+                try:
+                    with open(path, 'r') as f:
+                        last_access = json.load(f).get('last_access', 0)
+                except (OSError, ValueError):
+                    continue
+                if now - last_access > self.ttl_seconds:
+                    os.remove(path)
+                    self.counters['expirations'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters and current size, for sizing the store"""
+        with self._lock:
+            lookups = self.counters['hits'] + self.counters['misses']
+            return {
+                **self.counters,
+                'sessions': len(self._entries),
+                'bytes': sum(e.total_bytes for e in self._entries.values()),
+                'hit_rate': self.counters['hits'] / lookups if lookups else 0.0,
+                'max_sessions': self.max_sessions,
+                'ttl_seconds': self.ttl_seconds,
+                'spill_enabled': bool(self.spill_dir)
+            }
+
+    def _expire(self, now: float, force: bool = False):
+        # Least recently used first, so stop at the first live session
+        while self._entries:
+            session_id, entry = next(iter(self._entries.items()))
+            if now - entry.last_access <= self.ttl_seconds:
+                break
+            del self._entries[session_id]
+            self.counters['expirations'] += 1
+
+        if not force and self.spill_dir and now - self._last_sweep >= self.sweep_interval:
+            self._last_sweep = now
+            self.sweep()
+
+    def _trim(self, entry: _Entry):
+        drop = 0
+        count = len(entry.sizes)
+        total = entry.total_bytes
+        # Always keep the newest message, even if it alone is over the byte cap
+        while count - drop > 1 and (count - drop > self.max_messages or total > self.max_bytes):
+            total -= entry.sizes[drop]
+            drop += 1
+        if drop:
+            del entry.session['messages'][:drop]
+            del entry.sizes[:drop]
+            entry.total_bytes = total
+            self.counters['trimmed_messages'] += drop
+
+    def _evict(self):
+        while len(self._entries) > self.max_sessions:
+            session_id, entry = self._entries.popitem(last=False)
+            self.counters['evictions'] += 1
+            self._spill(session_id, entry)
+
+    def _spill_path(self, session_id: str) -> Optional[str]:
+        if not self.spill_dir:
+            return None
+        digest = hashlib.sha1(session_id.encode('utf-8')).hexdigest()
+        return os.path.join(self.spill_dir, f"{digest}.json")
+
+    def _spill(self, session_id: str, entry: _Entry):
+        path = self._spill_path(session_id)
+        if not path:
+            return
+        try:
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    'session_id': session_id,
+                    'last_access': entry.last_access,
+                    'session': entry.session
+                }, f, default=str)
+            os.replace(tmp_path, path)
+            self.counters['spills'] += 1
+        except OSError as e:
+            logger.error(f"Error spilling session {session_id}: {e}")
+
+    def _restore(self, session_id: str, now: float) -> Optional[Dict[str, Any]]:
+        path = self._spill_path(session_id)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            os.remove(path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Error restoring session {session_id}: {e}")
+            return None
+
+        if data.get('session_id') != session_id or now - data.get('last_access', 0) > self.ttl_seconds:
+            self.counters['expirations'] += 1
+            return None
+        self.counters['restores'] += 1
+        return data['session']
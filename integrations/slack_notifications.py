@@ -7,9 +7,9 @@ import os
 import json
 import asyncio
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 import aiohttp
-from slack_sdk import WebClient
+from slack_sdk.web.async_client import AsyncWebClient
 from slack_sdk.errors import SlackApiError
 import logging
 
@@ -22,17 +22,107 @@ class SlackNotifier:
     Slack integration for real-time notifications and team collaboration.
     """
     
-    def __init__(self, bot_token: str, webhook_url: Optional[str] = None):
+    def __init__(self, bot_token: str, webhook_url: Optional[str] = None,
+                 max_concurrency_per_channel: int = 4, max_retries: int = 3,
+                 pool_size: int = 20, timeout: float = 30.0):
         """
         Initialize Slack notifier.
         
+        All Slack API and webhook calls share one pooled aiohttp session, which
+        is created on first use and released by ``close()``.
+        
         Args:
             bot_token: Slack bot token
             webhook_url: Optional webhook URL for simple notifications
+            max_concurrency_per_channel: Messages in flight per channel
+            max_retries: Retries for rate-limited (HTTP 429) requests
+            pool_size: Maximum open connections in the shared session
+            timeout: Total timeout in seconds for each request
         """
         self.bot_token = bot_token
         self.webhook_url = webhook_url
-        self.client = WebClient(token=bot_token) if bot_token else None
+        self.max_concurrency_per_channel = max_concurrency_per_channel
+        self.max_retries = max_retries
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.client = AsyncWebClient(token=bot_token, timeout=int(timeout)) if bot_token else None
+        
+        # The session and semaphores belong to the event loop that created them
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._channel_limits: Dict[str, asyncio.Semaphore] = {}
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            if self._session is not None and not self._session.closed:
+                if self._loop is loop:
+                    await self._session.close()
+                else:
+                    # Left over from a previous event loop, which can no longer close it
+                    self._session.detach()
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._loop = loop
+            self._channel_limits = {}
+            if self.client is not None:
+                self.client.session = self._session
+        return self._session
+    
+    def _channel_limit(self, channel: str) -> asyncio.Semaphore:
+        semaphore = self._channel_limits.get(channel)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency_per_channel)
+            self._channel_limits[channel] = semaphore
+        return semaphore
+    
+    @staticmethod
+    def _retry_after(headers: Any, default: float = 1.0) -> float:
+        try:
+            return max(float((headers or {}).get('Retry-After', default)), 0.0)
+        except (TypeError, ValueError):
+            return default
+    
+    async def _send(self, channel: str, request: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run a Slack request under the channel's concurrency limit.
+        
+        Rate-limited requests (HTTP 429) are retried after the delay given in
+        their ``Retry-After`` header, up to ``max_retries`` times.
+        """
+        await self._get_session()
+        async with self._channel_limit(channel):
+            for attempt in range(self.max_retries + 1):
+                try:
+                    return await request()
+                except SlackApiError as e:
+                    status = getattr(e.response, 'status_code', None)
+                    if status != 429 or attempt == self.max_retries:
+                        raise
+                    delay = self._retry_after(getattr(e.response, 'headers', None))
+                    logger.warning(f"Slack rate limited on {channel}, retrying in {delay}s")
+                    await asyncio.sleep(delay)
+    
+    async def _post_message(self, channel: str, **kwargs) -> Any:
+        return await self._send(channel, lambda: self.client.chat_postMessage(channel=channel, **kwargs))
+    
+    async def close(self):
+        """Close the shared HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+        self._channel_limits = {}
     
     async def notify_high_priority_lead(self, lead_data: Dict) -> bool:
         """
@@ -123,7 +213,7 @@ class SlackNotifier:
             ]
             
             # Send to sales channel
-            result = self.client.chat_postMessage(
+            result = await self._post_message(
                 channel="#sales-alerts",
                 text=f"High-priority lead: {lead_data.get('customer_name', 'Unknown')}",
                 blocks=blocks
@@ -194,7 +284,7 @@ class SlackNotifier:
                 "ts": int(datetime.now().timestamp())
             }]
             
-            result = self.client.chat_postMessage(
+            result = await self._post_message(
                 channel="#technical-support",
                 text=f"Technical escalation: {ticket_data.get('customer_name', 'Unknown')}",
                 attachments=attachments
@@ -277,7 +367,7 @@ class SlackNotifier:
                 }
             ]
             
-            result = self.client.chat_postMessage(
+            result = await self._post_message(
                 channel="#management-reports",
                 text="Daily chatbot performance summary",
                 blocks=blocks
@@ -322,20 +412,42 @@ class SlackNotifier:
                 }]
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(self.webhook_url, json=payload) as response:
-                    if response.status == 200:
-                        logger.info("Webhook notification sent successfully")
-                        return True
-                    else:
-                        logger.error(f"Webhook failed with status: {response.status}")
-                        return False
+            async def post():
+                session = await self._get_session()
+                for attempt in range(self.max_retries + 1):
+                    async with session.post(self.webhook_url, json=payload) as response:
+                        if response.status != 429 or attempt == self.max_retries:
+                            return response.status
+                        delay = self._retry_after(response.headers)
+                    logger.warning(f"Webhook rate limited, retrying in {delay}s")
+                    await asyncio.sleep(delay)
+            
+            status = await self._send("webhook", post)
+            if status == 200:
+                logger.info("Webhook notification sent successfully")
+                return True
+            else:
+                logger.error(f"Webhook failed with status: {status}")
+                return False
                         
         except Exception as e:
             logger.error(f"Failed to send webhook notification: {e}")
             return False
 
 
+    async def notify_high_priority_leads(self, leads: List[Dict]) -> List[bool]:
+        """
+        Send alerts for a burst of high-priority leads concurrently.
+        
+        Args:
+            leads: List of lead dictionaries
+            
+        Returns:
+            List[bool]: Success status per lead, in input order
+        """
+        return list(await asyncio.gather(*(self.notify_high_priority_lead(lead) for lead in leads)))
+
+
 # Utility functions for easy integration
 async def send_lead_alert(lead_data: Dict) -> bool:
     """Quick function to send lead alert."""
@@ -344,8 +456,8 @@ async def send_lead_alert(lead_data: Dict) -> bool:
         logger.warning("No Slack bot token configured")
         return False
     
-    notifier = SlackNotifier(bot_token)
-    return await notifier.notify_high_priority_lead(lead_data)
+    async with SlackNotifier(bot_token) as notifier:
+        return await notifier.notify_high_priority_lead(lead_data)
 
 async def send_tech_alert(ticket_data: Dict) -> bool:
     """Quick function to send technical alert."""
@@ -354,8 +466,8 @@ async def send_tech_alert(ticket_data: Dict) -> bool:
         logger.warning("No Slack bot token configured")
         return False
     
-    notifier = SlackNotifier(bot_token)
-    return await notifier.notify_technical_escalation(ticket_data)
+    async with SlackNotifier(bot_token) as notifier:
+        return await notifier.notify_technical_escalation(ticket_data)
 
 
 # Example usage and testing
@@ -408,6 +520,7 @@ if __name__ == "__main__":
         }
         
         await notifier.notify_daily_summary(analytics_data)
+        await notifier.close()
     
     # Run tests
     asyncio.run(test_notifications())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Promotion of reviewed solutions from the solutions log into the live knowledge bases
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from service_registry import services
+
+logger = logging.getLogger(__name__)
+
+REVIEW_STATUSES = ("approved", "rejected")
+
+# Reviewed by a person but not yet confirmed in production
+PROMOTED_CONFIDENCE = 0.8
+
+
+def solution_to_entry(solution: Dict[str, Any]) -> Dict[str, Any]:
+    """Knowledge base entry for an approved solution, one step per line of its text"""
+    category = solution.get("category", "general")
+    steps = [line.strip() for line in str(solution.get("solution", "")).splitlines() if line.strip()]
+    return {
+        "title": solution.get("problem", ""),
+        "category": category,
+        "confidence": PROMOTED_CONFIDENCE,
+        "version": "1.0.0",
+        "solution": steps,
+        "tags": [category],
+        "source": solution["id"]
+    }
+
+
+class PromotionPipeline:
+    """
+    Moves approved solutions into the knowledge bases without a restart.
+
+    ``review`` records a reviewer's decision in the solutions journal and
+    wakes the background thread, which also runs every ``interval`` seconds
+    to pick up approvals made by other processes. Each run turns all
+    approved solutions into entries, applies them to every knowledge base
+    in one ``apply_changes`` call (a new copy-on-write version, swapped in
+    once its indexes are built, so in-flight searches are unaffected) and
+    marks the solutions ``promoted``.
+    """
+
+    def __init__(self, knowledge_bases: List[Any], journal, interval: float = 30.0):
+        self.knowledge_bases = knowledge_bases
+        self.journal = journal
+        self.interval = interval
+
+        self.stats = {"runs": 0, "promoted": 0, "last_run": None, "last_duration_seconds": None}
+        self._run_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def review(self, solution_id: str, status: str, reviewer: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Approve or reject a logged solution; None if there is no such solution"""
+        if status not in REVIEW_STATUSES:
+            raise ValueError(f"Unknown review status: {status}")
+        solution = self.journal.update(solution_id, {
+            "status": status,
+            "reviewed_by": reviewer,
+            "reviewed_at": datetime.now().isoformat()
+        })
+        if solution is not None and status == "approved":
+            self._wakeup.set()
+        return solution
+
+    def promote_approved(self) -> List[str]:
+        """Apply every approved solution to the knowledge bases; returns the promoted ids"""
+        with self._run_lock:
+            started = time.perf_counter()
+            approved = self.journal.query(status="approved")
+            if approved:
+                upserts = {solution["id"]: solution_to_entry(solution) for solution in approved}
+                for kb in self.knowledge_bases:
+                    kb.apply_changes(upserts)
+
+                promoted_at = datetime.now().isoformat()
+                for solution in approved:
+                    self.journal.update(solution["id"], {"status": "promoted", "promoted_at": promoted_at})
+                logger.info(f"Promoted {len(approved)} solution(s) into the knowledge base")
+
+            self.stats["runs"] += 1
+            self.stats["promoted"] += len(approved)
+            self.stats["last_run"] = datetime.now().isoformat()
+            self.stats["last_duration_seconds"] = round(time.perf_counter() - started, 4)
+            return [solution["id"] for solution in approved]
+
+    def start(self) -> threading.Thread:
+        """Run promotions in a daemon thread until ``stop``"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="solution-promotion", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                self.promote_approved()
+            except Exception as e:
+                logger.error(f"Error promoting approved solutions: {e}")
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Run counters and the number of solutions waiting per status"""
+        return {
+            **self.stats,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "solutions": self.journal.counts()["status"]
+        }
+
+
+def create_promotion_pipeline() -> PromotionPipeline:
+    """Pipeline from the TechCorp solutions log into both assistants' knowledge bases"""
+    from techcorp_warp_ai import techcorp_ai
+    from warpgpt_2_0 import warpgpt
+
+    pipeline = PromotionPipeline(
+        [techcorp_ai.kb, warpgpt.kb],
+        techcorp_ai.kb.solutions_journal,
+        interval=float(os.getenv("PROMOTION_INTERVAL_SECONDS", 30))
+    )
+    pipeline.start()
+    return pipeline
+
+
+# Global pipeline, built and started on first use
+promotion_pipeline = services.lazy("promotion_pipeline", create_promotion_pipeline)
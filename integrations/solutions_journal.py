@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Append-only journal of solutions logged for review
+"""
+
+import atexit
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within the process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SOLUTION_ID_PATTERN = re.compile(r"^sol-(\d+)$")
+
+
+def solution_seq(solution_id: str) -> int:
+    """Numeric part of a solution id, 0 if it has none"""
+    match = SOLUTION_ID_PATTERN.match(str(solution_id))
+    return int(match.group(1)) if match else 0
+
+
+class SolutionsJournal:
+    """
+    Solutions stored as JSON lines appended to ``solutions_log.jsonl``.
+
+    A new solution or a change to one is a single appended line, whatever
+    the size of the log. Appends take an exclusive ``flock`` on the journal
+    and first read the lines other processes appended since the last read,
+    so the next ``sol-NNN`` id is allocated from the highest id in the
+    journal: ids stay unique across concurrent writers and restarts. Lines
+    are written straight away but fsynced in batches, once ``sync_every``
+    lines are unsynced or ``sync_interval`` seconds passed since the oldest.
+    A background thread enforces the interval when no further append comes
+    along to do it; ``flush`` and ``close`` sync the rest.
+
+    ``records`` holds the solutions in id order; ``by_id``, ``by_status``
+    and ``by_category`` index them for reviewer queries.
+    """
+
+    def __init__(self, data_dir: str = "data", sync_every: int = 32, sync_interval: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.path = os.path.join(data_dir, "solutions_log.jsonl")
+        self.legacy_path = os.path.join(data_dir, "solutions_log.json")
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.clock = clock
+
+        self.records: List[Dict[str, Any]] = []
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_status: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.by_category: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.last_seq = 0
+
+        self._lock = threading.RLock()
+        self._fd: Optional[int] = None
+        self._offset = 0
+        self._unsynced = 0
+        self._first_unsynced = 0.0
+        self._syncer: Optional[threading.Thread] = None
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Replay the journal, seeding it from the legacy JSON log on first use"""
+        with self._lock:
+            self.records.clear()
+            self.by_id.clear()
+            self.by_status.clear()
+            self.by_category.clear()
+            self.last_seq = 0
+            self._offset = 0
+
+            if self._fd is None:
+                flags = os.O_RDWR | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+                self._fd = os.open(self.path, flags, 0o644)
+                atexit.register(self.close)
+
+            with self._exclusive():
+                if os.fstat(self._fd).st_size == 0 and os.path.exists(self.legacy_path):
+                    self._migrate_legacy()
+                self._catch_up(repair=True)
+            return self.records
+
+    def _migrate_legacy(self):
+        # Called with the file lock held, so only one process seeds the journal
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+            self._write([{"op": "add", "data": solution} for solution in legacy])
+            self._sync()
+            logger.info(f"Migrated {len(legacy)} solution(s) from {self.legacy_path}")
+        except Exception as e:
+            logger.error(f"Error migrating legacy solutions log: {e}")
+
+    def _exclusive(self):
+        return _FileLock(self._fd)
+
+    def _catch_up(self, repair: bool = False):
+        """Apply lines appended since the last read; ``repair`` drops a torn tail"""
+        size = os.fstat(self._fd).st_size
+        if size <= self._offset:
+            return
+        os.lseek(self._fd, self._offset, os.SEEK_SET)
+        data = os.read(self._fd, size - self._offset)
+
+        end = data.rfind(b"\n") + 1
+        for raw_line in data[:end].splitlines():
+            try:
+                change = json.loads(raw_line.decode('utf-8'))
+                self._apply(change["op"], change)
+            except (ValueError, KeyError) as e:
+                logger.error(f"Skipping corrupt record in {self.path}: {e}")
+        self._offset += end
+
+        if repair and end < len(data):
+            # Appends hold the lock, so a partial line under it was left by a crash
+            logger.warning(f"Truncating torn write at offset {self._offset} in {self.path}")
+            os.ftruncate(self._fd, self._offset)
+
+    def _apply(self, op: str, change: Dict[str, Any]):
+        if op == "add":
+            record = dict(change["data"])
+            self.records.append(record)
+            self.by_id[record["id"]] = record
+            self._index(record)
+            self.last_seq = max(self.last_seq, solution_seq(record["id"]))
+        elif op == "update":
+            record = self.by_id.get(change["id"])
+            if record is None:
+                logger.warning(f"Skipping update of unknown solution {change['id']}")
+                return
+            self._unindex(record)
+            record.update(change["changes"])
+            self._index(record)
+        else:
+            logger.warning(f"Skipping unknown solutions log operation: {op}")
+
+    def _index(self, record: Dict[str, Any]):
+        self.by_status.setdefault(record.get("status"), {})[record["id"]] = record
+        self.by_category.setdefault(record.get("category"), {})[record["id"]] = record
+
+    def _unindex(self, record: Dict[str, Any]):
+        for index, key in ((self.by_status, record.get("status")), (self.by_category, record.get("category"))):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(record["id"], None)
+                if not bucket:
+                    del index[key]
+
+    def _write(self, changes: List[Dict[str, Any]]):
+        data = "".join(json.dumps(change, ensure_ascii=False) + "\n" for change in changes).encode('utf-8')
+        os.write(self._fd, data)
+        if not self._unsynced:
+            self._first_unsynced = self.clock()
+            if math.isfinite(self.sync_interval):
+                self._start_syncer()
+        self._unsynced += len(changes)
+
+    def _append(self, change: Dict[str, Any]):
+        # Called with the file lock held, after _catch_up
+        self._write([change])
+        self._offset = os.fstat(self._fd).st_size
+        self._apply(change["op"], change)
+        if self._unsynced >= self.sync_every or self.clock() - self._first_unsynced >= self.sync_interval:
+            self._sync()
+
+    def _sync(self):
+        if self._unsynced:
+            os.fsync(self._fd)
+            self._unsynced = 0
+    
+    def _start_syncer(self):
+        # Called with the lock held when the first unsynced line is written
+        if self._syncer is None or not self._syncer.is_alive():
+            self._stopped.clear()
+            self._syncer = threading.Thread(target=self._run_syncer, name="solutions-journal-sync", daemon=True)
+            self._syncer.start()
+        self._wakeup.set()
+    
+    def _run_syncer(self):
+        """fsync lines still unsynced ``sync_interval`` after the oldest was written"""
+        while not self._stopped.is_set():
+            self._wakeup.wait()
+            self._wakeup.clear()
+            while not self._stopped.is_set():
+                with self._lock:
+                    if self._fd is None or not self._unsynced:
+                        break
+                    remaining = self._first_unsynced + self.sync_interval - self.clock()
+                    if remaining <= 0:
+                        try:
+                            self._sync()
+                        except OSError as e:
+                            logger.error(f"Error syncing solutions log: {e}")
+                        break
+                self._stopped.wait(remaining)
+
+    def add(self, solution: Dict[str, Any]) -> Dict[str, Any]:
+        """Append a solution under the next free id and return the stored record"""
+        if self._fd is None:
+            raise RuntimeError("SolutionsJournal.load() must be called before add()")
+        with self._lock, self._exclusive():
+            self._catch_up()
+            record = {"id": f"sol-{self.last_seq + 1:03d}", **solution}
+            self._append({"op": "add", "data": record})
+            return self.by_id[record["id"]]
+
+    def update(self, solution_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Change fields of a solution, e.g. its status; None if there is no such solution"""
+        if self._fd is None:
+            raise RuntimeError("SolutionsJournal.load() must be called before update()")
+        with self._lock, self._exclusive():
+            self._catch_up()
+            if solution_id not in self.by_id:
+                return None
+            self._append({"op": "update", "id": solution_id, "changes": changes})
+            return self.by_id[solution_id]
+
+    def refresh(self):
+        """Pick up solutions other processes appended"""
+        if self._fd is None:
+            return
+        with self._lock:
+            self._catch_up()
+
+    def get(self, solution_id: str) -> Optional[Dict[str, Any]]:
+        """A solution by id"""
+        self.refresh()
+        return self.by_id.get(solution_id)
+
+    def query(self, status: Optional[str] = None, category: Optional[str] = None,
+              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Solutions with the given status and/or category, oldest first"""
+        self.refresh()
+        with self._lock:
+            buckets = []
+            if status is not None:
+                buckets.append(self.by_status.get(status, {}))
+            if category is not None:
+                buckets.append(self.by_category.get(category, {}))
+
+            if not buckets:
+                matches = self.records
+            else:
+                # Walk the smaller index and check membership in the other
+                buckets.sort(key=len)
+                matches = [record for solution_id, record in buckets[0].items()
+                           if all(solution_id in bucket for bucket in buckets[1:])]
+                matches.sort(key=lambda record: solution_seq(record["id"]))
+            return [dict(record) for record in matches[:limit]]
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """Number of solutions per status and per category"""
+        self.refresh()
+        with self._lock:
+            return {
+                "status": {status: len(bucket) for status, bucket in self.by_status.items()},
+                "category": {category: len(bucket) for category, bucket in self.by_category.items()}
+            }
+
+    def flush(self):
+        """fsync every written line"""
+        with self._lock:
+            if self._fd is not None:
+                self._sync()
+
+    def close(self):
+        """Sync pending lines and close the journal"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._syncer is not None and self._syncer is not threading.current_thread():
+            self._syncer.join(timeout=5)
+        with self._lock:
+            if self._fd is None:
+                return
+            try:
+                self._sync()
+            except Exception as e:
+                logger.error(f"Error syncing solutions log on shutdown: {e}")
+            os.close(self._fd)
+            self._fd = None
+            atexit.unregister(self.close)
+
+
+class _FileLock:
+    """Exclusive flock on an open file for the duration of a with block"""
+
+    def __init__(self, fd: int):
+        self.fd = fd
+
+    def __enter__(self):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Embedded SQLite persistence for conversations, leads and notifications
+
+The ``conversations`` and ``leads`` tables follow deployment/init.sql,
+with the extra columns the local services need. The database runs in WAL
+mode so readers never block the writer, all SQL is parameterised (sqlite3
+keeps the prepared statements in its statement cache) and every batch of
+changes is written in a single transaction.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Any, Optional
+
+from conversation_storage import JSONFileStorage, Record, empty_state
+from pattern_store import PatternStore
+from write_behind import WriteBehindList
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATABASE = os.path.join("data", "chatbot.db")
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT,
+    customer_id TEXT,
+    intent TEXT,
+    message TEXT,
+    response TEXT,
+    sentiment TEXT,
+    resolution_status TEXT,
+    agent_name TEXT,
+    conversation_id TEXT UNIQUE,
+    user_data TEXT,
+    lead_score INTEGER,
+    response_time REAL,
+    feedback TEXT,
+    response_quality INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS leads (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT,
+    customer_name TEXT,
+    email TEXT,
+    company TEXT,
+    company_size TEXT,
+    budget_range TEXT,
+    timeline TEXT,
+    specific_needs TEXT,
+    lead_score INTEGER,
+    priority TEXT,
+    source TEXT,
+    status TEXT,
+    assigned_to TEXT,
+    inquiry_type TEXT,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS notifications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT,
+    channel TEXT,
+    priority TEXT,
+    message TEXT,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    conversation_id TEXT,
+    timestamp TEXT,
+    feedback TEXT,
+    quality_rating INTEGER,
+    suggested_response TEXT
+);
+
+CREATE TABLE IF NOT EXISTS pattern_keywords (
+    keyword TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    success_rate REAL NOT NULL DEFAULT 0.0
+);
+
+CREATE TABLE IF NOT EXISTS pattern_responses (
+    id TEXT PRIMARY KEY,
+    text TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS pattern_refs (
+    keyword TEXT NOT NULL,
+    response_id TEXT NOT NULL,
+    timestamp TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_conversations_timestamp ON conversations(timestamp);
+CREATE INDEX IF NOT EXISTS idx_conversations_customer_id ON conversations(customer_id);
+CREATE INDEX IF NOT EXISTS idx_conversations_customer_timestamp ON conversations(customer_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_conversations_response_quality ON conversations(response_quality);
+CREATE INDEX IF NOT EXISTS idx_leads_timestamp ON leads(timestamp);
+CREATE INDEX IF NOT EXISTS idx_leads_email ON leads(email);
+CREATE INDEX IF NOT EXISTS idx_leads_priority ON leads(priority);
+CREATE INDEX IF NOT EXISTS idx_notifications_timestamp ON notifications(timestamp);
+CREATE INDEX IF NOT EXISTS idx_feedback_conversation_id ON feedback(conversation_id);
+CREATE INDEX IF NOT EXISTS idx_pattern_refs_keyword ON pattern_refs(keyword);
+CREATE INDEX IF NOT EXISTS idx_pattern_refs_response_id ON pattern_refs(response_id);
+"""
+
+CONVERSATION_COLUMNS = (
+    "conversation_id, customer_id, timestamp, message, response, "
+    "user_data, lead_score, response_time, feedback, response_quality"
+)
+
+INSERT_CONVERSATION = (
+    f"INSERT OR IGNORE INTO conversations ({CONVERSATION_COLUMNS}) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+SELECT_CONVERSATIONS = f"SELECT {CONVERSATION_COLUMNS} FROM conversations"
+INSERT_FEEDBACK = (
+    "INSERT INTO feedback (conversation_id, timestamp, feedback, quality_rating, suggested_response) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+UPDATE_CONVERSATION_FEEDBACK = (
+    "UPDATE conversations SET feedback = ?, response_quality = ? WHERE conversation_id = ?"
+)
+UPSERT_KEYWORD = (
+    "INSERT INTO pattern_keywords (keyword, count, success_rate) VALUES (?, ?, ?) "
+    "ON CONFLICT(keyword) DO UPDATE SET count = excluded.count, success_rate = excluded.success_rate"
+)
+INSERT_RESPONSE = "INSERT OR IGNORE INTO pattern_responses (id, text) VALUES (?, ?)"
+INSERT_REF = "INSERT INTO pattern_refs (keyword, response_id, timestamp) VALUES (?, ?, ?)"
+DELETE_KEYWORD_REFS = "DELETE FROM pattern_refs WHERE keyword = ?"
+DELETE_KEYWORD = "DELETE FROM pattern_keywords WHERE keyword = ?"
+DELETE_ORPHAN_RESPONSES = (
+    "DELETE FROM pattern_responses WHERE id NOT IN (SELECT response_id FROM pattern_refs)"
+)
+
+
+def database_path(url: Optional[str] = None) -> str:
+    """SQLite file named by DATABASE_URL (sqlite:///path), or the default under data/"""
+    url = url if url is not None else os.getenv("DATABASE_URL", "")
+    if url.startswith("sqlite:///"):
+        return url[len("sqlite:///"):]
+    return DEFAULT_DATABASE
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open a WAL-mode connection and make sure the schema exists"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False, cached_statements=256)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    with conn:
+        conn.executescript(SCHEMA)
+    return conn
+
+
+def _conversation_row(conv: Dict[str, Any]) -> tuple:
+    return (
+        conv["conversation_id"], conv["session_id"], conv["timestamp"],
+        conv["user_input"], conv["bot_response"], json.dumps(conv.get("user_data") or {}),
+        conv.get("lead_score", 0), conv.get("response_time", 0.0),
+        conv.get("feedback"), conv.get("response_quality")
+    )
+
+
+def _conversation_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "conversation_id": row["conversation_id"],
+        "session_id": row["customer_id"],
+        "timestamp": row["timestamp"],
+        "user_input": row["message"],
+        "bot_response": row["response"],
+        "user_data": json.loads(row["user_data"] or "{}"),
+        "lead_score": row["lead_score"],
+        "response_time": row["response_time"],
+        "feedback": row["feedback"],
+        "response_quality": row["response_quality"]
+    }
+
+
+def _feedback_row(entry: Dict[str, Any]) -> tuple:
+    return (
+        entry["conversation_id"], entry["timestamp"], entry["feedback"],
+        entry["quality_rating"], entry.get("suggested_response")
+    )
+
+
+class SQLiteStorage:
+    """
+    Conversation storage backend on an embedded SQLite database.
+
+    Each ``append`` call (a conversation or a piece of feedback plus its
+    learning-pattern delta) is one transaction. Besides load/append/save it
+    answers the recent-conversation, per-session and statistics queries with
+    indexed SQL, which ``ConversationHistoryManager`` uses when available.
+    On first use the database is seeded from the legacy JSON files.
+    """
+
+    def __init__(self, data_dir: str = "data", path: Optional[str] = None):
+        self.data_dir = data_dir
+        self.path = path or database_path()
+        self.conn = connect(self.path)
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, Any]:
+        """Load conversations, feedback and learning patterns from the database"""
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            # First start on this database: seed from the legacy JSON files
+            self.save(JSONFileStorage(self.data_dir).load())
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            logger.info(f"Initialised conversation database {self.path}")
+
+        state = empty_state()
+        with self._lock:
+            state["conversation_history"] = [
+                _conversation_dict(row) for row in self.conn.execute(f"{SELECT_CONVERSATIONS} ORDER BY id")
+            ]
+            state["feedback_data"] = [
+                dict(row) for row in self.conn.execute(
+                    "SELECT conversation_id, timestamp, feedback, quality_rating, suggested_response "
+                    "FROM feedback ORDER BY id")
+            ]
+            state["learning_patterns"] = self._load_patterns()
+        return state
+
+    def _load_patterns(self) -> Dict[str, Any]:
+        counts, success_rates, refs = {}, {}, {}
+        for row in self.conn.execute("SELECT keyword, count, success_rate FROM pattern_keywords ORDER BY rowid"):
+            counts[row["keyword"]] = row["count"]
+            if row["success_rate"]:
+                success_rates[row["keyword"]] = row["success_rate"]
+        for row in self.conn.execute("SELECT keyword, response_id, timestamp FROM pattern_refs ORDER BY rowid"):
+            refs.setdefault(row["keyword"], []).append([row["response_id"], row["timestamp"]])
+        return {
+            "format": PatternStore.FORMAT,
+            "responses": {row["id"]: row["text"] for row in self.conn.execute("SELECT id, text FROM pattern_responses")},
+            "counts": counts,
+            "success_rates": success_rates,
+            "response_refs": refs
+        }
+
+    def append(self, records: List[Record], state: Dict[str, Any]):
+        """Write the records in one transaction"""
+        try:
+            with self._lock, self.conn:
+                for op, data in records:
+                    if op == "conversation":
+                        self.conn.execute(INSERT_CONVERSATION, _conversation_row(data))
+                    elif op == "feedback":
+                        self.conn.execute(INSERT_FEEDBACK, _feedback_row(data))
+                        self.conn.execute(UPDATE_CONVERSATION_FEEDBACK,
+                                          (data["feedback"], data["quality_rating"], data["conversation_id"]))
+                    elif op == "pattern_delta":
+                        self._apply_pattern_delta(data)
+                    else:
+                        logger.warning(f"Skipping unknown storage operation: {op}")
+        except sqlite3.Error as e:
+            logger.error(f"Error writing to conversation database: {e}")
+
+    def _apply_pattern_delta(self, delta: Dict[str, Any]):
+        self.conn.executemany(UPSERT_KEYWORD, [
+            (keyword, update["count"], update["success_rate"])
+            for keyword, update in delta["patterns"].items()
+        ])
+        refs = [(keyword, ref) for keyword, update in delta["patterns"].items() for ref in update.get("refs", ())]
+        self.conn.executemany(INSERT_RESPONSE, [(ref["id"], ref["text"]) for _, ref in refs if "text" in ref])
+        self.conn.executemany(INSERT_REF, [(keyword, ref["id"], ref["timestamp"]) for keyword, ref in refs])
+
+        evicted = [(keyword,) for keyword in delta.get("evict", ())]
+        if evicted:
+            self.conn.executemany(DELETE_KEYWORD_REFS, evicted)
+            self.conn.executemany(DELETE_KEYWORD, evicted)
+            self.conn.execute(DELETE_ORPHAN_RESPONSES)
+
+    def save(self, state: Dict[str, Any]):
+        """Replace the database contents with the given state in one transaction"""
+        patterns = PatternStore.from_dict(state["learning_patterns"])
+        try:
+            with self._lock, self.conn:
+                for table in ("conversations", "feedback", "pattern_keywords", "pattern_responses", "pattern_refs"):
+                    self.conn.execute(f"DELETE FROM {table}")
+                self.conn.executemany(INSERT_CONVERSATION,
+                                      [_conversation_row(c) for c in state["conversation_history"]])
+                self.conn.executemany(INSERT_FEEDBACK, [_feedback_row(f) for f in state["feedback_data"]])
+                self.conn.executemany(UPSERT_KEYWORD, [
+                    (keyword, count, patterns.success_rate(keyword)) for keyword, count in patterns.counts.items()
+                ])
+                self.conn.executemany(INSERT_RESPONSE, list(patterns.responses.items()))
+                self.conn.executemany(INSERT_REF, [
+                    (keyword, rid, timestamp)
+                    for keyword, refs in patterns.response_refs.items() for rid, timestamp in refs
+                ])
+        except sqlite3.Error as e:
+            logger.error(f"Error saving conversation database: {e}")
+
+    def recent_conversations(self, limit: int, session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Newest conversations first, optionally for one session"""
+        # Ties on timestamp keep insertion order, like a stable descending sort
+        if session_id:
+            rows = self.conn.execute(
+                f"{SELECT_CONVERSATIONS} WHERE customer_id = ? ORDER BY timestamp DESC, id ASC LIMIT ?",
+                (session_id, limit))
+        else:
+            rows = self.conn.execute(f"{SELECT_CONVERSATIONS} ORDER BY timestamp DESC, id ASC LIMIT ?", (limit,))
+        return [_conversation_dict(row) for row in rows]
+
+    def conversation_stats(self, since: str) -> Dict[str, Any]:
+        """Totals for get_conversation_stats; ``since`` is an ISO timestamp for the recent count"""
+        total = self.conn.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+        rated_sum, rated_count = self.conn.execute(
+            "SELECT SUM(response_quality), COUNT(*) FROM conversations "
+            "WHERE response_quality IS NOT NULL AND response_quality != 0").fetchone()
+        return {
+            "total_conversations": total,
+            "feedback_count": self.conn.execute("SELECT COUNT(*) FROM feedback").fetchone()[0],
+            "average_quality": rated_sum / rated_count if rated_count else 0,
+            "recent_24h": self.conn.execute(
+                "SELECT COUNT(*) FROM conversations WHERE timestamp > ?", (since,)).fetchone()[0],
+            "learning_patterns_count": self.conn.execute("SELECT COUNT(*) FROM pattern_keywords").fetchone()[0]
+        }
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+
+
+class WriteBehindSQLiteList(WriteBehindList):
+    """
+    A record list persisted to a SQLite table by a write-behind thread.
+
+    Each flush inserts only the new records, in one transaction, and
+    ``update`` rewrites only the changed rows. The full record is kept as
+    JSON in the ``data`` column; the columns named in ``TABLES`` are filled
+    from it so they can be indexed and queried.
+    """
+
+    # table -> ((column, record key), ...)
+    TABLES = {
+        "leads": (("timestamp", "timestamp"), ("customer_name", "name"), ("email", "email"),
+                  ("company", "company"), ("lead_score", "lead_score"), ("inquiry_type", "inquiry_type")),
+        "notifications": (("timestamp", "timestamp"), ("channel", "channel"), ("priority", "priority"),
+                          ("message", "message")),
+    }
+
+    def __init__(self, table: str, path: Optional[str] = None, batch_size: int = 50, flush_interval: float = 1.0):
+        if table not in self.TABLES:
+            raise ValueError(f"Unknown record table: {table}")
+        self.table = table
+        self.path = path or database_path()
+        self.conn = connect(self.path)
+        columns = [column for column, _ in self.TABLES[table]] + ["data"]
+        self._insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        self._update_row = f"UPDATE {table} SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?"
+        # Row id of each persisted record, by position
+        self._ids: List[int] = []
+        super().__init__(table, batch_size, flush_interval)
+
+    def _row(self, record: Dict[str, Any]) -> tuple:
+        return tuple(record.get(key) for _, key in self.TABLES[self.table]) + (json.dumps(record),)
+
+    def _read(self) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(f"SELECT id, data FROM {self.table} ORDER BY id").fetchall()
+        self._ids = [row["id"] for row in rows]
+        return [json.loads(row["data"]) for row in rows]
+
+    def _write(self, records: List[Dict[str, Any]], new_records: List[Dict[str, Any]]):
+        last_id = self._ids[-1] if self._ids else 0
+        with self.conn:
+            self.conn.executemany(self._insert, [self._row(record) for record in new_records])
+            self._ids.extend(row["id"] for row in self.conn.execute(
+                f"SELECT id FROM {self.table} WHERE id > ? ORDER BY id", (last_id,)))
+
+    def _update(self, records: List[Dict[str, Any]], changed: Dict[int, Dict[str, Any]]):
+        with self.conn:
+            self.conn.executemany(self._update_row, [
+                self._row(record) + (self._ids[position],) for position, record in changed.items()
+            ])
+
+    def close(self):
+        """Flush pending records and close the database connection"""
+        if self._closed:
+            return
+        super().close()
+        self.conn.close()
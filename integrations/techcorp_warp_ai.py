@@ -4,27 +4,38 @@ TechCorp Warp AI Assistant
 Technical support AI with knowledge base access and solution logging
 """
 
-import json
+import heapq
 import logging
 import os
 import re
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from collections import Counter
+from typing import Dict, List, Any, Optional, Tuple
+
+from kb_journal import KBJournal, read_knowledge_base
+from kb_snapshot import KBSnapshot, SnapshotKnowledgeBase
+from search_index import InvertedIndex, tokenize
+from service_registry import services
+from solutions_journal import SolutionsJournal
+from urgency import load_urgency_detector
 
 logger = logging.getLogger(__name__)
 
-class TechCorpKnowledgeBase:
+class TechCorpKnowledgeBase(SnapshotKnowledgeBase):
     """TechCorp internal knowledge base"""
     
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", compact_after: int = 100):
         self.data_dir = data_dir
         self.kb_file = os.path.join(data_dir, "techcorp_kb.json")
-        self.solutions_log = os.path.join(data_dir, "solutions_log.json")
+        self.solutions_log = os.path.join(data_dir, "solutions_log.json")  # Pre-journal log, migrated on load
+        self.solutions_journal = SolutionsJournal(data_dir)
+        self.journal = KBJournal(self.kb_file, compact_after=compact_after)
+        
+        super().__init__()
         
         # Ensure data directory exists
         os.makedirs(data_dir, exist_ok=True)
         
-        self.knowledge_base = {}
         self.solutions = []
         
         self.load_knowledge_base()
@@ -32,16 +43,16 @@ class TechCorpKnowledgeBase:
     
     def load_knowledge_base(self):
         """Load TechCorp knowledge base"""
-        if os.path.exists(self.kb_file):
-            try:
-                with open(self.kb_file, 'r', encoding='utf-8') as f:
-                    self.knowledge_base = json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading knowledge base: {e}")
-                self.knowledge_base = {}
-        else:
+        try:
+            knowledge_base = self.journal.load()
+        except Exception as e:
+            logger.error(f"Error loading knowledge base: {e}")
+            knowledge_base = {}
+        
+        created = knowledge_base is None
+        if created:
             # Initialize with sample knowledge base
-            self.knowledge_base = {
+            knowledge_base = {
                 "vpn-22": {
                     "title": "VPN Connection Issues",
                     "category": "network",
@@ -98,94 +109,110 @@ class TechCorpKnowledgeBase:
                     "tags": ["api", "rate limit", "throttling", "performance"]
                 }
             }
+        
+        self.rebuild_index(knowledge_base)
+        if created:
             self.save_knowledge_base()
+        self.mark_files_read()
+    
+    def watched_files(self) -> List[str]:
+        return [self.kb_file, self.journal.changes_file]
+    
+    def _read_entries(self) -> Dict[str, Dict[str, Any]]:
+        # Unlike journal.load(), never truncates a line another process is still writing
+        knowledge_base = read_knowledge_base(self.kb_file)
+        if knowledge_base is None:
+            raise FileNotFoundError(self.kb_file)
+        return knowledge_base
+    
+    @staticmethod
+    def _new_index() -> InvertedIndex:
+        # Token postings of title, tags and solution steps; only token presence is used
+        return InvertedIndex({"title": 1.0, "tags": 1.0, "solution": 1.0})
     
     def load_solutions_log(self):
         """Load solutions log"""
-        if os.path.exists(self.solutions_log):
-            try:
-                with open(self.solutions_log, 'r', encoding='utf-8') as f:
-                    self.solutions = json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading solutions log: {e}")
-                self.solutions = []
-        else:
+        try:
+            self.solutions = self.solutions_journal.load()
+        except Exception as e:
+            logger.error(f"Error loading solutions log: {e}")
             self.solutions = []
     
     def save_knowledge_base(self):
-        """Save knowledge base to file"""
-        try:
-            with open(self.kb_file, 'w', encoding='utf-8') as f:
-                json.dump(self.knowledge_base, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            logger.error(f"Error saving knowledge base: {e}")
+        """Save the full knowledge base to file, folding in the change journal"""
+        self.journal.save(self.knowledge_base)
+    
+    @staticmethod
+    def _derive(kb_id: str, entry: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        fields = {
+            "title": entry.get("title", ""),
+            "tags": entry.get("tags", []),
+            "solution": entry.get("solution", [])
+        }
+        return fields, {}
+    
+    def _persist(self, snapshot: KBSnapshot, upserts: Dict[str, Dict[str, Any]], deletes: List[str]):
+        # Only the changed entries are journaled
+        for kb_id in deletes:
+            self.journal.delete(kb_id, snapshot.entries)
+        for kb_id, entry in upserts.items():
+            self.journal.upsert(kb_id, entry, snapshot.entries)
     
     def save_solutions_log(self):
-        """Save solutions log to file"""
+        """Sync solutions appended to the log"""
         try:
-            with open(self.solutions_log, 'w', encoding='utf-8') as f:
-                json.dump(self.solutions, f, indent=2, ensure_ascii=False)
+            self.solutions_journal.flush()
         except Exception as e:
             logger.error(f"Error saving solutions log: {e}")
     
-    def search(self, query: str) -> List[Dict[str, Any]]:
+    def search(self, query: str, limit: int = 3) -> List[Dict[str, Any]]:
         """Search knowledge base for relevant solutions"""
-        query_lower = query.lower()
-        results = []
+        snapshot = self.snapshot
         
-        for kb_id, entry in self.knowledge_base.items():
-            # Search in title, tags, and solution steps
-            search_text = (
-                entry.get("title", "").lower() + " " +
-                " ".join(entry.get("tags", [])) + " " +
-                " ".join(entry.get("solution", []))
-            )
-            
-            # Calculate relevance score
-            score = 0
-            query_words = query_lower.split()
-            
-            for word in query_words:
-                if word in search_text:
-                    score += 1
-            
-            if score > 0:
-                results.append({
-                    "id": kb_id,
-                    "score": score,
-                    "entry": entry
-                })
+        # Relevance score: number of query words found in title, tags and solution steps
+        scores = Counter()
+        for word in tokenize(query):
+            for kb_id in snapshot.index.postings.get(word, ()):
+                scores[kb_id] += 1
         
-        # Sort by relevance score
-        results.sort(key=lambda x: x["score"], reverse=True)
-        return results[:3]  # Return top 3 results
+        # Top results without sorting every candidate; earlier entries win ties
+        top = heapq.nlargest(limit, scores, key=lambda kb_id: (scores[kb_id], -snapshot.position(kb_id)))
+        return [{"id": kb_id, "score": scores[kb_id], "entry": snapshot.entries[kb_id]} for kb_id in top]
     
     def log_solution(self, problem: str, solution: str, category: str = "general") -> str:
         """Log a new solution to the knowledge base"""
-        solution_id = f"sol-{len(self.solutions) + 1:03d}"
-        
-        new_solution = {
-            "id": solution_id,
+        new_solution = self.solutions_journal.add({
             "timestamp": datetime.now().isoformat(),
             "problem": problem,
             "solution": solution,
             "category": category,
             "status": "pending_review"
-        }
-        
-        self.solutions.append(new_solution)
-        self.save_solutions_log()
+        })
+        solution_id = new_solution["id"]
         
         logger.info(f"Logged new solution: {solution_id}")
         return solution_id
+    
+    def query_solutions(self, status: Optional[str] = None, category: Optional[str] = None,
+                        limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Logged solutions by review status and/or category, oldest first"""
+        return self.solutions_journal.query(status=status, category=category, limit=limit)
 
 class TechCorpWarpAI:
     """TechCorp Warp AI Assistant"""
     
+    # Used when data/urgency_keywords.json has no "techcorp" profile
+    URGENT_KEYWORDS = {
+        "critical": ["down", "crashed", "emergency", "critical", "urgent", "production", "outage"],
+        "high": ["can't access", "not working", "broken", "failed"],
+        "medium": ["error", "timeout"]
+    }
+    
     def __init__(self):
         self.kb = TechCorpKnowledgeBase()
         self.conversation_memory = []  # Last 3 messages
         self.session_data = {}
+        self.urgency = load_urgency_detector("techcorp", self.URGENT_KEYWORDS)
     
     def add_to_memory(self, user_message: str, ai_response: str):
         """Add conversation to memory (keep last 3)"""
@@ -234,15 +261,13 @@ class TechCorpWarpAI:
         
         return response.strip()
     
+    def assess_urgency(self, user_input: str) -> Dict[str, Any]:
+        """Urgency phrases found in the message and their severity"""
+        return self.urgency.assess(user_input)
+    
     def detect_urgency(self, user_input: str) -> bool:
         """Detect if issue is urgent"""
-        urgent_keywords = [
-            "down", "crashed", "emergency", "critical", "urgent", 
-            "production", "outage", "can't access", "not working",
-            "broken", "failed", "error", "timeout"
-        ]
-        
-        return any(keyword in user_input.lower() for keyword in urgent_keywords)
+        return self.assess_urgency(user_input)["urgent"]
     
     def ask_clarifying_question(self, intent: str) -> str:
         """Ask one clarifying question before escalating"""
@@ -263,9 +288,11 @@ class TechCorpWarpAI:
         
         return clarifying_questions["default"]
     
-    def escalate_to_human(self, issue: str) -> str:
+    def escalate_to_human(self, issue: str, urgency: Optional[Dict[str, Any]] = None) -> str:
         """Escalate to human support"""
-        if self.detect_urgency(issue):
+        if urgency is None:
+            urgency = self.assess_urgency(issue)
+        if urgency["urgent"]:
             return "⚠️ **URGENT ISSUE DETECTED**\n\nI'm escalating this to our Level 2 support team immediately. You should receive a response within 15 minutes.\n\nTicket created: #URGENT-" + datetime.now().strftime("%Y%m%d-%H%M%S")
         else:
             return "I'll escalate this to our technical support team. They'll review your case and respond within 2-4 hours.\n\nTicket created: #SUP-" + datetime.now().strftime("%Y%m%d-%H%M%S")
@@ -279,7 +306,8 @@ class TechCorpWarpAI:
                 return greeting
         
         # Check for urgent issues first
-        is_urgent = self.detect_urgency(user_input)
+        urgency = self.assess_urgency(user_input)
+        is_urgent = urgency["urgent"]
         
         # Execute knowledge base search
         kb_result = self.execute_kb_command(user_input)
@@ -304,7 +332,7 @@ class TechCorpWarpAI:
                 response += "\n\n*This will help me find the right solution or escalate appropriately.*"
             else:
                 # Already asked clarifying questions - escalate
-                response = self.escalate_to_human(user_input)
+                response = self.escalate_to_human(user_input, urgency)
         
         # Add to conversation memory
         self.add_to_memory(user_input, response)
@@ -323,5 +351,5 @@ class TechCorpWarpAI:
         
         return context
 
-# Global instance
-techcorp_ai = TechCorpWarpAI()
+# Global instance, loaded on first use
+techcorp_ai = services.lazy("techcorp_ai", TechCorpWarpAI)
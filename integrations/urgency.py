@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Urgency phrase detection shared by the support assistants
+"""
+
+import json
+import logging
+import os
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+URGENCY_KEYWORDS_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'urgency_keywords.json'
+)
+
+SEVERITY_LEVELS = ["low", "medium", "high", "critical"]
+
+
+class PhraseMatcher:
+    """
+    Aho–Corasick automaton over a fixed set of phrases.
+
+    The trie and its failure links are compiled into a full transition
+    table over the characters that occur in the phrases, so scanning a text
+    is one dictionary lookup per character whatever the number of phrases,
+    and every occurrence is found, overlapping ones included. Matching is a
+    plain substring match, like ``phrase in text``.
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        self.phrases = sorted({p for p in phrases if p})
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[str]] = [[]]
+
+        for phrase in self.phrases:
+            state = 0
+            for ch in phrase:
+                if ch not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            outputs[state].append(phrase)
+
+        # Breadth-first: a state's failure target is always complete before the state
+        alphabet = {ch for phrase in self.phrases for ch in phrase}
+        self._delta: List[Dict[str, int]] = [{} for _ in goto]
+        self._delta[0] = {ch: goto[0].get(ch, 0) for ch in alphabet}
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            delta = dict(self._delta[fail[state]])
+            for ch, child in goto[state].items():
+                fail[child] = self._delta[fail[state]][ch]
+                delta[ch] = child
+                queue.append(child)
+            self._delta[state] = delta
+        self._outputs = outputs
+
+    def find_all(self, text: str) -> List[str]:
+        """Distinct phrases occurring in the text, in the order the scan completes them"""
+        delta = self._delta
+        outputs = self._outputs
+        state = 0
+        found = {}
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                for phrase in outputs[state]:
+                    found.setdefault(phrase, None)
+        return list(found)
+
+
+class UrgencyDetector:
+    """
+    Finds urgency phrases in a message and rates the most severe one.
+
+    ``keywords`` maps a severity level to its phrases. ``assess`` scans the
+    lowercased message once and returns ``{"urgent", "severity",
+    "matches"}``; callers assess a message once and pass the result on.
+    """
+
+    def __init__(self, keywords: Dict[str, List[str]], severity_levels: List[str] = None):
+        self.severity_levels = severity_levels or SEVERITY_LEVELS
+        self.keywords = {level: [k.lower() for k in phrases] for level, phrases in keywords.items()}
+        self._rank = {level: i for i, level in enumerate(self.severity_levels)}
+        self._severity = {}
+        for level, phrases in self.keywords.items():
+            for phrase in phrases:
+                if phrase not in self._severity or self._level_rank(level) > self._level_rank(self._severity[phrase]):
+                    self._severity[phrase] = level
+        self.matcher = PhraseMatcher(self._severity)
+
+    def _level_rank(self, level: str) -> int:
+        return self._rank.get(level, -1)
+
+    def assess(self, text: str) -> Dict[str, Any]:
+        """Matched phrases and the highest severity among them"""
+        matches = self.matcher.find_all(text.lower())
+        severity = max((self._severity[m] for m in matches), key=self._level_rank, default=None)
+        return {"urgent": bool(matches), "severity": severity, "matches": matches}
+
+
+def load_urgency_detector(profile: str, default: Dict[str, List[str]],
+                          keywords_file: Optional[str] = None) -> UrgencyDetector:
+    """
+    Detector for a keyword profile of the keywords file.
+
+    The file is URGENCY_KEYWORDS_FILE, or data/urgency_keywords.json; if it
+    cannot be read or lacks the profile, ``default`` is used.
+    """
+    path = keywords_file or os.getenv("URGENCY_KEYWORDS_FILE") or URGENCY_KEYWORDS_FILE
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return UrgencyDetector(config["profiles"][profile], config.get("severity_levels"))
+    except Exception as e:
+        logger.error(f"Error loading urgency keywords '{profile}' from {path}, using defaults: {e}")
+        return UrgencyDetector(default)
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Local dense-vector retrieval over the support knowledge bases
+"""
+
+import hashlib
+import json
+import logging
+import os
+from functools import lru_cache
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from kb_journal import read_knowledge_base
+from search_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=200000)
+def _feature_hash(feature: str) -> int:
+    """Stable 64-bit hash of a feature (Python's hash() is salted per process)"""
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class HashedNgramEmbedder:
+    """
+    Deterministic offline embedder using feature hashing.
+
+    Each word token and its character n-grams are hashed into a fixed number
+    of signed buckets and the result is L2-normalised, so cosine similarity
+    reduces to a dot product. Any object with ``dim``, ``signature`` and
+    ``embed(texts)`` can be used in its place.
+    """
+
+    def __init__(self, dim: int = 512, ngram_sizes=(3, 4), word_weight: float = 2.0):
+        self.dim = dim
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.word_weight = word_weight
+        self.signature = f"hashed-ngram-v1:{dim}:{','.join(map(str, self.ngram_sizes))}:{word_weight}"
+
+    def _features(self, text: str):
+        for token in tokenize(text):
+            yield token, self.word_weight
+            padded = f"<{token}>"
+            for n in self.ngram_sizes:
+                for i in range(len(padded) - n + 1):
+                    yield padded[i:i + n], 1.0
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into an (n, dim) float32 matrix of unit vectors"""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                h = _feature_hash(feature)
+                sign = 1.0 if h >> 63 else -1.0
+                vectors[row, h % self.dim] += sign * weight
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+def kb_documents(knowledge_base: Dict[str, Dict], source: str) -> List[Dict[str, Any]]:
+    """Turn knowledge base entries into documents for the vector index"""
+    documents = []
+    for kb_id, entry in knowledge_base.items():
+        error_patterns = entry.get("troubleshooting", {}).get("error_patterns", [])
+        documents.append({
+            "id": kb_id,
+            "source": source,
+            "category": entry.get("category", "general"),
+            "text": " ".join([entry.get("title", ""), " ".join(entry.get("tags", [])),
+                              " ".join(error_patterns), " ".join(entry.get("solution", []))]),
+            "answer": entry.get("title", "")
+        })
+    return documents
+
+
+def build_support_corpus(data_dir: str = "data") -> List[Dict[str, Any]]:
+    """Collect FAQ and knowledge base entries as documents for the vector index"""
+    documents = []
+
+    faq_file = os.path.join(data_dir, "faq-knowledge-base.json")
+    if os.path.exists(faq_file):
+        with open(faq_file, 'r', encoding='utf-8') as f:
+            for faq in json.load(f).get("faqs", []):
+                documents.append({
+                    "id": faq["id"],
+                    "source": "faq",
+                    "category": faq.get("category", "general"),
+                    "text": " ".join([faq.get("question", ""), " ".join(faq.get("keywords", [])), faq.get("answer", "")]),
+                    "answer": faq.get("answer", "")
+                })
+
+    for source, file_name in (("warpgpt_kb", "warpgpt_kb.json"), ("techcorp_kb", "techcorp_kb.json")):
+        knowledge_base = read_knowledge_base(os.path.join(data_dir, file_name))
+        if knowledge_base is not None:
+            documents.extend(kb_documents(knowledge_base, source))
+
+    return documents
+
+
+class VectorIndex:
+    """
+    Top-k cosine retrieval over a memory-mapped float32 embedding matrix.
+
+    The matrix is written once to ``<index_dir>/<name>.npy`` and reopened with
+    ``mmap_mode='r'``; it is rebuilt only when the documents or the embedder
+    change. A query is a single matrix product followed by ``argpartition``.
+    """
+
+    FILTER_KEYS = ("id", "source", "category")
+
+    def __init__(self, index_dir: str = "data/vector_index", name: str = "support", embedder=None):
+        self.index_dir = index_dir
+        self.name = name
+        self.embedder = embedder or HashedNgramEmbedder()
+        self.matrix_file = os.path.join(index_dir, f"{name}.npy")
+        self.meta_file = os.path.join(index_dir, f"{name}.json")
+
+        self.documents: List[Dict[str, Any]] = []
+        self.matrix: Optional[np.ndarray] = None
+        self._columns: Dict[str, np.ndarray] = {}
+        self._mask_cache: Dict[tuple, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def _fingerprint(self, documents: List[Dict[str, Any]]) -> str:
+        digest = hashlib.sha1(self.embedder.signature.encode('utf-8'))
+        digest.update(json.dumps(documents, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        return digest.hexdigest()
+
+    def open(self, documents: List[Dict[str, Any]]):
+        """Map the persisted index for these documents, rebuilding it if stale"""
+        fingerprint = self._fingerprint(documents)
+
+        if os.path.exists(self.meta_file) and os.path.exists(self.matrix_file):
+            try:
+                with open(self.meta_file, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                if meta.get("fingerprint") == fingerprint:
+                    self._attach(meta["documents"])
+                    return
+            except Exception as e:
+                logger.error(f"Error loading vector index: {e}")
+
+        self.build(documents, fingerprint)
+
+    def build(self, documents: List[Dict[str, Any]], fingerprint: str = None):
+        """Embed the documents and persist the matrix and metadata"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        fingerprint = fingerprint or self._fingerprint(documents)
+
+        vectors = self.embedder.embed([doc["text"] for doc in documents])
+        tmp_matrix = self.matrix_file + ".tmp.npy"
+        np.save(tmp_matrix, np.ascontiguousarray(vectors, dtype=np.float32))
+        os.replace(tmp_matrix, self.matrix_file)
+
+        tmp_meta = self.meta_file + ".tmp"
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump({"fingerprint": fingerprint, "documents": documents}, f, ensure_ascii=False)
+        os.replace(tmp_meta, self.meta_file)
+
+        logger.info(f"Built vector index '{self.name}' with {len(documents)} documents")
+        self._attach(documents)
+
+    def _attach(self, documents: List[Dict[str, Any]]):
+        self.documents = documents
+        self.matrix = np.load(self.matrix_file, mmap_mode='r')
+        self._columns = {
+            key: np.array([doc.get(key) for doc in documents], dtype=object)
+            for key in self.FILTER_KEYS
+        }
+        self._mask_cache = {}
+
+    def _filter_mask(self, filters: Optional[Dict[str, str]]) -> Optional[np.ndarray]:
+        if not filters:
+            return None
+
+        cache_key = tuple(sorted(filters.items()))
+        mask = self._mask_cache.get(cache_key)
+        if mask is None:
+            mask = np.ones(len(self.documents), dtype=bool)
+            for key, value in filters.items():
+                column = self._columns.get(key)
+                if column is None:
+                    mask[:] = False
+                    break
+                mask &= column == value
+            self._mask_cache[cache_key] = mask
+        return mask
+
+    def search(self, query: str, k: int = 5, filters: Dict[str, str] = None,
+               minimum_confidence: float = 0.0) -> List[Dict[str, Any]]:
+        """Return the top-k documents for one query"""
+        return self.search_batch([query], k, filters, minimum_confidence)[0]
+
+    def search_batch(self, queries: List[str], k: int = 5, filters: Dict[str, str] = None,
+                     minimum_confidence: float = 0.0) -> List[List[Dict[str, Any]]]:
+        """Return the top-k documents for each query"""
+        if self.matrix is None or not len(self.documents) or not queries:
+            return [[] for _ in queries]
+
+        query_vectors = self.embedder.embed(queries)
+        scores = self.matrix @ query_vectors.T  # (documents, queries)
+
+        mask = self._filter_mask(filters)
+        if mask is not None:
+            scores[~mask] = -np.inf
+
+        k = min(k, len(self.documents))
+        top = np.argpartition(-scores, k - 1, axis=0)[:k]
+
+        batch = []
+        for column in range(len(queries)):
+            candidates = top[:, column]
+            candidate_scores = scores[candidates, column]
+            order = np.argsort(-candidate_scores)
+
+            matches = []
+            for i in order:
+                score = float(candidate_scores[i])
+                if not np.isfinite(score) or score < minimum_confidence:
+                    continue
+                doc = self.documents[candidates[i]]
+                matches.append({
+                    "id": doc["id"],
+                    "source": doc["source"],
+                    "category": doc["category"],
+                    "score": score,
+                    "answer": doc["answer"]
+                })
+            batch.append(matches)
+
+        return batch
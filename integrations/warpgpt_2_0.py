@@ -4,17 +4,36 @@ TechCorp WarpGPT 2.0 - Production-Grade Warp AI Assistant
 Non-negotiable protocols with circuit breaker and hybrid search
 """
 
+import heapq
 import json
 import logging
 import os
 import re
 import subprocess
+import threading
 import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, TYPE_CHECKING
+
+from kb_snapshot import KBSnapshot, SnapshotKnowledgeBase
+from response_cache import ResponseCache
+from search_index import InvertedIndex, TOKEN_PATTERN, tokenize
+from service_registry import services
+from urgency import load_urgency_detector
+
+if TYPE_CHECKING:
+    from vector_store import VectorIndex
 
 logger = logging.getLogger(__name__)
 
+
+COMMAND_PATTERN = re.compile(r'`([^`]+)`')
+
+
+def _normalize_phrase(text: str) -> str:
+    """Lowercase text and collapse it to space-separated tokens"""
+    return " ".join(TOKEN_PATTERN.findall(text.lower()))
+
 class WarpContext:
     """Warp CLI context manager"""
     
@@ -34,7 +53,37 @@ class WarpContext:
         """Format command for Warp terminal display"""
         return f"```warp-terminal\n$ {command}\n```"
 
-class HybridKnowledgeBase:
+def _split_command(step: str) -> Optional[Tuple[str, str]]:
+    """(description, command) for a step with a `command` in backticks"""
+    if step.count("`") < 2:
+        return None
+    command_match = COMMAND_PATTERN.search(step)
+    if not command_match:
+        return None
+    command = command_match.group(1)
+    return step.replace(f"`{command}`", "").strip(": "), command
+
+def render_solution_steps(steps: List[str]) -> Tuple[str, str]:
+    """Step lists of the verified and the medium-confidence answer formats"""
+    verified = []
+    potential = []
+    for i, step in enumerate(steps, 1):
+        split = _split_command(step)
+        if split:
+            description, terminal = split[0], WarpContext.format_warp_terminal(split[1])
+            potential.append(f"   • {description}\n     {terminal}\n")
+        else:
+            potential.append(f"   • {step}\n")
+        
+        if step.startswith("⚠️"):
+            verified.append(f"   {step}\n")
+        elif split:
+            verified.append(f"   • Step {i}: {description}\n     {terminal}\n")
+        else:
+            verified.append(f"   • Step {i}: {step}\n")
+    return "".join(verified), "".join(potential)
+
+class HybridKnowledgeBase(SnapshotKnowledgeBase):
     """Advanced knowledge base with hybrid search and confidence scoring"""
     
     def __init__(self, data_dir: str = "data"):
@@ -44,7 +93,22 @@ class HybridKnowledgeBase:
         self.verified_threshold = 0.9
         
         os.makedirs(data_dir, exist_ok=True)
-        self.knowledge_base = {}
+        self._dense_in_use = False  # Set by the first dense search, later versions then get their index up front
+        self._vector_lock = threading.Lock()  # One build at a time writes the index files
+        # Per-entry maps of each version: error_phrases, rendered_steps (kb_id -> (entry, verified, potential))
+        super().__init__()
+        
+        # Fused retrieval settings: trade latency (candidates) against recall
+        self.fusion_settings = {
+            "method": "rrf",            # "rrf" (reciprocal rank) or "weighted" (normalized scores)
+            "lexical_weight": 0.5,
+            "dense_weight": 0.5,
+            "lexical_candidates": 20,
+            "dense_candidates": 20,
+            "dense_min_score": 0.2,     # Cosine below this is treated as no match
+            "rrf_k": 60,
+            "full_match_score": 0.6     # Calibrated match score that earns the entry's full confidence
+        }
         self.load_knowledge_base()
     
     def load_knowledge_base(self):
@@ -52,13 +116,13 @@ class HybridKnowledgeBase:
         if os.path.exists(self.kb_file):
             try:
                 with open(self.kb_file, 'r', encoding='utf-8') as f:
-                    self.knowledge_base = json.load(f)
+                    knowledge_base = json.load(f)
             except Exception as e:
                 logger.error(f"Error loading knowledge base: {e}")
-                self.knowledge_base = {}
+                knowledge_base = {}
         else:
             # Initialize with verified production solutions
-            self.knowledge_base = {
+            knowledge_base = {
                 "vpn-001": {
                     "title": "VPN Connection Failures",
                     "category": "network",
@@ -150,81 +214,246 @@ class HybridKnowledgeBase:
                     }
                 }
             }
+        
+        self.rebuild_index(knowledge_base)
+        if not os.path.exists(self.kb_file):
             self.save_knowledge_base()
+        self.mark_files_read()
+    
+    def watched_files(self) -> List[str]:
+        return [self.kb_file]
+    
+    def _read_entries(self) -> Dict[str, Dict[str, Any]]:
+        with open(self.kb_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    @staticmethod
+    def _new_index() -> InvertedIndex:
+        return InvertedIndex({"title": 2.0, "tags": 2.0, "solution": 1.0, "error_patterns": 1.5})
     
     def save_knowledge_base(self):
         """Save knowledge base to file"""
         try:
-            with open(self.kb_file, 'w', encoding='utf-8') as f:
+            # Replaced atomically so a watching process never reads half a file
+            tmp_file = self.kb_file + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
                 json.dump(self.knowledge_base, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_file, self.kb_file)
         except Exception as e:
             logger.error(f"Error saving knowledge base: {e}")
     
-    def hybrid_search(self, query: str, context: Dict[str, Any], limit: int = 5) -> Tuple[List[Dict], float]:
-        """Hybrid search with semantic and keyword matching"""
-        query_lower = query.lower()
+    def _persist(self, snapshot: KBSnapshot, upserts: Dict[str, Dict[str, Any]], deletes: List[str]):
+        self.save_knowledge_base()
+    
+    @staticmethod
+    def _derive(kb_id: str, entry: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Indexed fields and per-entry maps of a single entry"""
+        error_patterns = entry.get("troubleshooting", {}).get("error_patterns", [])
+        fields = {
+            "title": entry.get("title", ""),
+            "tags": entry.get("tags", []),
+            "solution": entry.get("solution", []),
+            "error_patterns": error_patterns
+        }
+        return fields, {
+            "error_phrases": [_normalize_phrase(pattern) for pattern in error_patterns],
+            "rendered_steps": (entry, *render_solution_steps(entry.get("solution", [])))
+        }
+    
+    def get_rendered_steps(self, kb_id: str, entry: Dict[str, Any]) -> Tuple[str, str]:
+        """Pre-rendered step lists of an entry, rendered now if it is not the indexed version"""
+        rendered = self.snapshot.derived.get("rendered_steps", {}).get(kb_id)
+        if rendered is not None and rendered[0] is entry:
+            return rendered[1], rendered[2]
+        return render_solution_steps(entry.get("solution", []))
+    
+    def hybrid_search(self, query: str, context: Dict[str, Any], limit: int = 5,
+                      snapshot: Optional[KBSnapshot] = None) -> Tuple[List[Dict], float]:
+        """Hybrid search with BM25 keyword ranking and error pattern matching"""
+        snapshot = snapshot or self.snapshot
+        error_phrases_by_id = snapshot.derived.get("error_phrases", {})
+        matches = snapshot.index.search(query)
+        if not matches:
+            return [], 0.0
+        
+        query_phrase = f" {_normalize_phrase(query)} "
+        top_score = matches[0][1]
         results = []
         
-        for kb_id, entry in self.knowledge_base.items():
-            score = 0.0
-            
-            # Keyword matching in title and tags
-            search_text = (
-                entry.get("title", "").lower() + " " +
-                " ".join(entry.get("tags", [])) + " " +
-                " ".join(entry.get("solution", []))
-            ).lower()
-            
-            query_words = query_lower.split()
-            keyword_matches = sum(1 for word in query_words if word in search_text)
+        for kb_id, bm25_score in matches:
+            entry = snapshot.entries[kb_id]
             
-            # Error pattern matching
-            troubleshooting = entry.get("troubleshooting", {})
-            error_patterns = troubleshooting.get("error_patterns", [])
-            pattern_matches = sum(1 for pattern in error_patterns if pattern in query_lower)
+            # Error pattern matching on whole tokens
+            error_phrases = error_phrases_by_id.get(kb_id, [])
+            pattern_matches = sum(1 for phrase in error_phrases if phrase and f" {phrase} " in query_phrase)
             
             # Calculate composite score
-            keyword_score = (keyword_matches / len(query_words)) if query_words else 0
-            pattern_score = (pattern_matches / len(error_patterns)) if error_patterns else 0
+            keyword_score = bm25_score / top_score if top_score else 0
+            pattern_score = (pattern_matches / len(error_phrases)) if error_phrases else 0
             base_confidence = entry.get("confidence", 0.5)
             
             # Weighted scoring
             score = (keyword_score * 0.4) + (pattern_score * 0.4) + (base_confidence * 0.2)
             
-            if score > 0:
-                results.append({
-                    "id": kb_id,
-                    "score": score,
-                    "confidence": base_confidence,
-                    "entry": entry
-                })
+            results.append({
+                "id": kb_id,
+                "score": score,
+                "confidence": base_confidence,
+                "entry": entry
+            })
         
-        # Sort by score and limit results
-        results.sort(key=lambda x: x["score"], reverse=True)
-        limited_results = results[:limit]
+        # Keep the best results without sorting every candidate
+        limited_results = heapq.nlargest(limit, results, key=lambda x: x["score"])
         
         # Calculate overall confidence
         overall_confidence = max([r["confidence"] for r in limited_results]) if limited_results else 0.0
         
         return limited_results, overall_confidence
 
+    def get_vector_index(self, snapshot: Optional[KBSnapshot] = None) -> "VectorIndex":
+        """Open the dense index for the current entries, rebuilding it if they changed
+        
+        Only the first dense search builds it on the request path; from then
+        on every new version gets its index before it is published.
+        """
+        snapshot = snapshot or self.snapshot
+        self._dense_in_use = True
+        if snapshot.vector_index is None:
+            # numpy is only imported once dense search is actually used
+            from vector_store import VectorIndex, kb_documents
+            with self._vector_lock:
+                if snapshot.vector_index is None:
+                    index = VectorIndex(os.path.join(self.data_dir, "vector_index"), name="warpgpt_kb")
+                    index.open(kb_documents(snapshot.entries, "warpgpt_kb"))
+                    snapshot.vector_index = index
+        return snapshot.vector_index
+    
+    def _prepare(self, snapshot: KBSnapshot):
+        """Embed a new version on the writer or watcher thread rather than in the next fused query"""
+        if not self._dense_in_use:
+            return
+        try:
+            self.get_vector_index(snapshot)
+        except Exception as e:
+            # The next fused query retries the build
+            logger.error(f"Error building vector index for knowledge base version {snapshot.version}: {e}")
+    
+    def fused_search(self, query: str, context: Dict[str, Any], limit: int = 5,
+                     snapshot: Optional[KBSnapshot] = None, **settings) -> Tuple[List[Dict], float]:
+        """Run lexical and dense retrieval side by side and fuse the rankings
+        
+        Keyword arguments override ``fusion_settings`` for this call. The
+        fused score only orders the results: ranks and top-normalized scores
+        say nothing about how good the best match is. Each result's
+        confidence is instead the entry's own confidence scaled by its match
+        score, the weighted geometric mean of the share of the query it
+        covers (idf-weighted) and its cosine similarity, so an entry only one
+        retriever vouches for stays low. The overall confidence is that of
+        the best result.
+        """
+        snapshot = snapshot or self.snapshot
+        options = {**self.fusion_settings, **settings}
+        lexical_weight = options["lexical_weight"]
+        dense_weight = options["dense_weight"]
+        total_weight = (lexical_weight + dense_weight) or 1.0
+        
+        lexical = snapshot.index.search(query, limit=options["lexical_candidates"])
+        dense = [
+            (match["id"], match["score"])
+            for match in self.get_vector_index(snapshot).search(
+                query, k=options["dense_candidates"], minimum_confidence=options["dense_min_score"]
+            )
+        ]
+        
+        fused = {}
+        if options["method"] == "weighted":
+            top_lexical = lexical[0][1] if lexical else 0.0
+            for kb_id, score in lexical:
+                fused.setdefault(kb_id, [0.0, 0.0, 0.0])[1] = score / top_lexical
+            for kb_id, score in dense:
+                fused.setdefault(kb_id, [0.0, 0.0, 0.0])[2] = score
+            for scores in fused.values():
+                scores[0] = (lexical_weight * scores[1] + dense_weight * scores[2]) / total_weight
+        elif options["method"] == "rrf":
+            rrf_k = options["rrf_k"]
+            best = total_weight / (rrf_k + 1)  # Ranked first by every retriever
+            for weight, ranking, slot in ((lexical_weight, lexical, 1), (dense_weight, dense, 2)):
+                for rank, (kb_id, score) in enumerate(ranking, 1):
+                    scores = fused.setdefault(kb_id, [0.0, 0.0, 0.0])
+                    scores[0] += weight / (rrf_k + rank) / best
+                    scores[slot] = score
+        else:
+            raise ValueError(f"Unknown fusion method: {options['method']}")
+        
+        terms = tokenize(query)
+        results = []
+        for kb_id, scores in fused.items():
+            entry = snapshot.entries.get(kb_id)
+            if entry is None:
+                continue
+            coverage = snapshot.index.coverage(kb_id, terms)
+            match = coverage ** (lexical_weight / total_weight) * max(0.0, scores[2]) ** (dense_weight / total_weight)
+            results.append({
+                "id": kb_id,
+                "score": scores[0],
+                "confidence": entry.get("confidence", 0.5) * min(1.0, match / options["full_match_score"]),
+                "lexical_score": scores[1],
+                "dense_score": scores[2],
+                "entry": entry
+            })
+        # Ties (e.g. swapped ranks under RRF) go to the stronger lexical match
+        limited_results = heapq.nlargest(limit, results, key=lambda x: (x["score"], x["lexical_score"]))
+        overall_confidence = limited_results[0]["confidence"] if limited_results else 0.0
+        
+        return limited_results, overall_confidence
+
 class WarpGPT2:
     """TechCorp WarpGPT 2.0 - Production-Grade AI Assistant"""
     
-    def __init__(self):
-        self.kb = HybridKnowledgeBase()
+    RETRIEVAL_MODES = ("keyword", "fused")
+    
+    # Used when data/urgency_keywords.json has no "warpgpt" profile
+    URGENT_KEYWORDS = {
+        "critical": [
+            "production down", "service unavailable", "critical error",
+            "outage", "emergency", "urgent", "crashed", "not responding",
+            "database down", "api down", "website down"
+        ]
+    }
+    
+    def __init__(self, retrieval_mode: str = None, data_dir: str = "data", cache_size: int = None,
+                 cache_ttl: float = None):
+        self.kb = HybridKnowledgeBase(data_dir)
+        self.retrieval_mode = retrieval_mode or os.getenv("WARPGPT_RETRIEVAL_MODE", "keyword")
+        if self.retrieval_mode not in self.RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {self.retrieval_mode}")
         self.warp_context = WarpContext()
         self.conversation_memory = []
         self.confidence_threshold = 0.7
         self.verified_threshold = 0.9
+        self.urgency = load_urgency_detector("warpgpt", self.URGENT_KEYWORDS)
+        
+        # Formatted answers by normalized query; cleared when the KB changes
+        self.response_cache = ResponseCache(
+            max_entries=cache_size if cache_size is not None else int(os.getenv("WARPGPT_CACHE_SIZE", 1024)),
+            ttl_seconds=cache_ttl if cache_ttl is not None else float(os.getenv("WARPGPT_CACHE_TTL_SECONDS", 300))
+        )
+        self._cached_kb_version = self.kb.version
+    
+    def _search(self, user_input: str, context: Dict[str, Any],
+                snapshot: Optional[KBSnapshot] = None) -> Tuple[List[Dict], float]:
+        if self.retrieval_mode == "fused":
+            results, confidence = self.kb.fused_search(user_input, context, limit=5, snapshot=snapshot)
+        else:
+            results, confidence = self.kb.hybrid_search(user_input, context, limit=5, snapshot=snapshot)
+        logger.info(f"KB search executed: {len(results)} results, confidence: {confidence:.2f}")
+        return results, confidence
     
     def execute_kb_search(self, user_input: str, context: Dict[str, Any]) -> Tuple[List[Dict], float]:
         """Execute hybrid KB search with context"""
         try:
             # Silent execution as per protocol
-            results, confidence = self.kb.hybrid_search(user_input, context, limit=5)
-            logger.info(f"KB search executed: {len(results)} results, confidence: {confidence:.2f}")
-            return results, confidence
+            return self._search(user_input, context)
         except Exception as e:
             logger.error(f"KB search failed: {e}")
             return [], 0.0
@@ -233,28 +462,25 @@ class WarpGPT2:
         """Format verified solution response"""
         entry = result["entry"]
         kb_id = result["id"]
+        steps, _ = self.kb.get_rendered_steps(kb_id, entry)
         
-        response = f"✅ TechCorp Verified Fix (v{kb_version}):\n"
-        response += f"📋 Solution #{kb_id.upper()}: {entry['title']}\n\n"
-        
-        for i, step in enumerate(entry["solution"], 1):
-            if step.startswith("⚠️"):
-                response += f"   {step}\n"
-            elif "`" in step and step.count("`") >= 2:
-                # Extract command from step
-                command_match = re.search(r'`([^`]+)`', step)
-                if command_match:
-                    command = command_match.group(1)
-                    description = step.replace(f"`{command}`", "").strip(": ")
-                    response += f"   • Step {i}: {description}\n"
-                    response += f"     {self.warp_context.format_warp_terminal(command)}\n"
-                else:
-                    response += f"   • Step {i}: {step}\n"
-            else:
-                response += f"   • Step {i}: {step}\n"
+        return (
+            f"✅ TechCorp Verified Fix (v{kb_version}):\n"
+            f"📋 Solution #{kb_id.upper()}: {entry['title']}\n\n"
+            f"{steps}"
+            f"\n📌 Confidence: {result['confidence']:.1%} | Category: {entry['category']}"
+        )
+    
+    def format_potential_solution(self, result: Dict, confidence: float) -> str:
+        """Format medium-confidence solution response"""
+        _, steps = self.kb.get_rendered_steps(result["id"], result["entry"])
         
-        response += f"\n📌 Confidence: {result['confidence']:.1%} | Category: {entry['category']}"
-        return response
+        return (
+            f"🔍 Potential Solution (Confidence: {confidence:.1%}):\n"
+            f"From TechCorp KB (#{result['id']}):\n\n"
+            f"{steps}"
+            "\n⚠️ Please verify this solution in a test environment first."
+        )
     
     def format_uncertain_response(self) -> str:
         """Format response when confidence is below threshold"""
@@ -265,17 +491,18 @@ class WarpGPT2:
            
 Use `techcorp-cli diagnostics --full` to gather system info."""
     
+    def assess_urgency(self, user_input: str) -> Dict[str, Any]:
+        """Urgency phrases found in the request and their severity"""
+        return self.urgency.assess(user_input)
+    
     def detect_urgent_issue(self, user_input: str) -> bool:
         """Detect production-critical issues"""
-        critical_keywords = [
-            "production down", "service unavailable", "critical error",
-            "outage", "emergency", "urgent", "crashed", "not responding",
-            "database down", "api down", "website down"
-        ]
-        return any(keyword in user_input.lower() for keyword in critical_keywords)
+        return self.assess_urgency(user_input)["urgent"]
     
-    def escalate_critical_issue(self, user_input: str) -> str:
+    def escalate_critical_issue(self, user_input: str, urgency: Optional[Dict[str, Any]] = None) -> str:
         """Escalate critical production issues"""
+        if urgency is not None:
+            logger.warning(f"Escalating {urgency['severity']} issue, matched: {', '.join(urgency['matches'])}")
         ticket_id = f"CRITICAL-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
         
         return f"""🚨 **CRITICAL ISSUE DETECTED** 🚨
@@ -293,15 +520,40 @@ Automated diagnostics initiated:
         """Process user request with WarpGPT 2.0 protocols"""
         
         # Check for critical issues first
-        if self.detect_urgent_issue(user_input):
-            return self.escalate_critical_issue(user_input)
+        urgency = self.assess_urgency(user_input)
+        if urgency["urgent"]:
+            return self.escalate_critical_issue(user_input, urgency)
         
-        # Get Warp context
-        context = self.warp_context.get_context()
+        # One KB version for the whole request, even if a new one is published meanwhile
+        snapshot = self.kb.snapshot
         
-        # FIRST ACTION: Execute hybrid KB search silently
-        results, confidence = self.execute_kb_search(user_input, context)
+        # Answers only depend on the query tokens and the KB contents
+        if snapshot.version != self._cached_kb_version:
+            self.response_cache.clear()
+            self._cached_kb_version = snapshot.version
+        cache_key = self._cache_key(user_input, snapshot.version)
+        response = self.response_cache.get(cache_key)
+        if response is not None:
+            return response
+        
+        # FIRST ACTION: Execute hybrid KB search silently (the Warp context is not used for ranking)
+        try:
+            results, confidence = self._search(user_input, {}, snapshot)
+        except Exception as e:
+            logger.error(f"KB search failed: {e}")
+            return self.format_uncertain_response()
         
+        response = self.build_response(results, confidence)
+        self.response_cache.put(cache_key, response)
+        return response
+    
+    def _cache_key(self, user_input: str, kb_version: int) -> tuple:
+        settings = tuple(sorted(self.kb.fusion_settings.items())) if self.retrieval_mode == "fused" else ()
+        return (_normalize_phrase(user_input), kb_version, self.retrieval_mode,
+                self.confidence_threshold, self.verified_threshold, settings)
+    
+    def build_response(self, results: List[Dict], confidence: float) -> str:
+        """Format the answer for a KB search outcome"""
         # Circuit breaker logic
         if not results or confidence < self.confidence_threshold:
             # Never show uncertain answers
@@ -315,38 +567,22 @@ Automated diagnostics initiated:
         
         else:
             # Medium confidence - provide solution with caveats
-            best_result = results[0]
-            entry = best_result["entry"]
-            
-            response = f"🔍 Potential Solution (Confidence: {confidence:.1%}):\n"
-            response += f"From TechCorp KB (#{best_result['id']}):\n\n"
-            
-            for i, step in enumerate(entry["solution"], 1):
-                if "`" in step and step.count("`") >= 2:
-                    command_match = re.search(r'`([^`]+)`', step)
-                    if command_match:
-                        command = command_match.group(1)
-                        description = step.replace(f"`{command}`", "").strip(": ")
-                        response += f"   • {description}\n"
-                        response += f"     {self.warp_context.format_warp_terminal(command)}\n"
-                    else:
-                        response += f"   • {step}\n"
-                else:
-                    response += f"   • {step}\n"
-            
-            response += "\n⚠️ Please verify this solution in a test environment first."
-            return response
+            return self.format_potential_solution(results[0], confidence)
     
     def get_system_status(self) -> Dict[str, Any]:
         """Get WarpGPT system status"""
         return {
             "version": "2.0.0",
             "kb_entries": len(self.kb.knowledge_base),
+            "retrieval_mode": self.retrieval_mode,
             "confidence_threshold": self.confidence_threshold,
             "verified_threshold": self.verified_threshold,
             "context": self.warp_context.get_context(),
-            "memory_size": len(self.conversation_memory)
+            "memory_size": len(self.conversation_memory),
+            "kb_version": self.kb.version,
+            "kb_reload": dict(self.kb.reload_stats),
+            "response_cache": self.response_cache.get_stats()
         }
 
-# Global WarpGPT 2.0 instance
-warpgpt = WarpGPT2()
+# Global WarpGPT 2.0 instance, loaded on first use
+warpgpt = services.lazy("warpgpt", WarpGPT2)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Write-behind persistence for append-only JSON record files
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Any
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindList(ABC):
+    """
+    An in-memory record list whose appends are persisted by a background thread.
+
+    ``append`` only adds the record to memory and returns; the flusher thread
+    persists pending records once ``batch_size`` are pending or
+    ``flush_interval`` seconds have passed since the first pending record.
+    Pending records are flushed on ``close()``, which is also registered with
+    ``atexit``. Subclasses implement ``_read`` and ``_write``.
+    """
+
+    def __init__(self, name: str, batch_size: int = 50, flush_interval: float = 1.0):
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.records: List[Dict[str, Any]] = []
+        self.pending = 0
+        self.flush_count = 0
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+
+        self.load()
+
+        self._thread = threading.Thread(target=self._run, name=f"write-behind:{name}", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @abstractmethod
+    def _read(self) -> List[Dict[str, Any]]:
+        """Return the persisted records"""
+
+    @abstractmethod
+    def _write(self, records: List[Dict[str, Any]], new_records: List[Dict[str, Any]]):
+        """Persist a flush; ``records`` is the full list, ``new_records`` its unpersisted tail"""
+
+    @abstractmethod
+    def _update(self, records: List[Dict[str, Any]], changed: Dict[int, Dict[str, Any]]):
+        """Persist replaced records; ``records`` are the persisted ones, ``changed`` maps positions among them"""
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Reload the persisted records, flushing pending ones first so none are lost"""
+        with self._write_lock:
+            self._flush()
+            records = self._read()
+            with self._lock:
+                # Records appended while reading are kept, still pending
+                records.extend(self.records[len(self.records) - self.pending:])
+                self.records = records
+        return records
+
+    def append(self, record: Dict[str, Any]):
+        """Add a record; it is persisted by the next flush"""
+        with self._lock:
+            self.records.append(record)
+            self.pending += 1
+            pending = self.pending
+
+        if pending == 1 or pending >= self.batch_size:
+            self._wakeup.set()
+
+    def update(self, changes: Dict[int, Dict[str, Any]]):
+        """Replace records by position and persist them now
+
+        Records still waiting for a flush are only replaced in memory; the
+        next flush writes their new version.
+        """
+        if not changes:
+            return
+        with self._write_lock:
+            with self._lock:
+                for position, record in changes.items():
+                    self.records[position] = record
+                snapshot = list(self.records)
+                persisted = len(snapshot) - self.pending
+
+            changed = {position: record for position, record in changes.items() if position < persisted}
+            if changed:
+                self._update(snapshot[:persisted], changed)
+
+    def flush(self):
+        """Persist all pending records now"""
+        with self._write_lock:
+            self._flush()
+
+    def _flush(self):
+        # Called with the write lock held
+        with self._lock:
+            if not self.pending:
+                return
+            snapshot = list(self.records)
+            new_records = snapshot[len(snapshot) - self.pending:]
+            self.pending = 0
+
+        self._write(snapshot, new_records)
+        self.flush_count += 1
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._closed:
+                break
+
+            # Give the batch time to fill unless it is already full
+            deadline = time.monotonic() + self.flush_interval
+            while self.pending < self.batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._wakeup.wait(remaining)
+                self._wakeup.clear()
+
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing {self.name}: {e}")
+
+    def close(self):
+        """Stop the flusher thread and persist anything still pending"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Error flushing {self.name} on shutdown: {e}")
+        atexit.unregister(self.close)
+
+
+def read_json_records(path: str) -> List[Dict[str, Any]]:
+    """Records of a WriteBehindJSONList file, JSON Lines or a legacy JSON list"""
+    return _parse_records(path)[0]
+
+
+def _parse_records(path: str):
+    """(records, whether the file must be rewritten before appending to it)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except FileNotFoundError:
+        return [], False
+
+    if content.lstrip().startswith("["):
+        return json.loads(content), True
+
+    records = []
+    lines = content.split("\n")
+    for number, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            if number < len(lines) - 1:
+                raise
+            # A torn final line left by a crash; dropped by the next rewrite
+            logger.warning(f"Skipping incomplete last record in {path}")
+            return records, True
+    return records, bool(content) and not content.endswith("\n")
+
+
+class WriteBehindJSONList(WriteBehindList):
+    """
+    A JSON Lines file persisted by a write-behind thread.
+
+    A flush appends only the new records, so its cost does not grow with the
+    history. Replacing records (``update``), a torn last line or a file still
+    in the old single JSON list layout rewrites the whole file once, through
+    a temporary file that is fsynced and atomically renamed.
+    """
+
+    def __init__(self, path: str, batch_size: int = 50, flush_interval: float = 1.0, fsync: bool = True):
+        self.path = path
+        self.fsync = fsync
+        self._rewrite = False
+        super().__init__(os.path.basename(path), batch_size, flush_interval)
+
+    def _read(self) -> List[Dict[str, Any]]:
+        records, self._rewrite = _parse_records(self.path)
+        return records
+
+    def _write(self, records: List[Dict[str, Any]], new_records: List[Dict[str, Any]]):
+        if self._rewrite:
+            self._rewrite_file(records)
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in new_records))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def _update(self, records: List[Dict[str, Any]], changed: Dict[int, Dict[str, Any]]):
+        # Lines cannot be replaced in place
+        self._rewrite_file(records)
+
+    def _rewrite_file(self, records: List[Dict[str, Any]]):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._rewrite = False
@@ -0,0 +1,45 @@
+"""
+Tests for the ASGI serving mode.
+"""
+
+import asyncio
+
+import httpx
+
+import asgi_app
+from asgi_app import app
+
+
+def run_requests(*requests):
+    async def send():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await asyncio.gather(*(client.request(method, url, **kwargs) for method, url, kwargs in requests))
+    return asyncio.run(send())
+
+
+def test_chat_matches_the_flask_response():
+    payload = {'session_id': 'asgi-test', 'collect_data': True, 'user_data': {'name': 'Ada'}}
+    response, stats = run_requests(('POST', '/chat', {'json': payload}), ('GET', '/session-stats', {}))
+
+    assert response.status_code == 200
+    assert response.json() == {
+        'response': "Thank you Ada, I've recorded your information. How can I assist you today?",
+        'lead_score': 0,
+        'user_data': {'name': 'Ada'}
+    }
+    assert stats.json()['sessions'] >= 1
+
+
+def test_concurrent_searches_share_the_executor():
+    requests = [('POST', '/warpgpt2/kb-search', {'json': {'query': 'docker container exit code 125'}})] * 200
+    responses = run_requests(*requests)
+
+    assert all(r.status_code == 200 for r in responses)
+    assert {r.json()['results'][0]['id'] for r in responses} == {'docker-001'}
+    assert len(asgi_app.executor._threads) <= asgi_app.executor._max_workers
+
+
+def test_missing_templates_are_not_found():
+    response, = run_requests(('GET', '/dashboard', {}))
+    assert response.status_code == 404
@@ -0,0 +1,245 @@
+"""
+Tests for the ConversationHistoryManager lookup indexes.
+"""
+
+import json
+import os
+import random
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# Integrations use flat imports, mirror web_interface.py
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'integrations'))
+
+from conversation_history import ConversationHistoryManager
+from conversation_storage import create_storage
+
+
+def conversation(conversation_id, session_id, timestamp):
+    return {
+        "conversation_id": conversation_id,
+        "session_id": session_id,
+        "timestamp": timestamp,
+        "user_input": f"question {conversation_id}",
+        "bot_response": "answer",
+        "user_data": {},
+        "lead_score": 0,
+        "response_time": 0.0,
+        "feedback": None,
+        "response_quality": None
+    }
+
+
+def reference_recent(history, limit, session_id=None):
+    conversations = [c for c in history if not session_id or c["session_id"] == session_id]
+    return sorted(conversations, key=lambda x: x["timestamp"], reverse=True)[:limit]
+
+
+def make_manager(tmp_path, history, **kwargs):
+    with open(tmp_path / "conversation_history.json", "w") as f:
+        json.dump(history, f)
+    return ConversationHistoryManager(str(tmp_path), **kwargs)
+
+
+def test_recent_conversations_match_a_full_sort(tmp_path):
+    # Stored newest-first, as left behind by the old in-place sort
+    history = [conversation(f"c{i}", f"s{i % 3}", f"2025-06-30T16:{i:02d}:00") for i in range(30)][::-1]
+    manager = make_manager(tmp_path, history, recent_capacity=10)
+
+    for limit in (1, 5, 10, 25, 40):
+        assert manager.get_recent_conversations(limit) == reference_recent(history, limit)
+        assert manager.get_recent_conversations(limit, "s1") == reference_recent(history, limit, "s1")
+
+    # Reads no longer reorder the shared history
+    assert manager.conversation_history == history
+
+
+def test_late_conversations_are_inserted_in_order(tmp_path):
+    history = [conversation(f"c{i}", f"s{i % 2}", f"2025-06-30T16:{i:02d}:00") for i in range(0, 20, 2)]
+    manager = make_manager(tmp_path, history, recent_capacity=4)
+
+    for i in (19, 13, 1, 17):
+        late = conversation(f"c{i}", f"s{i % 2}", f"2025-06-30T16:{i:02d}:00")
+        history.append(late)
+        manager.conversation_history.append(late)
+        manager._index_conversation(late)
+
+    assert [c["conversation_id"] for c in manager._recent] == ["c16", "c17", "c18", "c19"]
+    for limit in (3, 4, 10, 20):
+        assert manager.get_recent_conversations(limit) == reference_recent(history, limit)
+        assert manager.get_recent_conversations(limit, "s1") == reference_recent(history, limit, "s1")
+
+
+def test_new_conversations_and_feedback_use_the_indexes(tmp_path):
+    manager = make_manager(tmp_path, [conversation("old", "web", "2025-06-30T16:00:00")], recent_capacity=2)
+
+    first = manager.add_conversation("docker is down", "Restart the daemon", session_id="web")
+    second = manager.add_conversation("pricing please", "Plans start at $99", session_id="other")
+
+    assert [c["conversation_id"] for c in manager.get_recent_conversations(2)] == [second, first]
+    assert [c["conversation_id"] for c in manager.get_recent_conversations(5, "web")] == [first, "old"]
+    assert manager.get_recent_conversations(5, "missing") == []
+
+    manager.add_feedback(first, "helpful", 5)
+    assert manager.get_recent_conversations(1, "web")[0]["response_quality"] == 5
+    assert manager.learning_patterns["docker"]["success_rate"] > 0
+
+
+def reference_stats(manager):
+    # get_conversation_stats as it was before the running statistics
+    history = manager.conversation_history
+    rated = [c for c in history if c.get("response_quality")]
+    avg_quality = sum(c["response_quality"] for c in rated) / len(rated) if rated else 0
+    yesterday = datetime.now() - timedelta(days=1)
+    return {
+        "total_conversations": len(history),
+        "feedback_count": len(manager.feedback_data),
+        "average_quality": round(avg_quality, 2),
+        "recent_24h": len([c for c in history if datetime.fromisoformat(c["timestamp"]) > yesterday]),
+        "learning_patterns_count": len(manager.learning_patterns)
+    }
+
+
+def test_running_stats_match_a_full_scan(tmp_path):
+    now = datetime.now()
+    history = []
+    for i, offset in enumerate([timedelta(days=3), timedelta(days=1, seconds=30), timedelta(days=1),
+                                timedelta(hours=23, minutes=59, seconds=59), timedelta(hours=2), timedelta(0)]):
+        conv = conversation(f"c{i}", "s", (now - offset).isoformat())
+        conv["response_quality"] = [None, 4, 0, 5, None, 2][i]
+        history.append(conv)
+    manager = make_manager(tmp_path, history)
+    assert manager.get_conversation_stats() == reference_stats(manager)
+
+    manager.add_conversation("new question", "new answer")
+    manager.add_feedback("c1", "better", 3)
+    manager.add_feedback("c4", "fine", 4)
+    manager.add_feedback("missing", "ignored", 1)
+    assert manager.get_conversation_stats() == reference_stats(manager)
+
+
+def test_empty_history_stats(tmp_path):
+    assert make_manager(tmp_path, []).get_conversation_stats() == {"total_conversations": 0}
+
+
+def test_responses_are_interned_and_stop_words_dropped(tmp_path):
+    manager = make_manager(tmp_path, [])
+    blurb = "TechCorp offers a complete CRM suite. " * 50
+
+    manager.add_conversation("What is the pricing for the CRM suite?", blurb)
+    manager.add_conversation("CRM pricing again", blurb)
+
+    patterns = manager.learning_patterns
+    assert "the" not in patterns and "what" not in patterns
+    assert patterns["crm"]["count"] == 2
+    assert patterns["pricing"]["responses"][0]["response"] == blurb
+    assert list(patterns.responses.values()) == [blurb]
+
+    saved = json.load(open(tmp_path / "learning_patterns.json"))
+    assert saved["format"] == "interned"
+    assert saved["response_refs"]["crm"][0][0] in saved["responses"]
+
+
+def test_least_frequent_keywords_are_evicted(tmp_path):
+    manager = make_manager(tmp_path, [], max_keywords=4)
+
+    manager.add_conversation("docker docker docker", "docker answer")
+    manager.add_conversation("kubernetes kubernetes", "k8s answer")
+    manager.add_conversation("nginx", "nginx answer")
+    manager.add_conversation("postgres redis", "data answer")
+
+    # Over the cap: evict the least frequent down to 90% of it, releasing their responses
+    patterns = manager.learning_patterns
+    assert sorted(patterns) == ["docker", "postgres", "redis"]
+    assert sorted(patterns.responses.values()) == ["data answer", "docker answer"]
+
+    reloaded = ConversationHistoryManager(str(tmp_path), max_keywords=4)
+    assert reloaded.learning_patterns == patterns
+
+
+def test_legacy_pattern_files_are_migrated(tmp_path):
+    legacy = {"docker": {"count": 2, "success_rate": 0.5, "responses": [
+        {"response": "Restart it", "timestamp": "2025-06-30T16:00:00"},
+        {"response": "Restart it", "timestamp": "2025-06-30T16:05:00"}
+    ]}}
+    with open(tmp_path / "learning_patterns.json", "w") as f:
+        json.dump(legacy, f)
+
+    manager = make_manager(tmp_path, [])
+    assert manager.learning_patterns.export() == legacy
+    assert len(manager.learning_patterns.responses) == 1
+
+
+def reference_suggestion(patterns, user_input):
+    # suggest_improved_response as it was before the latest-response pointers
+    best_responses = []
+    for keyword in re.findall(r'\b\w+\b', user_input.lower()):
+        if keyword in patterns:
+            pattern = patterns[keyword]
+            if pattern["success_rate"] > 0.7 and pattern["responses"]:
+                best_responses.extend(pattern["responses"])
+    if best_responses:
+        best_responses.sort(key=lambda x: x["timestamp"], reverse=True)
+        return best_responses[0]["response"]
+    return None
+
+
+def test_suggestions_match_a_full_sort(tmp_path):
+    rng = random.Random(7)
+    words = ["docker", "network", "pricing", "crm", "login", "timeout"]
+    legacy = {}
+    for word in words:
+        legacy[word] = {"count": 3, "success_rate": rng.choice([0.5, 0.8, 0.95]), "responses": [
+            # Few distinct timestamps so ties are exercised
+            {"response": f"{word} answer {i}", "timestamp": f"2025-06-30T16:0{rng.randint(0, 3)}:00"}
+            for i in range(rng.randint(1, 5))
+        ]}
+    with open(tmp_path / "learning_patterns.json", "w") as f:
+        json.dump(legacy, f)
+    manager = make_manager(tmp_path, [])
+
+    for _ in range(50):
+        query = " ".join(rng.sample(words, 3))
+        assert manager.suggest_improved_response(query) == reference_suggestion(legacy, query)
+    assert manager.suggest_improved_response("nothing relevant here") is None
+
+    # A newer response for a trusted keyword becomes the suggestion
+    trusted = next(w for w in words if legacy[w]["success_rate"] > 0.7)
+    manager.add_conversation(f"{trusted} help", "fresh answer")
+    assert manager.suggest_improved_response(trusted) == "fresh answer"
+
+
+def test_concurrent_writers_keep_the_store_consistent(tmp_path):
+    # Switch threads as often as possible so unguarded updates would interleave
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for backend in ("json", "log"):
+            data_dir = tmp_path / backend
+            manager = ConversationHistoryManager(str(data_dir), storage=create_storage(backend, str(data_dir)))
+
+            def chat(worker):
+                for i in range(25):
+                    conversation_id = manager.add_conversation(f"docker issue {worker} {i}", f"answer {i}",
+                                                               session_id=f"worker-{worker}")
+                    manager.add_feedback(conversation_id, "ok", 4)
+                    manager.get_conversation_stats()
+
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                list(pool.map(chat, range(8)))
+            manager.close()
+
+            # Stamped under the lock, so appended in timestamp order
+            timestamps = [c["timestamp"] for c in manager.conversation_history]
+            assert timestamps == sorted(timestamps)
+
+            reloaded = ConversationHistoryManager(str(data_dir), storage=create_storage(backend, str(data_dir)))
+            assert len(reloaded.conversation_history) == 200
+            assert len(reloaded.feedback_data) == 200
+            assert reloaded.get_conversation_stats()["average_quality"] == 4
+            assert reloaded.learning_patterns["docker"]["count"] == 200
+            reloaded.close()
+    finally:
+        sys.setswitchinterval(switch_interval)
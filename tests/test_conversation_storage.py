@@ -0,0 +1,78 @@
+"""
+Tests for the append-only conversation log storage.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Integrations use flat imports, mirror web_interface.py
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'integrations'))
+
+from conversation_history import ConversationHistoryManager
+from conversation_storage import SegmentedLogStorage
+
+
+def make_manager(data_dir, **kwargs):
+    return ConversationHistoryManager(str(data_dir), storage=SegmentedLogStorage(str(data_dir), **kwargs))
+
+
+def test_replay_restores_conversations_feedback_and_patterns(tmp_path):
+    manager = make_manager(tmp_path)
+    conv_id = manager.add_conversation("docker keeps crashing", "Try restarting it", session_id="s1")
+    manager.add_feedback(conv_id, "great", 5)
+    manager.close()
+
+    reloaded = make_manager(tmp_path)
+    assert reloaded.conversation_history == manager.conversation_history
+    assert reloaded.feedback_data == manager.feedback_data
+    assert reloaded.learning_patterns == manager.learning_patterns
+    assert reloaded.conversation_history[0]["response_quality"] == 5
+    assert reloaded.learning_patterns["docker"]["success_rate"] == pytest.approx(0.1)
+
+
+def test_writes_do_not_rewrite_history(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.add_conversation("first message", "reply")
+    segment = manager.storage._segment_path(manager.storage.active_segment)
+    size_after_first = os.path.getsize(segment)
+
+    manager.add_conversation("second message", "reply")
+    size_after_second = os.path.getsize(segment)
+
+    # Only the new records were appended, nothing was rewritten
+    assert size_after_second - size_after_first == pytest.approx(size_after_first, rel=0.2)
+    assert not os.path.exists(os.path.join(str(tmp_path), "conversation_history.json"))
+
+
+def test_rotation_and_compaction(tmp_path):
+    manager = make_manager(tmp_path, max_segment_bytes=256, compact_segments=3)
+    for i in range(20):
+        manager.add_conversation(f"message number {i}", f"reply {i}")
+    manager.close()
+
+    storage = manager.storage
+    assert os.path.exists(storage.snapshot_file)
+    assert len(storage._list_segments()) <= storage.compact_segments + 1
+
+    reloaded = make_manager(tmp_path, max_segment_bytes=256, compact_segments=3)
+    assert [c["user_input"] for c in reloaded.conversation_history] == [f"message number {i}" for i in range(20)]
+
+
+def test_torn_tail_is_truncated_on_replay(tmp_path):
+    manager = make_manager(tmp_path)
+    manager.add_conversation("complete record", "reply")
+    segment = manager.storage._segment_path(manager.storage.active_segment)
+    manager.close()
+
+    with open(segment, 'a', encoding='utf-8') as f:
+        f.write('{"op": "conversation", "data": {"conversation_id": "torn"')
+
+    reloaded = make_manager(tmp_path)
+    assert len(reloaded.conversation_history) == 1
+
+    # The next append starts on a clean line
+    reloaded.add_conversation("after crash", "reply")
+    reloaded.close()
+    assert len(make_manager(tmp_path).conversation_history) == 2
@@ -5,7 +5,7 @@ Integration tests for API components of the chatbot solution.
 import asyncio
 import os
 import pytest
-from unittest.mock import patch, MagicMock, Mock
+from unittest.mock import patch, AsyncMock, MagicMock, Mock
 from integrations.google_sheets_api import GoogleSheetsIntegration
 from integrations.slack_notifications import SlackNotifier
 
@@ -36,15 +36,15 @@ def google_sheets_integration(mock_build, mock_creds):
 
 
 @pytest.fixture(scope="module")
-@patch('integrations.slack_notifications.WebClient')
+@patch('integrations.slack_notifications.AsyncWebClient')
 def slack_notifier(mock_web_client_class):
     """Set up Slack notifier for testing."""
     bot_token = os.getenv('SLACK_BOT_TOKEN', 'test-bot-token')
     webhook_url = os.getenv('SLACK_WEBHOOK_URL', 'https://hooks.slack.com/services/test')
 
-    # Create a mock WebClient instance
+    # Create a mock AsyncWebClient instance
     mock_client_instance = Mock()
-    mock_client_instance.chat_postMessage.return_value = {'ts': '12345.6789', 'ok': True}
+    mock_client_instance.chat_postMessage = AsyncMock(return_value={'ts': '12345.6789', 'ok': True})
     mock_web_client_class.return_value = mock_client_instance
 
     # Return notifier instance
@@ -0,0 +1,51 @@
+"""
+Tests for the precompiled MockOpenAI intent classifier.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Integrations use flat imports, mirror web_interface.py
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'integrations'))
+
+from mock_services import MockOpenAI, compile_intent_table
+
+
+@pytest.mark.parametrize("message, category", [
+    ("Hello!", "greeting"),
+    ("Is this thing on", "greeting"),           # "hi" inside "this", as before
+    ("Goodbye and thanks", "goodbye"),
+    ("I need help choosing a product", "product_inquiry"),
+    ("There is an error in my export", "support"),
+    ("What is the price?", "pricing"),
+    ("Can I book a demo", "demo"),
+    ("Tell me about your company", "enterprise"),  # "company" outranks "tell me"
+    ("Do you connect to our CRM", "integration"),
+    ("Any details on the roadmap", "about"),
+    ("what do you do", "product_inquiry"),
+    ("we need large scale rollout", "enterprise"),
+    ("Who is your CEO", "about"),
+    ("xyzzy", "default"),
+])
+def test_classify_keeps_priority_order(message, category):
+    assert MockOpenAI().classify(message) == category
+
+
+def test_compile_drops_implied_keywords():
+    table = compile_intent_table([
+        ("goodbye", ["bye", "goodbye"]),
+        ("support", ["support", "help"]),
+        ("integration", ["support", "api"]),
+        ("about", ["information", "who"]),
+        ("company_info", ["who are you"]),
+    ])
+    assert table == [
+        ("bye", "goodbye"),
+        ("support", "support"),
+        ("help", "support"),
+        ("api", "integration"),
+        ("information", "about"),
+        ("who", "about"),
+    ]
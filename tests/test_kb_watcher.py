@@ -0,0 +1,104 @@
+"""
+Tests for hot reloading the knowledge base files.
+"""
+
+import json
+import os
+import sys
+import time
+
+import pytest
+
+# Integrations use flat imports, mirror web_interface.py
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'integrations'))
+
+from kb_snapshot import SnapshotKnowledgeBase
+from kb_watcher import KBWatcher
+from techcorp_warp_ai import TechCorpKnowledgeBase
+from warpgpt_2_0 import HybridKnowledgeBase, WarpGPT2
+
+
+def touch_later(path):
+    """Move the modification time forward so the edit is seen even on coarse clocks"""
+    modified = time.time() + 5
+    os.utime(path, (modified, modified))
+
+
+def test_outside_edit_is_reloaded_and_swapped_in(tmp_path):
+    kb = HybridKnowledgeBase(str(tmp_path))
+    watcher = KBWatcher(lambda: [kb], interval=60)
+    before = kb.snapshot
+    assert watcher.check() == 0
+
+    with open(kb.kb_file) as f:
+        entries = json.load(f)
+    entries["flux-001"] = {"title": "Flux capacitor overheats", "category": "hardware", "confidence": 0.9,
+                           "solution": ["Let it cool"], "tags": ["flux"]}
+    del entries["docker-001"]
+    with open(kb.kb_file, "w") as f:
+        json.dump(entries, f)
+    touch_later(kb.kb_file)
+
+    assert watcher.check() == 1
+    assert kb.version == before.version + 1
+    assert kb.hybrid_search("flux capacitor", {})[0][0]["id"] == "flux-001"
+    assert "docker-001" not in kb.knowledge_base
+    assert "docker-001" in before.entries
+    assert kb.reload_stats["reloads"] == 1 and kb.reload_stats["last_reload_seconds"] is not None
+    assert watcher.check() == 0
+
+
+def test_own_writes_do_not_trigger_a_reload(tmp_path):
+    kb = TechCorpKnowledgeBase(data_dir=str(tmp_path))
+    kb.upsert_entry("flux-001", {"title": "Flux capacitor overheats", "category": "hardware",
+                                 "solution": ["Let it cool"]})
+    version = kb.version
+    assert not kb.reload_if_changed()
+    assert kb.version == version
+    kb.solutions_journal.close()
+
+
+def test_journal_edits_from_another_process_are_picked_up(tmp_path):
+    kb = TechCorpKnowledgeBase(data_dir=str(tmp_path))
+    other = TechCorpKnowledgeBase(data_dir=str(tmp_path))
+    other.upsert_entry("flux-001", {"title": "Flux capacitor overheats", "category": "hardware",
+                                    "solution": ["Let it cool"]})
+    touch_later(other.journal.changes_file)
+
+    assert kb.reload_if_changed()
+    assert kb.search("flux capacitor")[0]["id"] == "flux-001"
+    for instance in (kb, other):
+        instance.solutions_journal.close()
+
+
+def test_unparsable_file_keeps_the_current_version(tmp_path):
+    kb = HybridKnowledgeBase(str(tmp_path))
+    version, entries = kb.version, kb.knowledge_base
+    with open(kb.kb_file, "w") as f:
+        f.write('{"docker-001": {"title": ')
+    touch_later(kb.kb_file)
+
+    assert not kb.reload_if_changed()
+    assert (kb.version, kb.knowledge_base) == (version, entries)
+    assert kb.reload_stats["errors"] == 1
+    # Not retried until the file changes again
+    assert not kb.reload_if_changed()
+    assert kb.reload_stats["errors"] == 1
+
+
+def test_system_status_reports_reloads(tmp_path):
+    assistant = WarpGPT2(data_dir=str(tmp_path))
+    touch_later(assistant.kb.kb_file)
+    assert assistant.kb.reload_if_changed()
+    status = assistant.get_system_status()
+    assert status["kb_version"] == assistant.kb.version
+    assert status["kb_reload"]["reloads"] == 1
+
+
+def test_knowledge_bases_must_implement_the_snapshot_hooks():
+    class Incomplete(SnapshotKnowledgeBase):
+        def watched_files(self):
+            return []
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,128 @@
+"""
+Tests for bulk lead re-scoring.
+"""
+
+import json
+import os
+import re
+import sys
+from unittest.mock import patch
+
+# Integrations use flat imports, mirror web_interface.py
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'integrations'))
+
+from integrations.google_sheets_api import GoogleSheetsIntegration
+from lead_rescoring import LeadRescorer
+from mock_services import LeadScorer
+from sqlite_storage import WriteBehindSQLiteList
+from write_behind import WriteBehindJSONList, read_json_records
+
+
+def make_leads(count):
+    companies = ["Enterprise Corp", "Bob's Garage", "Widgets Ltd"]
+    emails = ["ceo@acme.com", "bob@gmail.com"]
+    leads = []
+    for i in range(count):
+        lead = {"name": f"lead-{i}", "company": companies[i % 3], "email": emails[i % 2],
+                "inquiry_type": "enterprise" if i % 4 == 0 else "general", "budget": "$30k" if i % 5 == 0 else ""}
+        # Every third lead already has its current score
+        lead["lead_score"] = LeadScorer().calculate_score(lead) if i % 3 == 0 else 1
+        leads.append(lead)
+    return leads
+
+
+def test_json_store_is_rescored_through_the_process_pool(tmp_path):
+    path = str(tmp_path / "leads.json")
+    leads = make_leads(20)
+    with open(path, "w") as f:
+        json.dump(leads, f)
+    store = WriteBehindJSONList(path)
+
+    report = LeadRescorer(workers=2, chunk_size=3).rescore_store(store)
+    store.close()
+
+    assert report["scanned"] == 20 and report["changed"] == 13
+    assert report["leads_per_second"] > 0
+    saved = read_json_records(path)
+    scorer = LeadScorer()
+    assert [lead["lead_score"] for lead in saved] == [scorer.calculate_score(lead) for lead in leads]
+    assert [lead["name"] for lead in saved] == [lead["name"] for lead in leads]
+
+
+def test_sqlite_store_only_updates_changed_rows(tmp_path):
+    db_path = str(tmp_path / "chatbot.db")
+    store = WriteBehindSQLiteList("leads", path=db_path)
+    for lead in make_leads(9):
+        store.append(lead)
+    store.flush()
+
+    changes_before = store.conn.total_changes
+    report = LeadRescorer(workers=1, chunk_size=4).rescore_store(store)
+    assert store.conn.total_changes - changes_before == report["changed"] == 6
+    store.close()
+
+    reopened = WriteBehindSQLiteList("leads", path=db_path)
+    scores = [row["lead_score"] for row in reopened.conn.execute("SELECT lead_score FROM leads ORDER BY id")]
+    assert scores == [lead["lead_score"] for lead in reopened.records]
+    assert scores == [LeadScorer().calculate_score(lead) for lead in make_leads(9)]
+    reopened.close()
+
+
+class FakeSheet:
+    """Leads tab held in memory, serving values().get and values().batchUpdate"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.gets = []
+        self.updates = []
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def get(self, spreadsheetId, range):
+        self.gets.append(range)
+        start, end = map(int, re.match(r"Leads!A(\d+):M(\d+)", range).groups())
+        return FakeRequest({'values': self.rows[start - 1:end]})
+
+    def batchUpdate(self, spreadsheetId, body):
+        for item in body['data']:
+            self.updates.append(item['range'])
+            row = int(re.match(r"Leads!I(\d+)", item['range']).group(1))
+            self.rows[row - 1][8] = item['values'][0][0]
+        return FakeRequest({'totalUpdatedCells': len(body['data'])})
+
+
+class FakeRequest:
+    def __init__(self, result):
+        self.result = result
+
+    def execute(self):
+        return self.result
+
+
+@patch('integrations.google_sheets_api.Credentials')
+@patch('integrations.google_sheets_api.build')
+def test_sheet_rows_are_read_in_pages_and_only_changed_scores_written(mock_build, mock_creds):
+    headers = GoogleSheetsIntegration.LEAD_HEADERS
+    rows = [headers]
+    for i in range(7):
+        email = "ceo@acme.com" if i % 2 else "bob@gmail.com"
+        rows.append(["2025-06-30", f"Lead {i}", email, "Acme Inc", "600", "$30k", "1-3 months",
+                     "", "30" if i == 0 else "0", "Medium", "Chatbot", "New", "Unassigned"])
+    sheet = FakeSheet(rows)
+    mock_build.return_value = sheet
+    integration = GoogleSheetsIntegration('credentials.json', 'sheet-id')
+
+    report = LeadRescorer(workers=1, chunk_size=3).rescore_sheet(integration)
+
+    # Header plus pages of three rows until a short page
+    assert sheet.gets == ['Leads!A1:M1', 'Leads!A2:M4', 'Leads!A5:M7', 'Leads!A8:M10']
+    scorer = LeadScorer()
+    expected = [scorer.calculate_score({"email": row[2], "company": row[3], "company_size": row[4],
+                                        "budget": row[5], "timeline": row[6]}) for row in rows[1:]]
+    assert [row[8] for row in sheet.rows[1:]] == expected
+    assert report["scanned"] == 7
+    assert report["changed"] == len(sheet.updates) == sum(1 for row, score in zip(rows[1:], expected) if score)
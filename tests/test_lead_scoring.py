@@ -0,0 +1,100 @@
+"""
+Tests for the rule-driven lead scoring engine.
+"""
+
+import json
+import os
+import random
+import sys
+
+# Integrations use flat imports, mirror web_interface.py
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'integrations'))
+
+from lead_scoring import LeadScoringEngine
+from mock_services import LEAD_SCORING_RULES_FILE, LeadScorer
+
+
+def reference_score(lead_data):
+    # LeadScorer.calculate_score as it was before the rules file was used
+    score = 0
+    company = lead_data.get("company", "").lower()
+    if any(word in company for word in ["enterprise", "corp", "inc", "ltd"]):
+        score += 20
+    inquiry_type = lead_data.get("inquiry_type", "").lower()
+    if "enterprise" in inquiry_type:
+        score += 30
+    elif "pricing" in inquiry_type:
+        score += 25
+    elif "demo" in inquiry_type:
+        score += 20
+    email = lead_data.get("email", "")
+    if email and not email.endswith(('@gmail.com', '@yahoo.com', '@hotmail.com')):
+        score += 15
+    return min(score, 100)
+
+
+def random_lead(rng):
+    options = {
+        "company": ["Enterprise Corp", "Acme Inc", "Bob's Garage", "Widgets Ltd", ""],
+        "inquiry_type": ["enterprise", "pricing", "demo request", "general", ""],
+        "email": ["ceo@acme.com", "bob@gmail.com", "x@yahoo.com", ""],
+        "budget": ["$50,000+", "$30k", 7500, "Under $5,000", "unknown", None, 120000.0],
+        "timeline": ["Immediate (< 1 month)", "immediate", "3-6 Months", "someday", None],
+        "role": ["CEO", "VP/Director", "director", "Manager", "intern", ""],
+        "company_size": [2000, "500-999 employees", "75", "1-9 employees", None],
+        "use_case": ["Complete CRM overhaul", "general inquiry", "other"],
+        "engagement": [["Requested demo", "Asked about pricing"], "Basic information request", [], None],
+    }
+    return {field: rng.choice(values) for field, values in options.items() if rng.random() < 0.8}
+
+
+def test_contact_only_leads_score_as_before():
+    scorer = LeadScorer()
+    rng = random.Random(3)
+    for _ in range(200):
+        lead = {field: rng.choice(values) for field, values in [
+            ("company", ["Enterprise Corp", "Acme Inc", "Bob's Garage", ""]),
+            ("inquiry_type", ["enterprise", "pricing", "demo", "general"]),
+            ("email", ["ceo@acme.com", "bob@gmail.com", ""]),
+        ]}
+        assert scorer.calculate_score(lead) == reference_score(lead)
+
+
+def test_rule_sections_are_scored():
+    scorer = LeadScorer()
+    lead = {"budget": "$30k", "timeline": "1-3 months", "role": "Owner", "company_size": 600}
+    assert scorer.calculate_score(lead) == 25 + 20 + 20 + 12
+    assert scorer.calculate_score({"role": "intern", "engagement": ["Requested demo", "nope"]}) == 5 + 15
+    assert scorer.calculate_score({"budget": "Under $5,000"}) == 5
+    assert scorer.calculate_score({
+        "budget": 100000, "timeline": "immediate", "role": "CEO", "company_size": "1000+ employees",
+        "use_case": "Complete CRM overhaul", "engagement": "Requested demo"
+    }) == 100
+
+
+def test_batch_scores_match_single_scores():
+    scorer = LeadScorer()
+    rng = random.Random(11)
+    leads = [random_lead(rng) for _ in range(500)]
+    assert scorer.score_batch(leads) == [scorer.calculate_score(lead) for lead in leads]
+    assert scorer.score_batch([]) == []
+
+
+def test_rules_reload_when_the_file_changes(tmp_path):
+    rules_file = tmp_path / "rules.json"
+    rules = json.load(open(LEAD_SCORING_RULES_FILE))
+    rules_file.write_text(json.dumps(rules))
+    scorer = LeadScoringEngine(str(rules_file), check_interval=0)
+    lead = {"email": "ceo@acme.com"}
+    assert scorer.calculate_score(lead) == 15
+
+    rules["lead_scoring_rules"]["email_criteria"][0]["score"] = 40
+    rules_file.write_text(json.dumps(rules, indent=2))
+    assert scorer.calculate_score(lead) == 40
+    assert scorer.score_batch([lead]) == [40]
+    assert scorer.version == 2
+
+    # A broken file keeps the last good rules
+    rules_file.write_text("{not json")
+    assert scorer.calculate_score(lead) == 40
+    assert scorer.version == 2
@@ -0,0 +1,86 @@
+"""
+Tests for the WarpGPT response cache.
+"""
+
+import os
+import sys
+
+# Integrations use flat imports, mirror web_interface.py
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'integrations'))
+
+from response_cache import ResponseCache
+from warpgpt_2_0 import WarpGPT2
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_and_ttl_expiry():
+    clock = FakeClock()
+    cache = ResponseCache(max_entries=2, ttl_seconds=10, clock=clock)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # "b" is least recently used
+    assert cache.get("b") is None and cache.get("c") == 3
+
+    clock.now = 11
+    assert cache.get("a") is None
+    stats = cache.get_stats()
+    assert stats["hits"] == 2 and stats["misses"] == 2
+    assert stats["evictions"] == 1 and stats["expirations"] == 1
+    assert stats["size"] == 1 and stats["hit_rate"] == 0.5
+
+    disabled = ResponseCache(max_entries=0)
+    disabled.put("a", 1)
+    assert disabled.get("a") is None
+
+
+def make_warpgpt(tmp_path):
+    return WarpGPT2(data_dir=str(tmp_path), cache_size=16, cache_ttl=60)
+
+
+def test_repeated_and_normalized_queries_are_served_from_cache(tmp_path, monkeypatch):
+    warpgpt = make_warpgpt(tmp_path)
+    first = warpgpt.process_warp_request("docker container won't start, exit code 125")
+
+    def no_search(*args, **kwargs):
+        raise AssertionError("search should not run for a cached query")
+
+    monkeypatch.setattr(warpgpt.kb, "hybrid_search", no_search)
+    monkeypatch.setattr(warpgpt.warp_context, "get_context", no_search)
+    assert warpgpt.process_warp_request("Docker container won't start -- EXIT CODE 125!") == first
+
+    stats = warpgpt.response_cache.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_kb_changes_invalidate_cached_responses(tmp_path):
+    warpgpt = make_warpgpt(tmp_path)
+    query = "docker container exit code oomkilled"
+    before = warpgpt.process_warp_request(query)
+
+    entry = dict(warpgpt.kb.knowledge_base["docker-001"], title="Docker Containers That Will Not Start")
+    warpgpt.kb.upsert_entry("docker-001", entry)
+
+    after = warpgpt.process_warp_request(query)
+    assert "Docker Containers That Will Not Start" in after and after != before
+    assert warpgpt.response_cache.get_stats()["invalidations"] == 1
+
+
+def test_escalations_and_failed_searches_are_not_cached(tmp_path, monkeypatch):
+    warpgpt = make_warpgpt(tmp_path)
+    assert "CRITICAL ISSUE" in warpgpt.process_warp_request("production down, emergency!")
+    assert len(warpgpt.response_cache) == 0
+
+    def broken_search(*args, **kwargs):
+        raise RuntimeError("index unavailable")
+
+    monkeypatch.setattr(warpgpt.kb, "hybrid_search", broken_search)
+    assert warpgpt.process_warp_request("ssl certificate expired") == warpgpt.format_uncertain_response()
+    assert len(warpgpt.response_cache) == 0
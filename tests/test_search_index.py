@@ -0,0 +1,166 @@
+"""
+Tests for the BM25 inverted index and the WarpGPT hybrid knowledge base search.
+"""
+
+import json
+import os
+import sys
+import time
+
+# Integrations use flat imports, mirror web_interface.py
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'integrations'))
+
+from search_index import InvertedIndex, tokenize
+from warpgpt_2_0 import HybridKnowledgeBase, WarpGPT2
+
+
+def test_tokenize_drops_stop_words_and_punctuation():
+    assert tokenize("The SSL cert is expired!") == ["ssl", "cert", "expired"]
+    assert tokenize("rate_limit") == ["rate", "limit"]
+
+
+def test_matches_whole_tokens_only():
+    index = InvertedIndex({"title": 1.0})
+    index.add("tssl", {"title": "tssl handshake"})
+    index.add("ssl", {"title": "ssl handshake"})
+
+    assert [doc_id for doc_id, _ in index.search("ssl")] == ["ssl"]
+
+
+def test_field_weights_and_removal():
+    index = InvertedIndex({"title": 2.0, "body": 1.0})
+    index.add("a", {"title": "docker", "body": "restart the daemon"})
+    index.add("b", {"title": "network", "body": "docker bridge"})
+
+    assert [doc_id for doc_id, _ in index.search("docker")] == ["a", "b"]
+
+    index.remove("a")
+    assert [doc_id for doc_id, _ in index.search("docker")] == ["b"]
+    assert "docker" in index.postings and "daemon" not in index.postings
+    assert len(index) == 1
+
+
+def test_search_limit_returns_top_scores():
+    index = InvertedIndex({"title": 1.0})
+    for i in range(10):
+        index.add(f"doc-{i}", {"title": "vpn " * (i + 1) + "filler " * 5})
+
+    top = index.search("vpn", limit=3)
+    assert [doc_id for doc_id, _ in top] == ["doc-9", "doc-8", "doc-7"]
+
+
+def test_hybrid_search_ignores_unrelated_queries(tmp_path):
+    kb = HybridKnowledgeBase(str(tmp_path))
+
+    results, confidence = kb.hybrid_search("purple elephant dancing", {})
+    assert results == [] and confidence == 0.0
+
+    results, _ = kb.hybrid_search("Database connection timeout after 30 seconds", {})
+    assert results[0]["id"] == "db-001"
+
+
+def test_hybrid_search_tracks_entry_changes(tmp_path):
+    kb = HybridKnowledgeBase(str(tmp_path))
+    kb.upsert_entry("k8s-001", {
+        "title": "Kubernetes Pod CrashLoopBackOff",
+        "category": "containers",
+        "confidence": 0.9,
+        "solution": ["Describe the pod: `kubectl describe pod name`"],
+        "tags": ["kubernetes", "pod"],
+        "troubleshooting": {"error_patterns": ["crashloopbackoff"]}
+    })
+
+    results, _ = kb.hybrid_search("pod in crashloopbackoff", {})
+    assert results[0]["id"] == "k8s-001"
+
+    assert kb.delete_entry("k8s-001")
+    results, _ = kb.hybrid_search("pod in crashloopbackoff", {})
+    assert results == []
+    assert "k8s-001" not in HybridKnowledgeBase(str(tmp_path)).knowledge_base
+
+
+def test_fused_search_combines_lexical_and_dense_rankings(tmp_path):
+    kb = HybridKnowledgeBase(str(tmp_path))
+
+    results, confidence = kb.fused_search("Docker container won't start, exit code 125", {})
+    assert results[0]["id"] == "docker-001"
+    assert results[0]["lexical_score"] > 0 and results[0]["dense_score"] > 0
+    assert confidence == results[0]["confidence"]
+    assert 0.7 <= confidence <= kb.knowledge_base["docker-001"]["confidence"]
+
+    results, confidence = kb.fused_search("network connectivity problems", {}, method="weighted",
+                                          lexical_weight=0.2, dense_weight=0.8)
+    assert 0.0 < confidence < 1.0
+    assert all(0.0 <= r["score"] <= 1.0 for r in results)
+
+    assert kb.fused_search("purple elephant dancing", {}) == ([], 0.0)
+
+
+def test_query_coverage_is_weighted_by_idf():
+    index = InvertedIndex({"title": 1.0})
+    index.add("a", {"title": "docker restart"})
+    index.add("b", {"title": "nginx restart"})
+
+    assert index.coverage("a", "docker restart") == 1.0
+    assert index.coverage("a", "kafka") == 0.0
+    # The rarer term carries more of the query
+    assert index.coverage("a", "docker nginx") == 0.5
+    # Words no entry contains count fully against the match
+    assert index.coverage("a", "docker kafka") < 0.5
+
+
+def test_fused_confidence_reflects_match_quality(tmp_path):
+    assistant = WarpGPT2(retrieval_mode="fused", data_dir=str(tmp_path))
+
+    for method in ("rrf", "weighted"):
+        # Both retrievers rank ssl-001 first, but only one word of the query matches it
+        results, confidence = assistant.kb.fused_search("my cat ate the certificate", {}, method=method)
+        assert results[0]["id"] == "ssl-001"
+        assert confidence < assistant.confidence_threshold
+
+        _, confidence = assistant.kb.fused_search("restart", {}, method=method)
+        assert confidence < assistant.verified_threshold
+
+        _, confidence = assistant.kb.fused_search("ssl certificate expired error", {}, method=method)
+        assert confidence >= assistant.verified_threshold
+
+    assert "Verified" not in assistant.process_warp_request("my cat ate the certificate")
+
+
+def test_fused_search_sees_entry_changes(tmp_path):
+    kb = HybridKnowledgeBase(str(tmp_path))
+    kb.fused_search("kubernetes pod", {})
+    kb.upsert_entry("k8s-001", {
+        "title": "Kubernetes Pod CrashLoopBackOff",
+        "category": "containers",
+        "confidence": 0.9,
+        "solution": ["Describe the pod: `kubectl describe pod name`"],
+        "tags": ["kubernetes", "pod"]
+    })
+
+    results, _ = kb.fused_search("kubernetes pod", {}, dense_candidates=1)
+    assert results[0]["id"] == "k8s-001"
+
+
+def test_new_versions_get_their_dense_index_before_publishing(tmp_path):
+    kb = HybridKnowledgeBase(str(tmp_path))
+    kb.upsert_entry("k8s-001", {"title": "Kubernetes Pod CrashLoopBackOff", "category": "containers",
+                                "solution": ["Describe the pod"]})
+    # Keyword-only use never builds the dense index
+    assert kb.snapshot.vector_index is None
+
+    kb.fused_search("kubernetes pod", {})
+    kb.delete_entry("k8s-001")
+    assert kb.snapshot.vector_index is not None
+    assert "k8s-001" not in {doc["id"] for doc in kb.snapshot.vector_index.documents}
+
+    with open(kb.kb_file) as f:
+        entries = json.load(f)
+    entries["flux-001"] = {"title": "Flux capacitor overheats", "category": "hardware", "solution": ["Let it cool"]}
+    with open(kb.kb_file, "w") as f:
+        json.dump(entries, f)
+    modified = time.time() + 5
+    os.utime(kb.kb_file, (modified, modified))
+
+    assert kb.reload_if_changed()
+    assert "flux-001" in {doc["id"] for doc in kb.snapshot.vector_index.documents}
@@ -0,0 +1,76 @@
+"""
+Tests for lazily loaded services.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Integrations use flat imports, mirror web_interface.py
+sys.path.append(os.path.join(ROOT, 'integrations'))
+
+from service_registry import ServiceRegistry
+from mock_services import LeadScorer
+
+
+class Counter:
+    built = 0
+
+    def __init__(self):
+        Counter.built += 1
+        time.sleep(0.05)
+        self.value = 1
+
+
+def test_services_are_built_once_on_first_use():
+    Counter.built = 0
+    registry = ServiceRegistry()
+    counter = registry.lazy("counter", Counter)
+    assert not registry.is_loaded("counter")
+    assert registry.status() == {"counter": {"loaded": False, "startup_ms": None}}
+
+    threads = [threading.Thread(target=lambda: counter.value) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert Counter.built == 1
+    counter.value = 5
+    assert registry.get("counter").value == 5
+    assert registry.status()["counter"]["startup_ms"] >= 50
+
+
+def test_background_warm_up_and_reset():
+    Counter.built = 0
+    registry = ServiceRegistry()
+    registry.register("counter", Counter)
+    registry.register("broken", lambda: 1 / 0)
+
+    registry.warm_up().join()
+    assert registry.is_loaded("counter") and not registry.is_loaded("broken")
+
+    registry.reset("counter")
+    registry.warm_up(["counter"], background=False)
+    assert Counter.built == 2
+
+
+def test_importing_the_web_interface_builds_nothing():
+    snippet = (
+        "import json, sys, web_interface\n"
+        "from service_registry import services\n"
+        "print(json.dumps({'loaded': [n for n, s in services.status().items() if s['loaded']],"
+        " 'numpy': 'numpy' in sys.modules}))"
+    )
+    result = subprocess.run([sys.executable, "-c", snippet], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == {"loaded": [], "numpy": False}
+
+
+def test_lead_scorer_loads_rules_from_any_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert LeadScorer().scoring_rules
@@ -0,0 +1,80 @@
+"""
+Tests for the bounded web chat session store.
+"""
+
+import os
+import sys
+
+# Integrations use flat imports, mirror web_interface.py
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'integrations'))
+
+from session_store import SessionStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hits_misses_and_lru_eviction():
+    store = SessionStore(max_sessions=2, clock=FakeClock())
+
+    store.get('a')['user_data']['name'] = 'Ada'
+    store.get('b')
+    assert store.get('a')['user_data'] == {'name': 'Ada'}
+    store.get('c')
+
+    assert 'b' not in store and 'a' in store and 'c' in store
+    stats = store.get_stats()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (1, 3, 1)
+
+
+def test_idle_sessions_expire():
+    clock = FakeClock()
+    store = SessionStore(ttl_seconds=60, clock=clock)
+
+    store.add_message('old', {'user': 'hi'})
+    clock.now += 30
+    store.get('recent')
+    clock.now += 45
+
+    assert store.get('recent')['messages'] == []
+    assert 'old' not in store
+    assert store.get_stats()['expirations'] == 1
+
+
+def test_messages_are_capped_by_count_and_bytes():
+    store = SessionStore(max_messages=3, max_bytes=200, clock=FakeClock())
+
+    for i in range(5):
+        store.add_message('s', {'user': f'message {i}'})
+    assert [m['user'] for m in store.get('s')['messages']] == ['message 2', 'message 3', 'message 4']
+
+    store.add_message('s', {'user': 'x' * 500})
+    assert [m['user'] for m in store.get('s')['messages']] == ['x' * 500]
+    assert store.get_stats()['trimmed_messages'] == 5
+
+
+def test_evicted_sessions_spill_to_disk_and_restore(tmp_path):
+    clock = FakeClock()
+    store = SessionStore(max_sessions=1, ttl_seconds=60, spill_dir=str(tmp_path), clock=clock)
+
+    store.add_message('a', {'user': 'hello'})
+    store.get('a')['user_data']['email'] = 'ada@example.com'
+    store.get('b')
+    assert len(os.listdir(tmp_path)) == 1
+
+    restored = store.get('a')
+    assert restored['messages'] == [{'user': 'hello'}]
+    assert restored['user_data'] == {'email': 'ada@example.com'}
+    stats = store.get_stats()
+    assert (stats['spills'], stats['restores']) == (2, 1)
+
+    # 'b' was spilled when 'a' came back; once idle too long it is gone
+    clock.now += 120
+    store.sweep()
+    assert os.listdir(tmp_path) == []
+    assert store.get('b')['messages'] == [] and store.get_stats()['restores'] == 1
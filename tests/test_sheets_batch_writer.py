@@ -0,0 +1,192 @@
+"""
+Tests for the batched Google Sheets writer against a local fake of the Sheets service.
+"""
+
+from unittest.mock import patch
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from integrations.google_sheets_api import GoogleSheetsIntegration, SheetsBatchWriter, configured_batch_size
+
+
+class FakeSheetsService:
+    """Records values().append calls and raises queued errors first."""
+
+    def __init__(self, errors=None):
+        self.appends = []
+        self.errors = list(errors or [])
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def append(self, spreadsheetId, range, valueInputOption, body):
+        return FakeRequest(self, range, body)
+
+
+class FakeRequest:
+    def __init__(self, service, range_name, body):
+        self.service = service
+        self.range_name = range_name
+        self.body = body
+
+    def execute(self):
+        if self.service.errors:
+            raise self.service.errors.pop(0)
+        self.service.appends.append((self.range_name, [list(row) for row in self.body['values']]))
+        return {'updates': {'updatedCells': sum(len(row) for row in self.body['values'])}}
+
+
+def http_error(status, content=b'{}', headers=None):
+    return HttpError(httplib2.Response({'status': status, **(headers or {})}), content)
+
+
+def make_writer(service, **kwargs):
+    sleeps = []
+    writer = SheetsBatchWriter(service, 'sheet-id', background=False, sleep=sleeps.append, **kwargs)
+    return writer, sleeps
+
+
+def test_rows_are_sent_in_batches_per_sheet_in_order():
+    service = FakeSheetsService()
+    writer, _ = make_writer(service, batch_size=2)
+
+    for i in range(3):
+        writer.enqueue('Leads!A:M', [f'lead-{i}'])
+    writer.enqueue('Conversations!A:H', ['conv-0'])
+
+    assert writer.flush() == 4
+    assert service.appends == [
+        ('Leads!A:M', [['lead-0'], ['lead-1']]),
+        ('Leads!A:M', [['lead-2']]),
+        ('Conversations!A:H', [['conv-0']]),
+    ]
+    assert writer.pending() == 0
+
+
+def test_quota_errors_back_off_and_honour_retry_after():
+    service = FakeSheetsService(errors=[
+        http_error(429, headers={'retry-after': '7'}),
+        http_error(403, b'{"error": {"errors": [{"reason": "rateLimitExceeded"}]}}'),
+    ])
+    writer, sleeps = make_writer(service, backoff_base=1.0)
+
+    writer.enqueue('Leads!A:M', ['lead'])
+    assert writer.flush() == 1
+    assert sleeps[0] == 7.0
+    assert 0.5 <= sleeps[1] <= 2.0
+    assert writer.stats['retries'] == 2
+
+
+def test_failed_batches_keep_their_place_in_the_queue():
+    service = FakeSheetsService(errors=[http_error(503)] * 2)
+    writer, _ = make_writer(service, max_retries=1)
+
+    writer.enqueue('Leads!A:M', ['first'])
+    writer.enqueue('Leads!A:M', ['second'])
+    assert writer.flush() == 0
+    assert writer.pending() == 2
+
+    writer.enqueue('Leads!A:M', ['third'])
+    assert writer.flush() == 3
+    assert service.appends == [('Leads!A:M', [['first'], ['second'], ['third']])]
+
+
+def test_non_retryable_errors_are_not_retried():
+    service = FakeSheetsService(errors=[http_error(400)])
+    writer, sleeps = make_writer(service)
+
+    writer.enqueue('Leads!A:M', ['bad'])
+    assert writer.flush() == 0
+    assert sleeps == []
+
+    # The rejected batch is set aside instead of blocking the queue
+    assert writer.pending() == 0
+    assert writer.stats['dropped'] == 1
+    assert [(range_name, rows) for range_name, rows, _ in writer.dead_letters] == [('Leads!A:M', [['bad']])]
+
+    writer.enqueue('Leads!A:M', ['good'])
+    assert writer.flush() == 1
+    assert service.appends == [('Leads!A:M', [['good']])]
+
+
+def test_connection_errors_are_retried_and_never_lose_rows():
+    service = FakeSheetsService(errors=[ConnectionResetError(), TimeoutError()])
+    writer, sleeps = make_writer(service)
+
+    writer.enqueue('Leads!A:M', ['lead'])
+    assert writer.flush() == 1
+    assert len(sleeps) == 2 and writer.stats['retries'] == 2
+
+    service.errors = [ConnectionResetError()] * 2
+    writer, _ = make_writer(service, max_retries=1)
+    writer.enqueue('Leads!A:M', ['kept'])
+    assert writer.flush() == 0
+    assert writer.pending() == 1 and not writer.dead_letters
+
+    # Anything unexpected puts the rows back before propagating
+    service.errors = [ValueError("bad response")]
+    with pytest.raises(ValueError):
+        writer.flush()
+    assert writer.pending() == 1
+    assert writer.flush() == 1
+    assert service.appends[-1] == ('Leads!A:M', [['kept']])
+
+
+def test_close_logs_a_failing_final_flush():
+    # Fails both the flusher thread's last run and the final flush
+    service = FakeSheetsService(errors=[ValueError("boom")] * 2)
+    writer = SheetsBatchWriter(service, 'sheet-id', flush_interval=60)
+    writer.enqueue('Leads!A:M', ['lead'])
+
+    writer.close()
+    assert writer.pending() == 1
+
+
+def test_queues_are_bounded():
+    writer, _ = make_writer(FakeSheetsService(), max_queue_size=2)
+
+    assert writer.enqueue('Leads!A:M', [1])
+    assert writer.enqueue('Leads!A:M', [2])
+    assert not writer.enqueue('Leads!A:M', [3])
+    assert writer.stats['rejected'] == 1
+
+
+def test_background_thread_flushes_full_batches():
+    service = FakeSheetsService()
+    writer = SheetsBatchWriter(service, 'sheet-id', batch_size=2, flush_interval=60)
+
+    writer.enqueue('Leads!A:M', ['a'])
+    writer.enqueue('Leads!A:M', ['b'])
+    writer.enqueue('Leads!A:M', ['c'])
+    writer.close()
+
+    assert [row for _, rows in service.appends for row in rows] == [['a'], ['b'], ['c']]
+
+
+@patch('integrations.google_sheets_api.Credentials')
+@patch('integrations.google_sheets_api.build')
+def test_integration_batches_with_the_configured_size(mock_build, mock_creds, monkeypatch):
+    mock_build.return_value = FakeSheetsService()
+    monkeypatch.setenv('GOOGLE_SHEETS_BATCH_SIZE', '25')
+    integration = GoogleSheetsIntegration('credentials.json', 'sheet-id')
+    assert integration.writer.batch_size == 25
+    integration.close()
+
+    monkeypatch.setenv('GOOGLE_SHEETS_BATCH_SIZE', '1')
+    assert GoogleSheetsIntegration('credentials.json', 'sheet-id').writer is None
+
+
+def test_batch_size_falls_back_to_the_deployment_config(tmp_path, monkeypatch):
+    monkeypatch.delenv('GOOGLE_SHEETS_BATCH_SIZE', raising=False)
+    config = tmp_path / 'production-config.yaml'
+    config.write_text('google_sheets:\n  batch_size: 40\n')
+
+    assert configured_batch_size(str(config)) == 40
+    assert configured_batch_size(str(tmp_path / 'missing.yaml')) == 100
+    monkeypatch.setenv('GOOGLE_SHEETS_BATCH_SIZE', '7')
+    assert configured_batch_size(str(config)) == 7
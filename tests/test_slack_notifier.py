@@ -0,0 +1,122 @@
+"""
+Tests for the async Slack notifier: concurrency limits, 429 retries and the shared session.
+"""
+
+import asyncio
+
+from aiohttp import web
+from slack_sdk.errors import SlackApiError
+
+from integrations.slack_notifications import SlackNotifier
+
+
+class FakeResponse(dict):
+    """Minimal SlackResponse: dict access plus status code and headers."""
+
+    def __init__(self, status_code, headers, data):
+        super().__init__(data)
+        self.status_code = status_code
+        self.headers = headers
+
+
+class FakeAsyncClient:
+    """Stands in for AsyncWebClient, tracking messages in flight per channel."""
+
+    def __init__(self, rate_limited=0, retry_after='0'):
+        self.session = None
+        self.calls = []
+        self.in_flight = {}
+        self.peak = {}
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+
+    async def chat_postMessage(self, channel, **kwargs):
+        self.calls.append(channel)
+        if self.rate_limited:
+            self.rate_limited -= 1
+            response = FakeResponse(429, {'Retry-After': self.retry_after}, {'error': 'ratelimited'})
+            raise SlackApiError('ratelimited', response)
+
+        self.in_flight[channel] = self.in_flight.get(channel, 0) + 1
+        self.peak[channel] = max(self.peak.get(channel, 0), self.in_flight[channel])
+        await asyncio.sleep(0.01)
+        self.in_flight[channel] -= 1
+        return {'ok': True, 'ts': str(len(self.calls))}
+
+
+def make_notifier(client, **kwargs):
+    notifier = SlackNotifier(None, **kwargs)
+    notifier.client = client
+    return notifier
+
+
+def test_lead_burst_is_sent_concurrently_within_channel_limit():
+    client = FakeAsyncClient()
+    notifier = make_notifier(client, max_concurrency_per_channel=3)
+    leads = [{'customer_name': f'Lead {i}', 'lead_score': 90} for i in range(9)]
+
+    async def run():
+        async with notifier:
+            results = await notifier.notify_high_priority_leads(leads)
+            assert client.session is notifier._session
+            return results
+
+    assert asyncio.run(run()) == [True] * 9
+    assert client.peak['#sales-alerts'] == 3
+
+
+def test_rate_limited_messages_are_retried():
+    client = FakeAsyncClient(rate_limited=2)
+    notifier = make_notifier(client, max_retries=2)
+
+    async def run():
+        async with notifier:
+            return await notifier.notify_technical_escalation({'issue_severity': 'HIGH'})
+
+    assert asyncio.run(run()) is True
+    assert client.calls == ['#technical-support'] * 3
+
+
+def test_rate_limit_gives_up_after_max_retries():
+    client = FakeAsyncClient(rate_limited=5)
+    notifier = make_notifier(client, max_retries=1)
+
+    async def run():
+        async with notifier:
+            return await notifier.notify_daily_summary({})
+
+    assert asyncio.run(run()) is False
+    assert len(client.calls) == 2
+
+
+def test_webhook_reuses_one_session_and_honours_retry_after():
+    requests = []
+
+    async def hook(request):
+        requests.append(await request.json())
+        if len(requests) == 1:
+            return web.Response(status=429, headers={'Retry-After': '0'})
+        return web.Response(text='ok')
+
+    async def run():
+        app = web.Application()
+        app.router.add_post('/hook', hook)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = runner.addresses[0][1]
+
+        notifier = SlackNotifier(None, f'http://127.0.0.1:{port}/hook')
+        try:
+            first = await notifier.notify_webhook('hello', {'lead_id': 1})
+            session = notifier._session
+            second = await notifier.notify_webhook('again', {'lead_id': 2})
+            assert notifier._session is session
+            return first, second
+        finally:
+            await notifier.close()
+            await runner.cleanup()
+
+    assert asyncio.run(run()) == (True, True)
+    assert [r['text'] for r in requests] == ['hello', 'hello', 'again']
@@ -0,0 +1,126 @@
+"""
+Tests for promoting reviewed solutions into the live knowledge bases.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Integrations use flat imports, mirror web_interface.py
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'integrations'))
+
+from search_index import InvertedIndex
+from solution_promotion import PromotionPipeline
+from techcorp_warp_ai import TechCorpKnowledgeBase
+from warpgpt_2_0 import HybridKnowledgeBase
+
+
+def make_pipeline(tmp_path):
+    techcorp_kb = TechCorpKnowledgeBase(data_dir=str(tmp_path))
+    warpgpt_kb = HybridKnowledgeBase(str(tmp_path))
+    pipeline = PromotionPipeline([techcorp_kb, warpgpt_kb], techcorp_kb.solutions_journal, interval=60)
+    return techcorp_kb, warpgpt_kb, pipeline
+
+
+def test_approved_solutions_reach_both_knowledge_bases(tmp_path):
+    techcorp_kb, warpgpt_kb, pipeline = make_pipeline(tmp_path)
+    approved = techcorp_kb.log_solution("Kafka consumer lag keeps growing",
+                                        "Check lag: `kafka-consumer-groups --describe`\nAdd partitions", "messaging")
+    rejected = techcorp_kb.log_solution("Printer jammed", "Turn it off and on", "hardware")
+    waiting = techcorp_kb.log_solution("Slow laptop", "Close some tabs")
+
+    assert pipeline.review(approved, "approved", reviewer="ops")["status"] == "approved"
+    assert pipeline.review(rejected, "rejected")["status"] == "rejected"
+    assert pipeline.review("sol-404", "approved") is None
+    with pytest.raises(ValueError):
+        pipeline.review(waiting, "promoted")
+
+    versions = (techcorp_kb.version, warpgpt_kb.version)
+    assert pipeline.promote_approved() == [approved]
+    assert (techcorp_kb.version, warpgpt_kb.version) == (versions[0] + 1, versions[1] + 1)
+    assert pipeline.promote_approved() == []
+
+    assert techcorp_kb.search("kafka consumer lag")[0]["id"] == approved
+    assert techcorp_kb.knowledge_base[approved]["solution"] == [
+        "Check lag: `kafka-consumer-groups --describe`", "Add partitions"]
+    results, _ = warpgpt_kb.hybrid_search("kafka consumer lag", {})
+    assert results[0]["id"] == approved
+    assert rejected not in techcorp_kb.knowledge_base
+    assert [s["status"] for s in techcorp_kb.query_solutions()] == ["promoted", "rejected", "pending_review"]
+
+    # Promoted entries are persisted, not only swapped in
+    techcorp_kb.solutions_journal.close()
+    assert approved in TechCorpKnowledgeBase(data_dir=str(tmp_path)).knowledge_base
+    assert approved in HybridKnowledgeBase(str(tmp_path)).knowledge_base
+
+
+def test_searches_keep_reading_the_version_they_started_with(tmp_path):
+    kb = HybridKnowledgeBase(str(tmp_path))
+    before = kb.snapshot
+    results_before, _ = kb.hybrid_search("docker container won't start", {})
+
+    kb.apply_changes({"docker-002": {"title": "Docker container won't start after upgrade", "category": "containers",
+                                     "confidence": 0.99, "solution": ["Downgrade"], "tags": ["docker"]}},
+                     deletes=["docker-001"])
+
+    assert "docker-001" in before.entries and "docker-002" not in before.entries
+    assert [r["id"] for r in kb.hybrid_search("docker container won't start", {}, snapshot=before)[0]] == [
+        r["id"] for r in results_before]
+    assert "docker-001" not in [r["id"] for r in kb.hybrid_search("docker container won't start", {})[0]]
+
+
+def test_index_copies_do_not_share_changes():
+    index = InvertedIndex({"title": 1.0})
+    index.add("a", {"title": "docker restart"})
+    index.add("b", {"title": "docker logs"})
+
+    copy = index.copy()
+    copy.remove("a")
+    copy.add("c", {"title": "docker prune"})
+    index.add("d", {"title": "restart nginx"})
+
+    assert sorted(doc_id for doc_id, _ in index.search("docker")) == ["a", "b"]
+    assert sorted(doc_id for doc_id, _ in copy.search("docker")) == ["b", "c"]
+    assert [doc_id for doc_id, _ in copy.search("restart")] == []
+
+
+def test_background_promotion_during_concurrent_searches(tmp_path):
+    techcorp_kb, warpgpt_kb, pipeline = make_pipeline(tmp_path)
+    solution_ids = [techcorp_kb.log_solution(f"Runbook {i} for flux capacitor", f"Step {i}") for i in range(20)]
+
+    errors = []
+    stop = threading.Event()
+
+    def search():
+        while not stop.is_set():
+            try:
+                snapshot = techcorp_kb.snapshot
+                for result in techcorp_kb.search("flux capacitor runbook", limit=50):
+                    assert result["entry"]["title"]
+                assert len(snapshot.entries) == len(snapshot.index)
+            except Exception as e:
+                errors.append(e)
+
+    readers = [threading.Thread(target=search) for _ in range(2)]
+    for reader in readers:
+        reader.start()
+    pipeline.start()
+    for solution_id in solution_ids:
+        pipeline.review(solution_id, "approved")
+
+    deadline = time.time() + 10
+    while len(techcorp_kb.search("flux capacitor", limit=50)) < 20 and time.time() < deadline:
+        time.sleep(0.01)
+    stop.set()
+    pipeline.stop()
+    for reader in readers:
+        reader.join()
+
+    assert not errors
+    assert len(techcorp_kb.search("flux capacitor", limit=50)) == 20
+    assert pipeline.get_status()["solutions"] == {"promoted": 20}
+    results, _ = warpgpt_kb.hybrid_search("flux capacitor", {}, limit=50)
+    assert len(results) == 20
@@ -0,0 +1,134 @@
+"""
+Tests for the append-only solutions journal.
+"""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Integrations use flat imports, mirror web_interface.py
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'integrations'))
+
+import solutions_journal
+from solutions_journal import SolutionsJournal
+from techcorp_warp_ai import TechCorpKnowledgeBase
+
+
+def add_solutions(data_dir, count):
+    journal = SolutionsJournal(data_dir)
+    journal.load()
+    ids = [journal.add({"problem": f"p{i}", "status": "pending_review", "category": "general"})["id"]
+           for i in range(count)]
+    journal.close()
+    return ids
+
+
+def test_ids_are_unique_across_processes_and_threads(tmp_path):
+    data_dir = str(tmp_path)
+    with ProcessPoolExecutor(max_workers=3) as pool:
+        process_ids = [i for ids in pool.map(add_solutions, [data_dir] * 3, [20] * 3) for i in ids]
+
+    journal = SolutionsJournal(data_dir)
+    journal.load()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        thread_ids = list(pool.map(lambda i: journal.add({"problem": f"t{i}"})["id"], range(20)))
+
+    ids = process_ids + thread_ids
+    assert sorted(ids) == [f"sol-{n:03d}" for n in range(1, 81)]
+    assert [record["id"] for record in journal.records] == sorted(ids)
+    journal.close()
+
+
+def test_ids_continue_after_a_restart_and_the_legacy_log(tmp_path):
+    legacy = [{"id": "sol-001", "problem": "old", "status": "approved", "category": "network"},
+              {"id": "sol-002", "problem": "older", "status": "pending_review", "category": "network"}]
+    with open(tmp_path / "solutions_log.json", "w") as f:
+        json.dump(legacy, f)
+
+    kb = TechCorpKnowledgeBase(data_dir=str(tmp_path))
+    assert kb.solutions == legacy
+    assert kb.log_solution("VPN drops", "Renew the lease", "network") == "sol-003"
+    kb.solutions_journal.close()
+
+    # The legacy file is only read once; later starts replay the journal
+    os.remove(tmp_path / "solutions_log.json")
+    kb = TechCorpKnowledgeBase(data_dir=str(tmp_path))
+    assert [s["id"] for s in kb.solutions] == ["sol-001", "sol-002", "sol-003"]
+    assert kb.log_solution("Disk full", "Rotate logs") == "sol-004"
+    kb.solutions_journal.close()
+
+
+def test_reviewer_queries_follow_status_changes(tmp_path):
+    journal = SolutionsJournal(str(tmp_path))
+    journal.load()
+    for i, category in enumerate(["network", "database", "network", "security"]):
+        journal.add({"problem": f"p{i}", "status": "pending_review", "category": category})
+    journal.update("sol-001", {"status": "approved"})
+    journal.update("sol-003", {"status": "rejected"})
+    assert journal.update("sol-404", {"status": "approved"}) is None
+
+    assert [s["id"] for s in journal.query(status="pending_review")] == ["sol-002", "sol-004"]
+    assert [s["id"] for s in journal.query(category="network")] == ["sol-001", "sol-003"]
+    assert [s["id"] for s in journal.query(status="approved", category="network")] == ["sol-001"]
+    assert journal.query(status="approved", category="security") == []
+    assert len(journal.query(limit=2)) == 2
+    assert journal.counts()["status"] == {"pending_review": 2, "approved": 1, "rejected": 1}
+
+    # Another process's changes are picked up by the next query
+    other = SolutionsJournal(str(tmp_path))
+    other.load()
+    other.update("sol-002", {"status": "approved"})
+    other.close()
+    assert [s["id"] for s in journal.query(status="approved")] == ["sol-001", "sol-002"]
+    journal.close()
+
+    reopened = SolutionsJournal(str(tmp_path))
+    assert [s["status"] for s in reopened.load()] == ["approved", "approved", "rejected", "pending_review"]
+    reopened.close()
+
+
+def test_fsync_is_batched_and_torn_lines_dropped(tmp_path, monkeypatch):
+    syncs = []
+    monkeypatch.setattr(solutions_journal.os, "fsync", lambda fd: syncs.append(fd))
+
+    journal = SolutionsJournal(str(tmp_path), sync_every=5, sync_interval=float("inf"))
+    journal.load()
+    for i in range(12):
+        journal.add({"problem": f"p{i}"})
+    assert len(syncs) == 2
+    journal.close()
+    assert len(syncs) == 3
+
+    with open(journal.path, "a") as f:
+        f.write('{"op": "add", "data": {"id": "sol-0')
+    reopened = SolutionsJournal(str(tmp_path))
+    assert len(reopened.load()) == 12
+    assert reopened.add({"problem": "next"})["id"] == "sol-013"
+    reopened.close()
+    with open(journal.path) as f:
+        assert all(json.loads(line) for line in f)
+
+
+def test_a_lone_append_is_synced_once_the_interval_passes(tmp_path, monkeypatch):
+    syncs = []
+    monkeypatch.setattr(solutions_journal.os, "fsync", lambda fd: syncs.append(fd))
+    now = [1000.0]
+
+    journal = SolutionsJournal(str(tmp_path), sync_every=100, sync_interval=0.2, clock=lambda: now[0])
+    journal.load()
+    journal.add({"problem": "only one"})
+
+    # No later append comes along; the interval is measured on the journal's clock
+    time.sleep(0.5)
+    assert syncs == []
+
+    now[0] += 0.2
+    deadline = time.monotonic() + 5
+    while not syncs and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(syncs) == 1
+
+    journal.close()
+    assert len(syncs) == 1
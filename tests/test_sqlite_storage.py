@@ -0,0 +1,100 @@
+"""
+Tests for the SQLite persistence backend.
+"""
+
+import os
+import shutil
+import sys
+
+# Integrations use flat imports, mirror web_interface.py
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'integrations'))
+
+from conversation_history import ConversationHistoryManager
+from conversation_storage import JSONFileStorage
+from mock_services import MockGoogleSheets, MockSlack
+from sqlite_storage import SQLiteStorage
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+def seed_data_dir(tmp_path, name="data"):
+    data_dir = tmp_path / name
+    data_dir.mkdir()
+    for name in ("conversation_history.json", "learning_patterns.json", "response_feedback.json"):
+        shutil.copy(os.path.join(DATA_DIR, name), data_dir / name)
+    return str(data_dir)
+
+
+def make_manager(data_dir, db_path, **kwargs):
+    return ConversationHistoryManager(data_dir, storage=SQLiteStorage(data_dir, path=db_path), **kwargs)
+
+
+def test_seeds_from_json_and_round_trips(tmp_path):
+    data_dir = seed_data_dir(tmp_path)
+    db_path = str(tmp_path / "chatbot.db")
+
+    manager = make_manager(data_dir, db_path)
+    legacy = JSONFileStorage(data_dir).load()
+    assert manager.conversation_history == legacy["conversation_history"]
+    assert manager.storage.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    conv_id = manager.add_conversation("docker keeps crashing", "Try restarting it", session_id="s1")
+    manager.add_feedback(conv_id, "great", 5)
+    manager.close()
+
+    reloaded = make_manager(data_dir, db_path)
+    assert reloaded.conversation_history == manager.conversation_history
+    assert reloaded.feedback_data == manager.feedback_data
+    assert reloaded.learning_patterns == manager.learning_patterns
+    assert reloaded.get_recent_conversations(1, "s1")[0]["response_quality"] == 5
+
+
+def test_sql_queries_match_the_in_memory_indexes(tmp_path):
+    data_dir = seed_data_dir(tmp_path)
+    manager = make_manager(data_dir, str(tmp_path / "chatbot.db"))
+    memory_dir = seed_data_dir(tmp_path, "memory")
+    memory = ConversationHistoryManager(memory_dir, storage=JSONFileStorage(memory_dir))
+
+    first = manager.conversation_history[0]
+    for m in (manager, memory):
+        m.add_feedback(first["conversation_id"], "ok", 4)
+
+    assert manager.get_conversation_stats() == memory.get_conversation_stats()
+    for session_id in [None, first["session_id"], "missing"]:
+        for limit in (1, 5, 50):
+            assert manager.get_recent_conversations(limit, session_id) == \
+                memory.get_recent_conversations(limit, session_id)
+
+
+def test_pattern_evictions_are_persisted(tmp_path):
+    data_dir = str(tmp_path)
+    db_path = str(tmp_path / "chatbot.db")
+    manager = make_manager(data_dir, db_path, max_keywords=4)
+
+    for text in ["docker docker docker", "kubernetes kubernetes", "nginx", "postgres redis"]:
+        manager.add_conversation(text, f"{text} answer")
+
+    reloaded = make_manager(data_dir, db_path, max_keywords=4)
+    assert reloaded.learning_patterns == manager.learning_patterns
+    assert reloaded.storage.conn.execute("SELECT COUNT(*) FROM pattern_responses").fetchone()[0] == 2
+
+
+def test_mock_services_write_batches_to_tables(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'chatbot.db'}")
+
+    sheets = MockGoogleSheets(str(tmp_path / "leads.json"), backend="sqlite")
+    slack = MockSlack(str(tmp_path / "notifications.json"), backend="sqlite")
+    sheets.add_lead({"name": "Ada", "email": "ada@example.com", "lead_score": 90})
+    slack.send_notification("High priority lead", priority="high")
+    sheets.store.close()
+    slack.store.close()
+
+    reopened = MockGoogleSheets(str(tmp_path / "leads.json"), backend="sqlite")
+    assert [lead["email"] for lead in reopened.get_leads()] == ["ada@example.com"]
+    assert tuple(reopened.store.conn.execute("SELECT customer_name, lead_score FROM leads").fetchone()) == ("Ada", 90)
+    assert not os.path.exists(tmp_path / "leads.json")
+    reopened.store.close()
+
+    slack = MockSlack(str(tmp_path / "notifications.json"), backend="sqlite")
+    assert slack.get_notifications()[0]["priority"] == "high"
+    slack.store.close()
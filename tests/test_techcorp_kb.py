@@ -0,0 +1,85 @@
+"""
+Tests for the TechCorp knowledge base index and per-entry persistence.
+"""
+
+import json
+import os
+import random
+import sys
+
+# Integrations use flat imports, mirror web_interface.py
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'integrations'))
+
+from kb_journal import read_knowledge_base
+from search_index import tokenize
+from techcorp_warp_ai import TechCorpKnowledgeBase
+
+
+def reference_search(knowledge_base, query, limit=3):
+    # Full scan with a stable sort, as search() did before the index
+    results = []
+    for kb_id, entry in knowledge_base.items():
+        tokens = set(tokenize(" ".join([entry.get("title", "")] + entry.get("tags", []) + entry.get("solution", []))))
+        score = sum(1 for word in tokenize(query) if word in tokens)
+        if score > 0:
+            results.append({"id": kb_id, "score": score, "entry": entry})
+    results.sort(key=lambda x: x["score"], reverse=True)
+    return results[:limit]
+
+
+def test_indexed_search_matches_a_full_scan(tmp_path):
+    kb = TechCorpKnowledgeBase(data_dir=str(tmp_path))
+    rng = random.Random(3)
+    words = ["vpn", "database", "timeout", "docker", "ssl", "certificate", "restart", "check", "api", "connection"]
+    for i in range(40):
+        kb.upsert_entry(f"gen-{i}", {"title": " ".join(rng.sample(words, 2)), "category": "generated",
+                                     "solution": [f"Check `{rng.choice(words)}`"], "tags": rng.sample(words, 2)})
+    kb.delete_entry("gen-7")
+    kb.upsert_entry("db-15", dict(kb.knowledge_base["db-15"], tags=["vpn"]))
+
+    for _ in range(100):
+        query = " ".join(rng.choice(words + ["the", "nothing"]) for _ in range(rng.randint(1, 5)))
+        assert kb.search(query) == reference_search(kb.knowledge_base, query)
+    assert kb.search("zzz") == []
+
+
+def test_edits_are_journaled_and_survive_a_reload(tmp_path):
+    kb = TechCorpKnowledgeBase(data_dir=str(tmp_path))
+    with open(kb.kb_file) as f:
+        snapshot = f.read()
+
+    kb.upsert_entry("k8s-01", {"title": "Pod CrashLoopBackOff", "category": "containers",
+                               "solution": ["Inspect: `kubectl describe pod`"], "tags": ["kubernetes"]})
+    kb.upsert_entry("vpn-22", dict(kb.knowledge_base["vpn-22"], title="VPN Tunnel Drops"))
+    assert kb.delete_entry("api-11") and not kb.delete_entry("api-11")
+
+    # The knowledge base file is untouched, one line per change is appended
+    with open(kb.kb_file) as f:
+        assert f.read() == snapshot
+    with open(kb.journal.changes_file) as f:
+        assert len(f.readlines()) == 3
+
+    reloaded = TechCorpKnowledgeBase(data_dir=str(tmp_path))
+    assert reloaded.knowledge_base == kb.knowledge_base
+    assert list(reloaded.knowledge_base) == list(kb.knowledge_base)
+    assert reloaded.search("kubernetes")[0]["id"] == "k8s-01"
+    assert reloaded.search("tunnel")[0]["id"] == "vpn-22"
+    assert read_knowledge_base(kb.kb_file) == kb.knowledge_base
+
+
+def test_journal_is_compacted_and_torn_writes_dropped(tmp_path):
+    kb = TechCorpKnowledgeBase(data_dir=str(tmp_path), compact_after=3)
+    for i in range(4):
+        kb.upsert_entry(f"new-{i}", {"title": f"Entry {i}", "solution": [], "tags": []})
+
+    # The third change folded everything into the file
+    assert kb.journal.pending == 1
+    with open(kb.kb_file) as f:
+        assert "new-2" in json.load(f)
+
+    with open(kb.journal.changes_file, "a") as f:
+        f.write('{"op": "delete", "id": "new-0"')
+    reloaded = TechCorpKnowledgeBase(data_dir=str(tmp_path), compact_after=3)
+    assert "new-0" in reloaded.knowledge_base and "new-3" in reloaded.knowledge_base
+    with open(kb.journal.changes_file) as f:
+        assert f.read().endswith("\n")
@@ -0,0 +1,64 @@
+"""
+Tests for the shared urgency detector.
+"""
+
+import json
+import os
+import random
+import sys
+
+# Integrations use flat imports, mirror web_interface.py
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'integrations'))
+
+from techcorp_warp_ai import TechCorpWarpAI
+from urgency import PhraseMatcher, UrgencyDetector, load_urgency_detector
+from warpgpt_2_0 import WarpGPT2
+
+
+def test_matcher_finds_the_same_phrases_as_substring_checks():
+    # Overlapping phrases, phrases inside other phrases and shared prefixes
+    phrases = ["down", "api down", "own", "do", "not responding", "respond", "a", "aa", "aaa", "error"]
+    matcher = PhraseMatcher(phrases)
+    rng = random.Random(7)
+    words = ["api", "down", "not", "responding", "aaa", "error", "do", "owner", " ", "x"]
+    for _ in range(500):
+        text = "".join(rng.choice(words) + rng.choice(["", " "]) for _ in range(rng.randint(0, 12)))
+        found = matcher.find_all(text)
+        assert sorted(found) == sorted(p for p in phrases if p in text)
+        assert len(found) == len(set(found))
+
+
+def test_severity_is_the_highest_matched_level():
+    detector = UrgencyDetector({"critical": ["outage"], "high": ["Not Working"], "medium": ["error"]})
+    assert detector.assess("Login NOT WORKING, error 500") == {
+        "urgent": True, "severity": "high", "matches": ["not working", "error"]}
+    assert detector.assess("error during an outage")["severity"] == "critical"
+    assert detector.assess("all good") == {"urgent": False, "severity": None, "matches": []}
+
+
+def test_keywords_are_read_from_the_config_file(tmp_path, monkeypatch):
+    path = tmp_path / "urgency.json"
+    path.write_text(json.dumps({"profiles": {"techcorp": {"high": ["pager"]}}}))
+    monkeypatch.setenv("URGENCY_KEYWORDS_FILE", str(path))
+
+    ai = TechCorpWarpAI()
+    assert ai.assess_urgency("the pager went off")["severity"] == "high"
+    assert not ai.detect_urgency("production is down")
+
+    # A missing profile falls back to the built-in keywords
+    assert load_urgency_detector("warpgpt", {"critical": ["outage"]}).assess("outage")["urgent"]
+
+
+def test_each_message_is_assessed_once(tmp_path, monkeypatch):
+    ai = TechCorpWarpAI()
+    calls = []
+    assess = ai.urgency.assess
+    monkeypatch.setattr(ai.urgency, "assess", lambda text: calls.append(text) or assess(text))
+
+    ai.conversation_memory = [{"user": "a", "ai": "b"}, {"user": "c", "ai": "d"}]
+    response = ai.process_message("xyzzy quux is broken")
+    assert "URGENT ISSUE DETECTED" in response and len(calls) == 1
+
+    warpgpt = WarpGPT2(data_dir=str(tmp_path), cache_size=0)
+    assert "CRITICAL ISSUE" in warpgpt.process_warp_request("Database down since noon")
+    assert warpgpt.assess_urgency("Database down since noon")["matches"] == ["database down"]
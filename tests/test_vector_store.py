@@ -0,0 +1,120 @@
+"""
+Tests for the local dense-vector retrieval engine.
+"""
+
+import os
+import shutil
+import sys
+
+import numpy as np
+
+# Integrations use flat imports, mirror web_interface.py
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'integrations'))
+
+import mock_services
+from mock_services import query_vector_db
+from vector_store import HashedNgramEmbedder, VectorIndex
+
+DOCUMENTS = [
+    {"id": "faq_003", "source": "faq", "category": "pricing",
+     "text": "How much do your products cost? pricing cost budget", "answer": "Plans start at $99/month."},
+    {"id": "docker-001", "source": "warpgpt_kb", "category": "containers",
+     "text": "Docker Container Startup Issues docker container startup", "answer": "Docker Container Startup Issues"},
+    {"id": "ssl-001", "source": "warpgpt_kb", "category": "security",
+     "text": "SSL Certificate Errors ssl certificate https tls", "answer": "SSL Certificate Errors"},
+]
+
+
+def test_embedder_is_deterministic_and_normalised():
+    embedder = HashedNgramEmbedder(dim=64)
+    first = embedder.embed(["docker container", ""])
+    second = HashedNgramEmbedder(dim=64).embed(["docker container", ""])
+
+    assert first.dtype == np.float32
+    assert np.array_equal(first, second)
+    assert np.isclose(np.linalg.norm(first[0]), 1.0)
+    assert not first[1].any()
+
+
+def test_search_ranks_by_cosine_and_reuses_mapped_matrix(tmp_path):
+    index = VectorIndex(str(tmp_path))
+    index.open(DOCUMENTS)
+    assert isinstance(index.matrix, np.memmap)
+
+    matches = index.search("docker container won't start", k=2)
+    assert matches[0]["id"] == "docker-001"
+    assert matches[0]["score"] >= matches[1]["score"]
+
+    # Reopening with the same documents maps the existing file instead of rebuilding
+    mtime = os.path.getmtime(index.matrix_file)
+    reopened = VectorIndex(str(tmp_path))
+    reopened.open(DOCUMENTS)
+    assert os.path.getmtime(reopened.matrix_file) == mtime
+    assert reopened.search("ssl certificate expired", k=1)[0]["id"] == "ssl-001"
+
+
+def test_filters_minimum_confidence_and_batches(tmp_path):
+    index = VectorIndex(str(tmp_path))
+    index.open(DOCUMENTS)
+
+    filtered = index.search("docker container", k=3, filters={"source": "faq"})
+    assert [m["id"] for m in filtered] == ["faq_003"]
+
+    assert index.search("docker container", k=3, minimum_confidence=0.99) == []
+
+    batch = index.search_batch(["ssl certificate", "how much does it cost"], k=1)
+    assert [matches[0]["id"] for matches in batch] == ["ssl-001", "faq_003"]
+
+
+def use_repo_data(tmp_path, monkeypatch):
+    """Point mock_services at a copy of the repository's data directory"""
+    data_dir = tmp_path / "repo" / "data"
+    shutil.copytree(mock_services.DATA_DIR, data_dir, ignore=shutil.ignore_patterns("vector_index"))
+    monkeypatch.setattr(mock_services, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(mock_services, "_vector_index", None)
+    return data_dir
+
+
+def test_vector_index_paths_do_not_depend_on_the_working_directory(tmp_path, monkeypatch):
+    data_dir = use_repo_data(tmp_path, monkeypatch)
+    elsewhere = tmp_path / "elsewhere"
+    elsewhere.mkdir()
+    monkeypatch.chdir(elsewhere)
+
+    index = mock_services.get_vector_index()
+    assert index.index_dir == str(data_dir / "vector_index")
+    assert {doc["source"] for doc in index.documents} == {"faq", "warpgpt_kb", "techcorp_kb"}
+    assert not (elsewhere / "data").exists()
+
+
+def test_query_vector_db_single_and_batched(tmp_path, monkeypatch):
+    use_repo_data(tmp_path, monkeypatch)
+
+    result = query_vector_db("How much do your products cost?", {}, 0.0)
+    assert result["matches"][0]["id"] == "faq_003"
+    assert result["top_match"] == result["matches"][0]["answer"]
+    assert result["confidence"] == result["matches"][0]["score"]
+    assert len(result["matches"]) == 3
+
+    queries = ["How much do your products cost?", "ssl certificate expired"]
+    batch = query_vector_db(queries, {}, 0.0, top_k=2)
+    assert [r["matches"][0]["id"] for r in batch] == ["faq_003", "ssl-001"]
+    assert batch[0] == query_vector_db(queries[0], {}, 0.0, top_k=2)
+    assert all(len(r["matches"]) == 2 for r in batch)
+
+
+def test_query_vector_db_filters_and_minimum_confidence(tmp_path, monkeypatch):
+    use_repo_data(tmp_path, monkeypatch)
+
+    result = query_vector_db("ssl certificate expired", {"source": "faq"}, 0.0, top_k=5)
+    assert result["matches"] and all(m["source"] == "faq" for m in result["matches"])
+    result = query_vector_db("ssl certificate expired", {"source": "warpgpt_kb", "category": "security"}, 0.0)
+    assert [m["id"] for m in result["matches"]] == ["ssl-001"]
+
+    # A key documents do not have matches nothing rather than being ignored
+    assert query_vector_db("ssl certificate expired", {"priority": "high"}, 0.0) == {
+        "confidence": 0.0, "top_match": None, "matches": []}
+
+    best = query_vector_db("ssl certificate expired", {}, 0.0)["confidence"]
+    assert query_vector_db("ssl certificate expired", {}, best + 0.01)["matches"] == []
+    assert all(m["score"] >= 0.3 for m in query_vector_db("ssl certificate expired", {}, 0.3, top_k=10)["matches"])
@@ -0,0 +1,92 @@
+"""
+Tests for the pre-rendered WarpGPT solution steps.
+"""
+
+import os
+import re
+import sys
+
+# Integrations use flat imports, mirror web_interface.py
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'integrations'))
+
+from warpgpt_2_0 import WarpContext, WarpGPT2
+
+
+def terminal(command):
+    return WarpContext.format_warp_terminal(command)
+
+
+def reference_verified(result, kb_version):
+    # format_verified_solution as it was before pre-rendering
+    entry = result["entry"]
+    kb_id = result["id"]
+    response = f"✅ TechCorp Verified Fix (v{kb_version}):\n"
+    response += f"📋 Solution #{kb_id.upper()}: {entry['title']}\n\n"
+    for i, step in enumerate(entry["solution"], 1):
+        if step.startswith("⚠️"):
+            response += f"   {step}\n"
+        elif "`" in step and step.count("`") >= 2:
+            command_match = re.search(r'`([^`]+)`', step)
+            if command_match:
+                command = command_match.group(1)
+                description = step.replace(f"`{command}`", "").strip(": ")
+                response += f"   • Step {i}: {description}\n"
+                response += f"     {terminal(command)}\n"
+            else:
+                response += f"   • Step {i}: {step}\n"
+        else:
+            response += f"   • Step {i}: {step}\n"
+    response += f"\n📌 Confidence: {result['confidence']:.1%} | Category: {entry['category']}"
+    return response
+
+
+def reference_potential(result, confidence):
+    # Medium-confidence branch of process_warp_request before pre-rendering
+    entry = result["entry"]
+    response = f"🔍 Potential Solution (Confidence: {confidence:.1%}):\n"
+    response += f"From TechCorp KB (#{result['id']}):\n\n"
+    for step in entry["solution"]:
+        if "`" in step and step.count("`") >= 2:
+            command_match = re.search(r'`([^`]+)`', step)
+            if command_match:
+                command = command_match.group(1)
+                description = step.replace(f"`{command}`", "").strip(": ")
+                response += f"   • {description}\n"
+                response += f"     {terminal(command)}\n"
+            else:
+                response += f"   • {step}\n"
+        else:
+            response += f"   • {step}\n"
+    response += "\n⚠️ Please verify this solution in a test environment first."
+    return response
+
+
+ODD_STEPS = [
+    "⚠️ Back up first: `tar czf backup.tgz /etc`",
+    "Empty backticks `` here",
+    "Plain step without a command",
+    "Two commands: `systemctl stop app` then `systemctl start app`",
+]
+
+
+def test_rendered_steps_match_the_previous_formatting(tmp_path):
+    warpgpt = WarpGPT2(data_dir=str(tmp_path), cache_size=0)
+    warpgpt.kb.upsert_entry("odd-001", {"title": "Odd steps", "category": "misc", "confidence": 0.8,
+                                        "solution": ODD_STEPS, "tags": ["odd"]})
+
+    for kb_id, entry in warpgpt.kb.knowledge_base.items():
+        result = {"id": kb_id, "entry": entry, "confidence": entry["confidence"]}
+        assert warpgpt.format_verified_solution(result, "1.2.3") == reference_verified(result, "1.2.3")
+        assert warpgpt.format_potential_solution(result, 0.75) == reference_potential(result, 0.75)
+
+
+def test_changed_entries_are_rendered_again(tmp_path):
+    warpgpt = WarpGPT2(data_dir=str(tmp_path), cache_size=0)
+    entry = dict(warpgpt.kb.knowledge_base["vpn-001"], solution=["Reconnect: `nmcli con up vpn`"])
+    warpgpt.kb.upsert_entry("vpn-001", entry)
+    result = {"id": "vpn-001", "entry": entry, "confidence": 0.95}
+    assert terminal("nmcli con up vpn") in warpgpt.format_verified_solution(result, "2.1.0")
+
+    # An entry that is not the indexed version is rendered on the spot
+    other = dict(entry, solution=["Call the network team"])
+    assert "Call the network team" in warpgpt.format_verified_solution({**result, "entry": other}, "2.1.0")
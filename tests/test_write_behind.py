@@ -0,0 +1,124 @@
+"""
+Tests for write-behind persistence of mock leads and notifications.
+"""
+
+import json
+import os
+import sys
+import time
+
+# Integrations use flat imports, mirror web_interface.py
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'integrations'))
+
+import pytest
+
+from mock_services import MockGoogleSheets, MockSlack
+from write_behind import WriteBehindJSONList, WriteBehindList, read_json_records
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_append_does_not_write_until_batch_is_full(tmp_path):
+    path = str(tmp_path / "records.json")
+    store = WriteBehindJSONList(path, batch_size=3, flush_interval=60)
+
+    store.append({"n": 1})
+    store.append({"n": 2})
+    assert not os.path.exists(path)
+
+    store.append({"n": 3})
+    assert wait_for(lambda: store.flush_count == 1)
+    assert read_json_records(path) == [{"n": 1}, {"n": 2}, {"n": 3}]
+    store.close()
+
+
+def test_flushes_after_interval_and_on_close(tmp_path):
+    path = str(tmp_path / "records.json")
+    store = WriteBehindJSONList(path, batch_size=100, flush_interval=0.05)
+
+    store.append({"n": 1})
+    assert wait_for(lambda: store.flush_count == 1)
+    assert read_json_records(path) == [{"n": 1}]
+
+    closing = WriteBehindJSONList(str(tmp_path / "closing.json"), batch_size=100, flush_interval=60)
+    closing.append({"n": 2})
+    closing.close()
+    assert read_json_records(closing.path) == [{"n": 2}]
+    store.close()
+
+
+def test_mock_services_persist_through_writer(tmp_path):
+    sheets = MockGoogleSheets(str(tmp_path / "leads.json"))
+    slack = MockSlack(str(tmp_path / "notifications.json"))
+
+    sheets.add_lead({"name": "Ada", "email": "ada@example.com", "lead_score": 90})
+    slack.send_notification("High-priority lead: Ada", "high")
+    assert sheets.get_leads()[0]["name"] == "Ada"
+
+    sheets.store.close()
+    slack.store.close()
+    assert MockGoogleSheets(str(tmp_path / "leads.json")).get_leads()[0]["email"] == "ada@example.com"
+    assert MockSlack(str(tmp_path / "notifications.json")).get_notifications()[0]["priority"] == "high"
+
+
+def test_flushes_append_only_new_records(tmp_path):
+    path = str(tmp_path / "records.json")
+    store = WriteBehindJSONList(path, batch_size=100, flush_interval=60)
+    store.append({"n": 1})
+    store.flush()
+    with open(path) as f:
+        first = f.read()
+
+    store.append({"n": 2})
+    store.flush()
+    with open(path) as f:
+        assert f.read() == first + '{"n": 2}\n'
+
+    store.update({0: {"n": 10}})
+    assert read_json_records(path) == [{"n": 10}, {"n": 2}]
+    store.close()
+
+
+def test_legacy_lists_and_torn_lines_are_rewritten(tmp_path):
+    legacy = tmp_path / "legacy.json"
+    legacy.write_text(json.dumps([{"n": 1}, {"n": 2}], indent=2))
+    store = WriteBehindJSONList(str(legacy), batch_size=100, flush_interval=60)
+    assert store.records == [{"n": 1}, {"n": 2}]
+    store.append({"n": 3})
+    store.close()
+    assert legacy.read_text() == '{"n": 1}\n{"n": 2}\n{"n": 3}\n'
+
+    torn = tmp_path / "torn.json"
+    torn.write_text('{"n": 1}\n{"n": ')
+    store = WriteBehindJSONList(str(torn), batch_size=100, flush_interval=60)
+    assert store.records == [{"n": 1}]
+    store.append({"n": 2})
+    store.close()
+    assert read_json_records(str(torn)) == [{"n": 1}, {"n": 2}]
+
+
+def test_reload_keeps_records_not_yet_flushed(tmp_path):
+    sheets = MockGoogleSheets(str(tmp_path / "leads.json"))
+    sheets.store.flush_interval = 60
+    sheets.add_lead({"name": "Ada"})
+    sheets.load_data()
+
+    assert [lead["name"] for lead in sheets.get_leads()] == ["Ada"]
+    sheets.store.close()
+    assert [lead["name"] for lead in read_json_records(str(tmp_path / "leads.json"))] == ["Ada"]
+
+
+def test_subclasses_must_implement_the_storage_hooks():
+    class Incomplete(WriteBehindList):
+        def _read(self):
+            return []
+
+    with pytest.raises(TypeError):
+        Incomplete("incomplete")
@@ -12,34 +12,42 @@ from mock_services import enhanced_process_conversation, mock_sheets, mock_slack
 from conversation_history import conversation_manager
 from techcorp_warp_ai import techcorp_ai
 from warpgpt_2_0 import warpgpt
+from solution_promotion import promotion_pipeline
+from kb_watcher import kb_watcher
+from session_store import SessionStore
+from service_registry import services
 from datetime import datetime
 import json
 
 app = Flask(__name__)
 
-# Store conversation sessions
-sessions = {}
+# Store conversation sessions, bounded by count, age and size
+session_store = SessionStore(
+    max_sessions=int(os.getenv('SESSION_MAX_SESSIONS', 1000)),
+    ttl_seconds=int(os.getenv('SESSION_TIMEOUT_MINUTES', 30)) * 60,
+    max_messages=int(os.getenv('SESSION_MAX_MESSAGES', 50)),
+    max_bytes=int(os.getenv('SESSION_MAX_BYTES', 65536)),
+    spill_dir=os.getenv('SESSION_SPILL_DIR') or None
+)
+
+def warm_up_services():
+    """Build the lazily loaded services in the background when SERVICE_WARMUP is set"""
+    if os.getenv('SERVICE_WARMUP', 'false').lower() in ('1', 'true', 'yes'):
+        return services.warm_up()
+    return None
 
 @app.route('/')
 def index():
     """Main chatbot interface"""
     return render_template('chat.html')
 
-@app.route('/chat', methods=['POST'])
-def chat():
-    """Handle chat messages"""
-    data = request.json
+def handle_chat(data):
+    """Process one chat message and record it in the session"""
     user_input = data.get('message', '')
     session_id = data.get('session_id', 'default')
     
     # Get or create session
-    if session_id not in sessions:
-        sessions[session_id] = {
-            'messages': [],
-            'user_data': {}
-        }
-    
-    session = sessions[session_id]
+    session = session_store.get(session_id)
     
     # Check if this is a data collection message
     if data.get('collect_data'):
@@ -77,13 +85,18 @@ def chat():
             result = enhanced_process_conversation(user_input, session['user_data'], session_id)
     
     # Add to conversation history
-    session['messages'].append({
+    session_store.add_message(session_id, {
         'user': user_input,
         'bot': result['response'],
         'lead_score': result['lead_score']
     })
     
-    return jsonify(result)
+    return result
+
+@app.route('/chat', methods=['POST'])
+def chat():
+    """Handle chat messages"""
+    return jsonify(handle_chat(request.json))
 
 @app.route('/leads')
 def view_leads():
@@ -109,6 +122,16 @@ def conversation_history():
         'stats': conversation_manager.get_conversation_stats()
     })
 
+@app.route('/session-stats')
+def session_stats():
+    """Get session store counters"""
+    return jsonify(session_store.get_stats())
+
+@app.route('/services')
+def service_status():
+    """Which services are loaded and how long each took to start"""
+    return jsonify(services.status())
+
 @app.route('/feedback', methods=['POST'])
 def add_feedback():
     """Add feedback for a conversation"""
@@ -162,6 +185,35 @@ def warp_log_solution():
     result = techcorp_ai.execute_log_command(problem, solution, category)
     return jsonify({'status': 'success', 'message': result})
 
+@app.route('/warp-ai/solutions')
+def warp_solutions():
+    """Logged solutions for review, filtered by status and/or category"""
+    solutions = techcorp_ai.kb.query_solutions(
+        status=request.args.get('status'),
+        category=request.args.get('category'),
+        limit=request.args.get('limit', type=int)
+    )
+    return jsonify({
+        'solutions': solutions,
+        'counts': techcorp_ai.kb.solutions_journal.counts()
+    })
+
+def handle_solution_review(solution_id, data):
+    """Record a review decision; approved solutions are promoted into the KBs in the background"""
+    try:
+        solution = promotion_pipeline.review(solution_id, data.get('status', ''), data.get('reviewer'))
+    except ValueError as e:
+        return {'status': 'error', 'message': str(e)}, 400
+    if solution is None:
+        return {'status': 'error', 'message': f"Unknown solution: {solution_id}"}, 404
+    return {'status': 'success', 'solution': solution, 'promotion': promotion_pipeline.get_status()}, 200
+
+@app.route('/warp-ai/solutions/<solution_id>/review', methods=['POST'])
+def warp_review_solution(solution_id):
+    """Approve or reject a logged solution"""
+    body, status_code = handle_solution_review(solution_id, request.json or {})
+    return jsonify(body), status_code
+
 @app.route('/warp-ai/conversation-context')
 def warp_conversation_context():
     """Get TechCorp Warp AI conversation context"""
@@ -231,6 +283,8 @@ if __name__ == '__main__':
         os.makedirs(templates_dir)
     
     print("Starting TechCorp Chatbot Web Interface...")
+    warm_up_services()
+    kb_watcher.start()
     print("Access the chatbot at: http://localhost:5000")
     print("Admin dashboard at: http://localhost:5000/dashboard")
     app.run(debug=True, host='0.0.0.0', port=5000)